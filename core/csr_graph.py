@@ -0,0 +1,306 @@
+# compact graph, coordinates in arrays and adjacency in CSR (compressed sparse row) form
+
+import random
+
+import numpy as np
+
+from core.graph import Node, Edge, Graph
+
+
+class CSRNode:
+    '''
+    Lightweight view of one node of a CSRGraph, created on demand.
+    Offers the same interface as Node, reads and writes the graph's arrays.
+    '''
+    __slots__ = ('graph', 'index')
+
+    def __init__(self, graph: "CSRGraph", index: int) -> None:
+        self.graph = graph
+        self.index = index
+
+    def __str__(self) -> str:
+        return "(" + str(self.posX) + "," + str(self.posY) + ")"
+
+    @property
+    def posX(self):
+        return self.graph.xs[self.index].item()
+
+    @posX.setter
+    def posX(self, value) -> None:
+        self.graph.xs[self.index] = value
+        self.graph.touch()
+
+    @property
+    def posY(self):
+        return self.graph.ys[self.index].item()
+
+    @posY.setter
+    def posY(self, value) -> None:
+        self.graph.ys[self.index] = value
+        self.graph.touch()
+
+    @property
+    def data(self):
+        data = self.graph.node_data.get(self.index)
+        if data is None and self.graph.node_columns:
+            data = self.graph.columnData(self.index)
+        return data
+
+    @data.setter
+    def data(self, value) -> None:
+        if value is None:
+            self.graph.node_data.pop(self.index, None)
+        else:
+            self.graph.node_data[self.index] = value
+
+    def x(self):
+        return self.posX
+
+    def y(self):
+        return self.posY
+
+    def move(self, posx, posy):
+        '''sets a new position, the graph's hash changes with it'''
+        self.graph.xs[self.index] = posx
+        self.graph.ys[self.index] = posy
+        self.graph.touch()
+
+    def __eq__(self, n) -> bool:
+        return isinstance(n, CSRNode) and self.index == n.index and self.graph is n.graph
+
+    def __hash__(self) -> int:
+        return hash(self.index)
+
+    def nextEdge(self):
+        '''generator method, iterates through the incident edges'''
+        graph = self.graph
+        start, end = graph.offsets[self.index], graph.offsets[self.index + 1]
+        for edge_id in graph.edge_ids[start:end].tolist():
+            yield CSREdge(graph, edge_id)
+
+    def nextNeighbor(self):
+        '''generator method, iterates through the adjacent nodes'''
+        graph = self.graph
+        start, end = graph.offsets[self.index], graph.offsets[self.index + 1]
+        for index in graph.neighbors[start:end].tolist():
+            yield CSRNode(graph, index)
+
+    def addData(self, data):
+        self.data = data
+
+    def getData(self):
+        return self.data
+
+
+class CSREdge:
+    '''Lightweight view of one edge of a CSRGraph, created on demand.'''
+    __slots__ = ('graph', 'index')
+
+    def __init__(self, graph: "CSRGraph", index: int) -> None:
+        self.graph = graph
+        self.index = index
+
+    def __str__(self) -> str:
+        return str(self.node1) + " -> " + str(self.node2)
+
+    @property
+    def node1(self) -> CSRNode:
+        return CSRNode(self.graph, int(self.graph.edge_u[self.index]))
+
+    @property
+    def node2(self) -> CSRNode:
+        return CSRNode(self.graph, int(self.graph.edge_v[self.index]))
+
+    def n1(self) -> CSRNode:
+        return self.node1
+
+    def n2(self) -> CSRNode:
+        return self.node2
+
+    def __eq__(self, e) -> bool:
+        return isinstance(e, CSREdge) and self.index == e.index and self.graph is e.graph
+
+    def __hash__(self) -> int:
+        return hash(self.index)
+
+
+class _ItemView:
+    '''read-only sequence of node or edge views, for code indexing graph.nodes / graph.edges'''
+
+    def __init__(self, graph: "CSRGraph", item_class, count) -> None:
+        self.graph = graph
+        self.item_class = item_class
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self.count()
+        if not 0 <= index < self.count():
+            raise IndexError(index)
+        return self.item_class(self.graph, index)
+
+    def __iter__(self):
+        for index in range(self.count()):
+            yield self.item_class(self.graph, index)
+
+
+class CSRGraph:
+    '''
+    Array backed graph for large node counts.
+    Node coordinates are kept in xs, ys arrays, edges in edge_u, edge_v
+    endpoint index arrays. The adjacency is in CSR form: the incident
+    edges of node i are edge_ids[offsets[i]:offsets[i+1]], the node on
+    their other end is in neighbors at the same positions.
+    Nodes and edges are iterated as CSRNode / CSREdge views with the
+    same API as Node and Edge, optional node data is stored sparsely.
+    Node data can also come from integer columns (node_columns, name ->
+    array, -1 where missing, eg.: after loading from a file); a node's
+    dict is only built when its data is read, node_data overrides it.
+    '''
+
+    def __init__(self, xs=(), ys=(), edge_u=(), edge_v=(), dtype=np.float64,
+                 adjacency: tuple = None) -> None:
+        '''adjacency: already built (offsets, neighbors, edge_ids) arrays, eg.: from a file'''
+        self.xs = np.asarray(xs, dtype=dtype)
+        self.ys = np.asarray(ys, dtype=dtype)
+        self.edge_u = np.asarray(edge_u, dtype=np.int32)
+        self.edge_v = np.asarray(edge_v, dtype=np.int32)
+        self.node_data = {}
+        self.node_columns = {}
+        self.nodes = _ItemView(self, CSRNode, self.nodeCount)
+        self.edges = _ItemView(self, CSREdge, self.edgeCount)
+        self.hash_seed = random.randint(0, 9999999)
+        self.revision = 0
+        if adjacency is None:
+            self.buildAdjacency()
+        else:
+            self.offsets, self.neighbors, self.edge_ids = adjacency
+
+    def __hash__(self) -> int:
+        '''changes with every modification (revision counter), O(1)'''
+        return hash((self.hash_seed, self.revision))
+
+    def touch(self):
+        '''marks the graph changed, for writes made straight into the arrays'''
+        self.revision += 1
+
+    def buildAdjacency(self) -> None:
+        '''(re)builds the CSR arrays from the edge endpoint arrays'''
+        n = len(self.xs)
+        m = len(self.edge_u)
+        ends = np.concatenate((self.edge_u, self.edge_v))
+        others = np.concatenate((self.edge_v, self.edge_u))
+        ids = np.concatenate((np.arange(m, dtype=np.int32), np.arange(m, dtype=np.int32)))
+        order = np.argsort(ends, kind='stable')
+        self.neighbors = others[order]
+        self.edge_ids = ids[order]
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ends, minlength=n), out=self.offsets[1:])
+        self.revision += 1
+
+    def nodeCount(self) -> int:
+        return len(self.xs)
+
+    def edgeCount(self) -> int:
+        return len(self.edge_u)
+
+    def columnData(self, index: int):
+        '''node data dict of a node from the node columns, None if it has no values'''
+        data = {name: int(column[index]) for name, column in self.node_columns.items()
+                if column[index] != -1}
+        return data or None
+
+    def degree(self, index: int) -> int:
+        return int(self.offsets[index + 1] - self.offsets[index])
+
+    def node(self, index: int) -> CSRNode:
+        return CSRNode(self, index)
+
+    def edge(self, index: int) -> CSREdge:
+        return CSREdge(self, index)
+
+    def nextNode(self):
+        '''generator method, iterates through the nodes'''
+        for index in range(self.nodeCount()):
+            yield CSRNode(self, index)
+
+    def nextEdge(self):
+        '''generator method, iterates through the edges'''
+        for index in range(self.edgeCount()):
+            yield CSREdge(self, index)
+
+    def clearGraph(self):
+        '''deletes all the nodes and edges'''
+        self.xs = self.xs[:0]
+        self.ys = self.ys[:0]
+        self.edge_u = self.edge_u[:0]
+        self.edge_v = self.edge_v[:0]
+        self.node_data.clear()
+        self.node_columns.clear()
+        self.buildAdjacency()
+
+    def nbytes(self) -> int:
+        '''memory used by the coordinate and adjacency arrays'''
+        return sum(array.nbytes for array in (self.xs, self.ys, self.edge_u, self.edge_v,
+                                              self.offsets, self.neighbors, self.edge_ids))
+
+    @classmethod
+    def fromGraph(cls, graph: Graph, dtype=np.float64) -> "CSRGraph":
+        '''
+        Converts a Node/Edge object graph into array form, node data is kept.
+
+        Args:
+            graph (Graph): source graph, eg.: a VisGraph
+            dtype: coordinate array type
+
+        Returns:
+            CSRGraph: new graph with the nodes in graph.nodes order
+        '''
+        index = {id(node): i for i, node in enumerate(graph.nextNode())}
+        edges = [(index[id(edge.n1())], index[id(edge.n2())]) for edge in graph.nextEdge()]
+        result = cls([node.x() for node in graph.nextNode()],
+                     [node.y() for node in graph.nextNode()],
+                     [u for u, _ in edges],
+                     [v for _, v in edges],
+                     dtype)
+        for i, node in enumerate(graph.nextNode()):
+            if node.data is not None:
+                result.node_data[i] = node.data
+        return result
+
+    def toGraph(self, graph: Graph = None) -> Graph:
+        '''
+        Converts back into Node and Edge objects.
+
+        Args:
+            graph (Graph): empty target graph (eg.: VisGraph()), a new Graph if None
+
+        Returns:
+            Graph: the filled graph, nodes are in index order
+        '''
+        if graph is None:
+            graph = Graph()
+        nodes = [Node(x, y) for x, y in zip(self.xs.tolist(), self.ys.tolist())]
+        if self.node_columns:
+            for index, node in enumerate(nodes):
+                node.data = self.columnData(index)
+        for index, data in self.node_data.items():
+            nodes[index].data = data
+        for node in nodes:
+            graph.addNode(node)
+        for u, v in zip(self.edge_u.tolist(), self.edge_v.tolist()):
+            edge = Edge(nodes[u], nodes[v])
+            graph.addEdge(edge)
+            nodes[u].addEdge(edge)
+            nodes[v].addEdge(edge)
+        return graph
+
+
+if __name__ == "__main__":
+    graph = CSRGraph([0, 10, 20], [0, 10, 0], [0, 1], [1, 2])
+    for node in graph.nextNode():
+        print(node, [str(edge) for edge in node.nextEdge()])
+    print(f"{graph.nbytes()} bytes")
@@ -0,0 +1,50 @@
+# disjoint-set (union-find) structure
+
+class DisjointSet:
+    '''
+    Union-find over the elements 0..n-1, with path compression
+    and union by rank: near constant amortized time per operation.
+    '''
+
+    def __init__(self, size: int = 0) -> None:
+        self.parent = list(range(size))
+        self.rank = [0] * size
+        self.count = size   # number of disjoint sets
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def add(self) -> int:
+        '''adds a new single element set, returns the element'''
+        element = len(self.parent)
+        self.parent.append(element)
+        self.rank.append(0)
+        self.count += 1
+        return element
+
+    def find(self, element: int) -> int:
+        '''representative element of the set containing element'''
+        parent = self.parent
+        root = element
+        while parent[root] != root:
+            root = parent[root]
+        while parent[element] != root:      # path compression
+            parent[element], element = root, parent[element]
+        return root
+
+    def union(self, element1: int, element2: int) -> bool:
+        '''merges the two sets, returns False if they were already the same set'''
+        root1 = self.find(element1)
+        root2 = self.find(element2)
+        if root1 == root2:
+            return False
+        if self.rank[root1] < self.rank[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        if self.rank[root1] == self.rank[root2]:
+            self.rank[root1] += 1
+        self.count -= 1
+        return True
+
+    def connected(self, element1: int, element2: int) -> bool:
+        return self.find(element1) == self.find(element2)
@@ -10,6 +10,7 @@ class Node:
         self.posY = posy
         self.data = None
         self.edges = []
+        self.hash_cache = None
 
     def __str__(self) -> str:
         return "(" + str(self.posX) + "," + str(self.posY) + ")"
@@ -27,7 +28,16 @@ class Node:
             return False
 
     def __hash__(self) -> int:
-        return int(self.posX * self.posY)
+        '''coordinate tuple hash, cached: change the position with move()'''
+        if self.hash_cache is None:
+            self.hash_cache = hash((self.posX, self.posY))
+        return self.hash_cache
+
+    def move(self, posx, posy):
+        '''sets a new position'''
+        self.posX = posx
+        self.posY = posy
+        self.hash_cache = None
 
     def addEdge(self, edge):
         self.edges.append(edge)
@@ -70,41 +80,78 @@ class Edge:
             return False
 
     def __hash__(self) -> int:
-        return int(self.node1.__hash__()/2 + self.node2.__hash__()/2)
+        '''independent of the direction, like __eq__'''
+        hash1 = hash(self.node1)
+        hash2 = hash(self.node2)
+        if hash1 > hash2:
+            hash1, hash2 = hash2, hash1
+        return hash((hash1, hash2))
 
 class Graph:
-    '''Simple graph class. Uses node and edge lists.'''
+    '''
+    Simple graph class. Uses node and edge lists.
+    The nodes are indexed by object id for constant time membership checks,
+    with unique_edges an edge index rejects repeated undirected edges.
+    '''
 
-    def __init__(self) -> None:
+    def __init__(self, unique_edges: bool = False) -> None:
         self.nodes = []
         self.edges = []
-        self.nodes_hash_seed = random.randint(0, 9999999)
-        self.edges_hash_seed = random.randint(0, 9999999)
+        self.node_index = set()
+        self.edge_index = set() if unique_edges else None
+        self.hash_seed = random.randint(0, 9999999)
+        self.revision = 0
 
     def __hash__(self) -> int:
-        '''Every newly created graph object got different hash, based on nodes and edges.'''
-        node_avg = 0
-        edge_avg = 0
-        nodes_hash = self.nodes_hash_seed
-        edges_hash = self.edges_hash_seed
-        for node in self.nextNode():
-            nodes_hash += hash(node)
-        for edge in self.nextEdge():
-            edges_hash += hash(edge)
-        if len(self.nodes) != 0:
-            node_avg = nodes_hash / len(self.nodes)
-        if len(self.edges) != 0:
-            edge_avg = edges_hash / len(self.edges)
-        return int((node_avg + edge_avg)/2)
-        
-    def addNode(self, node: Node):
+        '''
+        Every newly created graph object got different hash,
+        it changes with every modification (revision counter), O(1).
+        '''
+        return hash((self.hash_seed, self.revision))
+
+    def touch(self):
+        '''marks the graph changed, for modifications made outside its methods (eg.: moved nodes)'''
+        self.revision += 1
+
+    def addNode(self, node: Node) -> bool:
+        '''adds the node if it is not in the graph yet, returns True if added'''
+        if id(node) in self.node_index:
+            return False
+        self.node_index.add(id(node))
         self.nodes.append(node)
-
-    def addEdge(self, edge: Edge):
-        if self.nodes.count(edge.n1()) == 0 or self.nodes.count(edge.n2()) == 0:
+        self.revision += 1
+        return True
+
+    def hasNode(self, node: Node) -> bool:
+        return id(node) in self.node_index
+
+    def edgeKey(self, edge: Edge) -> tuple:
+        '''direction independent key of the edge in the edge index'''
+        id1 = id(edge.n1())
+        id2 = id(edge.n2())
+        return (id1, id2) if id1 < id2 else (id2, id1)
+
+    def addEdge(self, edge: Edge) -> bool:
+        '''
+        adds the edge between two nodes of the graph,
+        returns False if edges are unique and it is already in the graph
+        '''
+        if id(edge.n1()) not in self.node_index or id(edge.n2()) not in self.node_index:
             raise self.InvalidVertexError(f"add_edge failed, start or end node missing: {edge}")
-        else:
-            self.edges.append(edge)
+        if self.edge_index is not None:
+            key = self.edgeKey(edge)
+            if key in self.edge_index:
+                return False
+            self.edge_index.add(key)
+        self.edges.append(edge)
+        self.revision += 1
+        return True
+
+    def hasEdge(self, edge: Edge) -> bool:
+        '''with unique edges: is there an edge between the same two nodes'''
+        if self.edge_index is not None:
+            return self.edgeKey(edge) in self.edge_index
+        return edge in self.edges
 
     def nextNode(self):
         '''generator method, iterates through the nodes'''
@@ -117,11 +164,14 @@ class Graph:
             yield edge
 
     def clearGraph(self):
-        '''deletes all the nodes and edges, resets hash seeds'''
+        '''deletes all the nodes and edges, resets hash seed'''
         self.edges.clear()
         self.nodes.clear()
-        self.nodes_hash_seed = random.randint(0, 999999)
-        self.edges_hash_seed = random.randint(0, 999999)
+        self.node_index.clear()
+        if self.edge_index is not None:
+            self.edge_index.clear()
+        self.hash_seed = random.randint(0, 999999)
+        self.revision = 0
 
     class InvalidVertexError(Exception):
         def __init__(self, message):
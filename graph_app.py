@@ -1,15 +1,19 @@
 # PyQT5 app for graph visualization. Generating, searching, traversing, etc in one place.
 
+import copy
 import sys
 
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QKeyEvent
-from PyQt5.QtWidgets import QComboBox, QGridLayout, QLabel, QMainWindow, QPushButton, QSpinBox, QStatusBar, QToolBar, QWidget
+from PyQt5.QtGui import QCloseEvent, QKeyEvent
+from PyQt5.QtWidgets import QCheckBox, QComboBox, QFileDialog, QGridLayout, QLabel, QMainWindow, QPushButton, QSpinBox, QStatusBar, QToolBar, QWidget
 from PyQt5.QtWidgets import QApplication
 
+import graph_file
 import graph_methods
 from graph_render_widget import GraphRender
 from graph_generator import GraphGenerator
+from graph_visualisation import VisGraph
+from job_runner import Job, JobRunner
 
 class MainWindow(QMainWindow):
     '''window for visualizing and controlling graphs'''
@@ -17,29 +21,40 @@ class MainWindow(QMainWindow):
     def __init__(self, parent=None) -> None:
         super().__init__(parent)
         self.setWindowTitle("Graph App")
-        self.renderer = GraphRender()
+        self.jobs = JobRunner(self)
+        self.renderer = GraphRender(self.jobs)
         self.setCentralWidget(self.renderer)
         # set up graph generator and renderer
         self.graphGen = GraphGenerator()
         self.graphGen.area_w = self.renderer.area_w
         self.graphGen.area_h = self.renderer.area_h
         self.graph = self.graphGen.genGraph()
+        graph_methods.highlightSpanningTree(self.graph)
         self.renderer.setGraph(self.graph)
-        self.newGraph()
         # set up menus and bars
         file_menu = self.menuBar().addMenu("&File")
         file_menu.addAction("&New")
-        file_menu.addAction("&Save")
-        file_menu.addAction("&Load")
+        file_menu.addAction("&Save", self.saveGraph)
+        file_menu.addAction("&Load", self.loadGraph)
+        file_menu.addAction("&Import Points...", self.importPoints)
         file_menu.addAction("E&xit", self.close)
         view_menu = self.menuBar().addMenu("&View")
         view_menu.addAction("Voronoi &Background", self.renderer.drawBackground)
+        view_menu.addAction("&Reset Zoom", self.renderer.resetView)
+        voronoi_cells = view_menu.addAction("Voronoi &Cells")
+        voronoi_cells.setCheckable(True)
+        voronoi_cells.toggled.connect(self.renderer.setVoronoiCells)
+        voronoi_coloring = view_menu.addAction("Color Cells by &Component")
+        voronoi_coloring.setCheckable(True)
+        voronoi_coloring.toggled.connect(self.renderer.setVoronoiColoring)
         toolBar = self.createToolBar()
         toolBar.setOrientation(Qt.Vertical)
         self.addToolBar(Qt.RightToolBarArea, toolBar)
         statusBar = QStatusBar()
         statusBar.showMessage("Status Bar! Better than Space Bar!")
         self.setStatusBar(statusBar)
+        self.jobs.progressed.connect(self.showProgress)
+        self.jobs.finished.connect(self.showFinished)
 
     def keyPressEvent(self, a0: QKeyEvent) -> None:
         if a0.key() == Qt.Key.Key_F10:
@@ -56,13 +71,14 @@ class MainWindow(QMainWindow):
     def createToolBar(self) -> QToolBar:
         toolBar = QToolBar(self)
         toolBar.addAction("New Graph", self.newGraph)
+        toolBar.addAction("Cancel", self.jobs.cancelAll)
         toolBar.addSeparator()
         toolBar.addWidget(QLabel("Node generator:"))
-        nodeStratBox = QComboBox(toolBar)
-        nodeStratBox.addItems(self.graphGen.nodeStrategyList)
-        nodeStratBox.currentIndexChanged.connect(self.setNewNodeStrategy)
-        nodeStratBox.setCurrentIndex(self.graphGen.nodeStrategy)
-        toolBar.addWidget(nodeStratBox)
+        self.nodeStratBox = QComboBox(toolBar)
+        self.nodeStratBox.addItems(self.graphGen.nodeStrategyList)
+        self.nodeStratBox.currentIndexChanged.connect(self.setNewNodeStrategy)
+        self.nodeStratBox.setCurrentIndex(self.graphGen.nodeStrategy)
+        toolBar.addWidget(self.nodeStratBox)
         toolBar.addWidget(QLabel("\nEdge generator:"))
         edgeStratBox = QComboBox(toolBar)
         edgeStratBox.addItems(self.graphGen.edgeStrategyList)
@@ -87,6 +103,13 @@ class MainWindow(QMainWindow):
         self.edgeChance.setRange(0, 100)
         self.edgeChance.setValue(self.graphGen.connection_chance)
         self.edgeChance.valueChanged.connect(self.setConnectionChance)
+        self.closestK = QSpinBox()
+        self.closestK.setRange(1, 50)
+        self.closestK.setValue(self.graphGen.closestK)
+        self.closestK.valueChanged.connect(self.setClosestK)
+        self.mutualClosest = QCheckBox("mutual")
+        self.mutualClosest.setChecked(self.graphGen.mutualClosest)
+        self.mutualClosest.toggled.connect(self.setMutualClosest)
         graphGrid = QGridLayout()
         graphGrid.setColumnMinimumWidth(0, 20)
         graphGrid.setColumnMinimumWidth(1, 30)
@@ -98,6 +121,9 @@ class MainWindow(QMainWindow):
         graphGrid.addWidget(self.nodeNumber)
         graphGrid.addWidget(QLabel("Edge forming\nchance:"))
         graphGrid.addWidget(self.edgeChance)
+        graphGrid.addWidget(QLabel("Closest k:"))
+        graphGrid.addWidget(self.closestK)
+        graphGrid.addWidget(self.mutualClosest)
         graphGridHolder = QWidget()
         graphGridHolder.setLayout(graphGrid)
         toolBar.addWidget(graphGridHolder)
@@ -106,12 +132,75 @@ class MainWindow(QMainWindow):
         return toolBar
 
     def newGraph(self):
-        self.graph = self.graphGen.genGraph()
-        #self.graph.highlighted_node = graph_methods.breadth_first(self.graph, self.graph.nodes[0])
-        #graph_methods.highlightComponents(self.graph)
-        graph_methods.highlightSpanningTree(self.graph)
+        '''generates a new graph in a background job, a generation still running is cancelled'''
+        generator = copy.copy(self.graphGen)
+        generator.graph = VisGraph(unique_edges=True)
+        self.jobs.start('generate', self.generateGraph, generator, on_result=self.setGraph)
+
+    @staticmethod
+    def generateGraph(job: Job, generator: GraphGenerator) -> VisGraph:
+        '''job function, works on its own generator copy and graph'''
+        generator.progress = job.progress
+        graph = generator.genGraph()
+        job.progress(90, "spanning tree")
+        #graph.highlighted_node = graph_methods.breadth_first(graph, graph.nodes[0])
+        #graph_methods.highlightComponents(graph)
+        graph_methods.highlightSpanningTree(graph)
+        return graph
+
+    def setGraph(self, graph: VisGraph):
+        self.graph = graph
+        self.graphGen.graph = graph
+        self.renderer.setGraph(graph)
+
+    def saveGraph(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Save Graph", "", "Graph files (*.graph);;All files (*)")
+        if not path:
+            return
+        try:
+            graph_file.saveGraph(self.graph, path)
+        except (OSError, ValueError) as error:
+            self.statusBar().showMessage(f"save failed: {error}")
+        else:
+            self.statusBar().showMessage(f"saved {path}")
 
-        self.renderer.repaint()        
+    def loadGraph(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Load Graph", "", "Graph files (*.graph);;All files (*)")
+        if not path:
+            return
+        self.jobs.cancel('generate')
+        try:
+            graph = graph_file.loadGraph(path)
+        except (OSError, ValueError) as error:
+            self.statusBar().showMessage(f"load failed: {error}")
+            return
+        self.setGraph(graph)
+        self.statusBar().showMessage(f"{len(graph.nodes)} nodes, {len(graph.edges)} edges loaded")
+
+    def importPoints(self):
+        '''generates a graph on the points of a CSV or .npy file with the current edge strategy'''
+        path, _ = QFileDialog.getOpenFileName(self, "Import Points", "",
+                                              "Point files (*.csv *.txt *.npy);;All files (*)")
+        if not path:
+            return
+        self.graphGen.pointFile = path
+        self.nodeStratBox.setCurrentIndex(self.graphGen.nodeStrategyList.index('File Coords'))
+        self.newGraph()
+
+    def showProgress(self, channel: str, percent: int, message: str):
+        self.statusBar().showMessage(f"{channel}: {message} {percent}%")
+
+    def showFinished(self, channel: str, error: str):
+        if error:
+            self.statusBar().showMessage(f"{channel} failed: {error}")
+        elif channel == 'generate':
+            self.statusBar().showMessage(f"{len(self.graph.nodes)} nodes, {len(self.graph.edges)} edges")
+        else:
+            self.statusBar().showMessage(f"{channel} done")
+
+    def closeEvent(self, a0: QCloseEvent) -> None:
+        self.jobs.shutdown()
+        return super().closeEvent(a0)
 
     def setNewNodeStrategy(self, index: int):
         self.graphGen.nodeStrategy = index
@@ -135,6 +224,12 @@ class MainWindow(QMainWindow):
     def setConnectionChance(self, value: int):
         self.graphGen.connection_chance = value
 
+    def setClosestK(self, value: int):
+        self.graphGen.closestK = value
+
+    def setMutualClosest(self, checked: bool):
+        self.graphGen.mutualClosest = checked
+
     def setNumberOfRegionsX(self, value: int):
         self.graphGen.numberOfRegionsX = value
 
@@ -0,0 +1,159 @@
+# command line graph generation and analysis, no GUI (PyQt5 is never imported)
+#
+# eg.: python graph_cli.py --nodes 50 --regions 20 20 --edges delaunay --seeds 1-16 --workers 4 --out results
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+NODE_STRATEGIES = {'area': 0, 'region': 1, 'poisson': 2, 'halton': 3, 'sobol': 4, 'jitter': 5, 'file': 6}
+EDGE_STRATEGIES = {'random': 0, 'closest': 1, 'delaunay': 2}
+ANALYSES = ['components', 'mst', 'length']
+
+
+def parseSeeds(text: str) -> list[int]:
+    '''"1-4,10" -> [1, 2, 3, 4, 10]'''
+    seeds = []
+    for part in text.split(','):
+        if '-' in part.strip('-'):
+            first, last = part.split('-', 1)
+            seeds.extend(range(int(first), int(last) + 1))
+        else:
+            seeds.append(int(part))
+    return seeds
+
+
+def runSeed(seed: int, settings: dict) -> dict:
+    '''
+    Worker function: generates and analyses one graph, writes it to disk.
+
+    Args:
+        seed (int): random seed of the generator
+        settings (dict): parsed command line options
+
+    Returns:
+        dict: summary of the graph, written as one line of summary.jsonl
+    '''
+    # imported in the worker, the main process only parses arguments and collects results
+    import graph_methods
+    from graph_components import ConnectedComponents
+    from graph_generator import GraphGenerator
+
+    start_time = time.perf_counter()
+    generator = GraphGenerator()
+    generator.seed = seed
+    generator.area_w = settings['width']
+    generator.area_h = settings['height']
+    generator.numberOfNodes = settings['nodes']
+    generator.numberOfRegionsX, generator.numberOfRegionsY = settings['regions']
+    generator.nodeStrategy = NODE_STRATEGIES[settings['node_strategy']]
+    generator.edgeStrategy = EDGE_STRATEGIES[settings['edge_strategy']]
+    generator.connection_chance = settings['chance']
+    generator.closestK = settings['k']
+    generator.mutualClosest = settings['mutual']
+    generator.delaunayMethod = settings['delaunay_method']
+    generator.pointFile = settings['points']
+    generator.chunkSize = settings['chunk_size']
+    graph = generator.genGraph()
+    summary = {'seed': seed,
+               'nodes': len(graph.nodes),
+               'edges': len(graph.edges),
+               'generate_s': round(time.perf_counter() - start_time, 4)}
+    if 'components' in settings['analyses']:
+        summary['components'] = ConnectedComponents(graph).componentCount()
+    if 'length' in settings['analyses']:
+        summary['length'] = sum(graph_methods.edgeLength(edge) for edge in graph.nextEdge())
+    if 'mst' in settings['analyses']:
+        tree = graph_methods.minimumSpanningTree(graph, 'kruskal')
+        summary['mst_edges'] = len(tree)
+        summary['mst_length'] = sum(graph_methods.edgeLength(edge) for edge in tree)
+    if settings['out']:
+        path = os.path.join(settings['out'], f"graph_{seed}.txt")
+        writeGraph(graph, path)
+        summary['file'] = path
+    summary['total_s'] = round(time.perf_counter() - start_time, 4)
+    return summary
+
+
+def writeGraph(graph, path: str) -> None:
+    '''plain text export: node coordinates, then edges as node index pairs'''
+    index = {id(node): i for i, node in enumerate(graph.nextNode())}
+    with open(path, 'w') as file:
+        file.write(f"# nodes {len(graph.nodes)}\n")
+        file.writelines(f"{node.x()} {node.y()}\n" for node in graph.nextNode())
+        file.write(f"# edges {len(graph.edges)}\n")
+        file.writelines(f"{index[id(edge.n1())]} {index[id(edge.n2())]}\n" for edge in graph.nextEdge())
+
+
+def parseArguments(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generates and analyses graphs without the GUI.")
+    parser.add_argument('--nodes', type=int, default=15,
+                        help="node number, except for the area strategy: per region (nodes * X * Y in total)")
+    parser.add_argument('--regions', type=int, nargs=2, default=(7, 7), metavar=('X', 'Y'),
+                        help="region grid of the region strategy")
+    parser.add_argument('--node-strategy', choices=NODE_STRATEGIES, default='region')
+    parser.add_argument('--edges', dest='edge_strategy', choices=EDGE_STRATEGIES, default='delaunay')
+    parser.add_argument('--points', default=None, help="CSV or .npy point file, selects the file node strategy")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000,
+                        help="points read from the point file at once")
+    parser.add_argument('--delaunay-method', choices=['incremental', 'bowyer-watson'],
+                        default='incremental')
+    parser.add_argument('--chance', type=int, default=2, help="random edge chance in percent")
+    parser.add_argument('--k', type=int, default=2, help="neighbour number of the closest strategy")
+    parser.add_argument('--mutual', action='store_true', help="closest strategy: mutual neighbours only")
+    parser.add_argument('--size', type=int, nargs=2, default=(1024, 768), metavar=('W', 'H'))
+    parser.add_argument('--seeds', type=parseSeeds, default=[0], help="eg.: 1-8,20")
+    parser.add_argument('--analyses', nargs='*', choices=ANALYSES, default=['components'])
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="processes")
+    parser.add_argument('--out', default=None,
+                        help="output directory for the graphs and summary.jsonl, summary to stdout if not set")
+    return parser.parse_args(argv)
+
+
+def main(argv: list = None) -> int:
+    arguments = parseArguments(argv)
+    if arguments.points is not None:
+        arguments.node_strategy = 'file'
+    settings = {'nodes': arguments.nodes,
+                'regions': tuple(arguments.regions),
+                'node_strategy': arguments.node_strategy,
+                'edge_strategy': arguments.edge_strategy,
+                'delaunay_method': arguments.delaunay_method,
+                'points': arguments.points,
+                'chunk_size': arguments.chunk_size,
+                'chance': arguments.chance,
+                'k': arguments.k,
+                'mutual': arguments.mutual,
+                'width': arguments.size[0],
+                'height': arguments.size[1],
+                'analyses': arguments.analyses,
+                'out': arguments.out}
+    if arguments.out:
+        os.makedirs(arguments.out, exist_ok=True)
+        summary_file = open(os.path.join(arguments.out, 'summary.jsonl'), 'w')
+    else:
+        summary_file = sys.stdout
+    failed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, arguments.workers)) as pool:
+            futures = {pool.submit(runSeed, seed, settings): seed for seed in arguments.seeds}
+            # results are written as they finish, not in seed order
+            for future in as_completed(futures):
+                try:
+                    summary = future.result()
+                except Exception as error:
+                    summary = {'seed': futures[future], 'error': f"{type(error).__name__}: {error}"}
+                    failed += 1
+                summary_file.write(json.dumps(summary) + "\n")
+                summary_file.flush()
+    finally:
+        if summary_file is not sys.stdout:
+            summary_file.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
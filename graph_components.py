@@ -0,0 +1,96 @@
+# connected components labelling with union-find
+
+from core.disjoint_set import DisjointSet
+from graph_traversal import nodeKey
+
+
+class Component:
+    '''One connected component: its nodes, edges and spanning tree edges in graph order.'''
+
+    def __init__(self, number: int) -> None:
+        self.number = number
+        self.nodes = []
+        self.edges = []
+        self.tree_edges = []
+
+
+class ConnectedComponents:
+    '''
+    Labels the nodes of a graph by connected component in one pass
+    over the edge list. Edges and nodes added later are merged in
+    incrementally, without relabelling the whole graph.
+    Edges that joined two separate sets form a spanning forest.
+    '''
+
+    def __init__(self, graph) -> None:
+        self.graph = graph
+        self.sets = DisjointSet()
+        self.element = {}       # node key -> union-find element
+        self.nodes = []         # element -> node
+        self.edges = []
+        self.forest = set()     # indices of spanning forest edges in self.edges
+        self.cache = None
+        for node in graph.nextNode():
+            self.addNode(node)
+        for edge in graph.nextEdge():
+            self.addEdge(edge)
+
+    def addNode(self, node) -> None:
+        '''adds a node as a new single node component'''
+        key = nodeKey(node)
+        if key not in self.element:
+            self.element[key] = self.sets.add()
+            self.nodes.append(node)
+            self.cache = None
+
+    def addEdge(self, edge) -> bool:
+        '''
+        merges the components of the edge's nodes,
+        returns True if the edge connected two separate components
+        '''
+        self.addNode(edge.n1())
+        self.addNode(edge.n2())
+        merged = self.sets.union(self.element[nodeKey(edge.n1())],
+                                 self.element[nodeKey(edge.n2())])
+        if merged:
+            self.forest.add(len(self.edges))
+        self.edges.append(edge)
+        self.cache = None
+        return merged
+
+    def componentCount(self) -> int:
+        return self.sets.count
+
+    def connected(self, node1, node2) -> bool:
+        return self.sets.connected(self.element[nodeKey(node1)], self.element[nodeKey(node2)])
+
+    def label(self, node) -> int:
+        '''component number of the node, numbered from 1 in node order'''
+        self.components()
+        return self.cache[self.sets.find(self.element[nodeKey(node)])].number
+
+    def components(self) -> list[Component]:
+        '''
+        Groups the nodes and edges by component,
+        components are numbered in the order of their first node.
+        '''
+        if self.cache is None:
+            find = self.sets.find
+            by_root = {}
+            for element, node in enumerate(self.nodes):
+                root = find(element)
+                component = by_root.get(root)
+                if component is None:
+                    component = by_root[root] = Component(len(by_root) + 1)
+                component.nodes.append(node)
+            for index, edge in enumerate(self.edges):
+                component = by_root[find(self.element[nodeKey(edge.n1())])]
+                component.edges.append(edge)
+                if index in self.forest:
+                    component.tree_edges.append(edge)
+            self.cache = by_root
+        return list(self.cache.values())
+
+    def spanningForest(self) -> list:
+        '''edges of a spanning tree of every component'''
+        return [self.edges[index] for index in sorted(self.forest)]
@@ -0,0 +1,198 @@
+# binary graph file: header, coordinate, edge and adjacency arrays, optional columns
+#
+# layout (little endian, every array starts at a multiple of 8 bytes):
+#   header          HEADER struct
+#   columns         column_count * COLUMN struct: target, kind, dtype, name
+#   xs, ys          float32 or float64 [node_count]
+#   edge_u, edge_v  int32 [edge_count]
+#   offsets         int64 [node_count + 1]     CSR adjacency, see core.csr_graph
+#   neighbors       int32 [2 * edge_count]
+#   edge_ids        int32 [2 * edge_count]
+#   columns         one array per column, [node_count] or [edge_count]
+
+import os
+import struct
+
+import numpy as np
+
+from core.csr_graph import CSRGraph
+from graph_visualisation import CSRVisGraph
+
+MAGIC = b'GRPH'
+VERSION = 1
+HEADER = struct.Struct('<4sIQQII')     # magic, version, node count, edge count, coordinate size, column count
+COLUMN = struct.Struct('<BB2s28s')     # target, kind, dtype ('i4' or 'u1'), name
+NODE, EDGE = 0, 1                      # column targets
+DATA, HIGHLIGHT = 0, 1                 # column kinds: node data values / highlighting order
+MISSING = -1                           # int column value of nodes without that data
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def dataColumns(graph: CSRGraph) -> dict:
+    '''
+    Integer values of the node data dicts as columns, eg.: 'component'.
+    Values of other types are not kept.
+
+    Returns:
+        dict: name -> int32 array, MISSING where a node has no such value
+    '''
+    count = graph.nodeCount()
+    columns = {name: np.array(column, dtype=np.int32) for name, column in graph.node_columns.items()}
+    if graph.node_data:
+        # node_data overrides the columns of its nodes
+        overridden = np.fromiter(graph.node_data.keys(), np.int64, len(graph.node_data))
+        for column in columns.values():
+            column[overridden] = MISSING
+    for index, data in graph.node_data.items():
+        if not isinstance(data, dict):
+            continue
+        for name, value in data.items():
+            if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+                if name not in columns:
+                    columns[name] = np.full(count, MISSING, dtype=np.int32)
+                columns[name][index] = value
+    return columns
+
+
+def highlightColumn(items, count: int) -> np.ndarray:
+    '''highlighting order of the highlighted nodes or edges, MISSING for the rest'''
+    column = np.full(count, MISSING, dtype=np.int32)
+    indices = np.fromiter((item.index for item in items), np.int64)
+    column[indices] = np.arange(len(indices), dtype=np.int32)
+    return column
+
+
+def saveGraph(graph, path: str, dtype=None) -> None:
+    '''
+    Writes a graph into a binary graph file. The file is written next to
+    the target and renamed over it, so a graph loaded from path can be
+    saved back to the same path.
+
+    Args:
+        graph: Graph, VisGraph or CSR graph; object graphs are converted first
+        path (str): file name
+        dtype: coordinate type, np.float32 or np.float64; by default the
+               CSR graph's own, float64 for object graphs
+    '''
+    if not isinstance(graph, CSRGraph):
+        graph = CSRVisGraph.fromGraph(graph, np.float64 if dtype is None else dtype)
+    dtype = np.dtype(graph.xs.dtype if dtype is None else dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"unsupported coordinate type: {dtype}")
+    columns = [(NODE, DATA, name, column) for name, column in dataColumns(graph).items()]
+    if getattr(graph, 'highlighted_nodes', None):
+        columns.append((NODE, HIGHLIGHT, 'highlighted', highlightColumn(graph.highlighted_node, graph.nodeCount())))
+    if getattr(graph, 'highlighted_edges', None):
+        columns.append((EDGE, HIGHLIGHT, 'highlighted', highlightColumn(graph.highlighted_edge, graph.edgeCount())))
+    arrays = [graph.xs.astype(dtype, copy=False),
+              graph.ys.astype(dtype, copy=False),
+              graph.edge_u.astype(np.int32, copy=False),
+              graph.edge_v.astype(np.int32, copy=False),
+              graph.offsets.astype(np.int64, copy=False),
+              graph.neighbors.astype(np.int32, copy=False),
+              graph.edge_ids.astype(np.int32, copy=False)]
+    arrays += [column for _, _, _, column in columns]
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, graph.nodeCount(), graph.edgeCount(),
+                               dtype.itemsize, len(columns)))
+        for target, kind, name, column in columns:
+            encoded = name.encode('utf-8')
+            if len(encoded) > 28:
+                raise ValueError(f"column name too long: {name}")
+            file.write(COLUMN.pack(target, kind, column.dtype.str[1:].encode(), encoded))
+        for array in arrays:
+            file.write(bytes(_align(file.tell()) - file.tell()))
+            np.ascontiguousarray(array).astype(array.dtype.newbyteorder('<'), copy=False).tofile(file)
+    os.replace(temp_path, path)
+
+
+def loadGraph(path: str, graph_class=CSRVisGraph) -> CSRGraph:
+    '''
+    Opens a binary graph file. The arrays are memory mapped copy-on-write,
+    so nothing is read until it is used and changes (eg.: moved nodes) stay
+    in memory, the file is not modified. Node data is read from the data
+    columns on demand.
+
+    Args:
+        path (str): file name
+        graph_class: CSRGraph or a subclass, highlights are restored for CSRVisGraph
+
+    Returns:
+        CSRGraph: the loaded graph
+    '''
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{path}: not a graph file")
+        magic, version, node_count, edge_count, coordinate_size, column_count = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a graph file")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported graph file version {version}")
+        if coordinate_size not in (4, 8):
+            raise ValueError(f"{path}: unsupported coordinate size {coordinate_size}")
+        descriptors = []
+        for _ in range(column_count):
+            descriptor = file.read(COLUMN.size)
+            if len(descriptor) < COLUMN.size:
+                raise ValueError(f"{path}: truncated graph file")
+            target, kind, column_type, name = COLUMN.unpack(descriptor)
+            descriptors.append((target, kind, np.dtype('<' + column_type.decode()),
+                                name.rstrip(b'\0').decode('utf-8')))
+    offset = HEADER.size + column_count * COLUMN.size
+
+    def mapArray(dtype, count: int) -> np.ndarray:
+        nonlocal offset
+        offset = _align(offset)
+        dtype = np.dtype(dtype)
+        if offset + count * dtype.itemsize > size:
+            raise ValueError(f"{path}: truncated graph file")
+        if count == 0:
+            array = np.zeros(0, dtype=dtype)     # an empty range can not be mapped
+        else:
+            array = np.memmap(path, dtype=dtype, mode='c', offset=offset, shape=(count,))
+        offset += count * dtype.itemsize
+        return array
+
+    coordinate_type = np.float32 if coordinate_size == 4 else np.float64
+    xs = mapArray(coordinate_type, node_count)
+    ys = mapArray(coordinate_type, node_count)
+    edge_u = mapArray('<i4', edge_count)
+    edge_v = mapArray('<i4', edge_count)
+    adjacency = (mapArray('<i8', node_count + 1),
+                 mapArray('<i4', 2 * edge_count),
+                 mapArray('<i4', 2 * edge_count))
+    graph = graph_class(xs, ys, edge_u, edge_v, coordinate_type, adjacency=adjacency)
+    for target, kind, column_type, name in descriptors:
+        column = mapArray(column_type, node_count if target == NODE else edge_count)
+        if kind == DATA and target == NODE:
+            graph.node_columns[name] = column
+        elif kind == HIGHLIGHT and hasattr(graph, 'highlighted_nodes'):
+            indices = np.flatnonzero(column != MISSING)
+            indices = indices[np.argsort(column[indices], kind='stable')].tolist()
+            if target == NODE:
+                graph.highlighted_node = [graph.node(index) for index in indices]
+            else:
+                graph.highlighted_edge = [graph.edge(index) for index in indices]
+    return graph
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    # a large array graph opens without reading it, see tests/test_graph_file.py for the round trips
+    path = os.path.join(tempfile.mkdtemp(), "graph.bin")
+    count = 2_000_000
+    rng = np.random.default_rng(1)
+    big = CSRGraph(rng.random(count) * 1000, rng.random(count) * 1000,
+                   np.arange(count - 1), np.arange(1, count), np.float32)
+    saveGraph(big, path)
+    start_time = time.perf_counter()
+    loaded = loadGraph(path, CSRGraph)
+    print(f"{count} nodes loaded in {time.perf_counter() - start_time:.4f} s, degree of node 5: {loaded.degree(5)}")
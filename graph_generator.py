@@ -1,13 +1,16 @@
 # generates a graph with nodes on random coordinates
 
-import math
 import random
 
 from core.graph import Node, Edge, Graph
 from graph_visualisation import VisGraph
 
 from utilities.delaunay import Delaunay
-from utilities.node_generator import RandomCoords, RandomRegionCoords
+from utilities.node_generator import HaltonCoords, JitteredGridCoords, PoissonDiskCoords
+from utilities.node_generator import RandomCoords, RandomRegionCoords, SobolCoords
+from utilities.point_reader import readUniquePoints
+from utilities.spatial_index import knnPairs
+from utilities.triangulation import Triangulation
 
 
 class GraphGenerator:
@@ -17,7 +20,7 @@ class GraphGenerator:
     are developed here, others are called from different classes (Delaunay).
     '''
     def __init__(self) -> None:
-        self.graph = VisGraph()
+        self.graph = VisGraph(unique_edges=True)
         self.random = None
         self.numberOfRegionsX = 7
         self.numberOfRegionsY = 7
@@ -28,127 +31,149 @@ class GraphGenerator:
         self.random = None
         self.nodeStrategyList = ['Whole Area Coords',
                                  'Region Coords',
-                                 'Delaunay Coords'
+                                 'Poisson Disk Coords',
+                                 'Halton Coords',
+                                 'Sobol Coords',
+                                 'Jittered Grid Coords',
+                                 'File Coords'
                                 ]
         self.nodeStrategy = 1
         self.edgeStrategyList = ['Random connections',
-                                 'Two Closest nodes',
+                                 'k Closest nodes',
                                  'Delaunay triangulation'
                                 ]
         self.edgeStrategy = 2
+        self.closestK = 2
+        self.mutualClosest = False
+        self.delaunayMethod = 'incremental'
+        self.progress = None    # optional callable(percent, message), it may raise to abort
+        self.seed = None        # same seed and settings: same graph
+        self.rng = random.Random()
+        self.pointFile = None       # CSV or .npy file of the 'File Coords' strategy
+        self.chunkSize = 1_000_000  # points read (and triangulated) at once from pointFile
+        self.streamed = None        # (triangulation, vertex indices) built while reading pointFile
+        self.voronoi = None         # VoronoiGraph of the last Delaunay strategy graph
         
+    def reportProgress(self, percent: int, message: str) -> None:
+        if self.progress is not None:
+            self.progress(percent, message)
+
     def genGraph(self) -> Graph:
         '''Initiates a graph node and graph edge generator methods.
             Edge and node strategy set separately, eg.: in gui class'''
         self.graph.clearGraph()
+        self.rng = random.Random(self.seed)
+        self.streamed = None
+        self.voronoi = None
+        self.reportProgress(0, "creating nodes")
+        # the evenly spread strategies make as many nodes as the region strategy
+        spreadNodes = self.numberOfNodes * self.numberOfRegionsX * self.numberOfRegionsY
         if self.nodeStrategy == 0:
             self.random = RandomCoords(self.numberOfNodes)
-            self.createNodes_Random(self.area_w, self.area_h)
         elif self.nodeStrategy == 1:
             self.random = RandomRegionCoords(self.numberOfNodes,
                                              self.numberOfRegionsX,
                                              self.numberOfRegionsY)
-            self.createNodes_Random(self.area_w, self.area_h)
         elif self.nodeStrategy == 2:
-            pass
+            self.random = PoissonDiskCoords(spreadNodes)
+        elif self.nodeStrategy == 3:
+            self.random = HaltonCoords(spreadNodes)
+        elif self.nodeStrategy == 4:
+            self.random = SobolCoords(spreadNodes)
+        elif self.nodeStrategy == 5:
+            self.random = JitteredGridCoords(spreadNodes)
+        elif self.nodeStrategy == 6:
+            self.random = None
+            self.createNodes_File()
+        if self.random is not None:
+            self.random.setSeed(self.seed)
+            self.createNodes_Random(self.area_w, self.area_h)
 
+        self.reportProgress(20, "creating edges")
         if self.edgeStrategy == 0:
             self.createEdges_Random()
         elif self.edgeStrategy == 1:
-            self.createEdges_ClosestTwo()
+            self.createEdges_KClosest()
         elif self.edgeStrategy == 2:
             self.createEdges_Delaunay()
 
+        self.reportProgress(90, "graph generated")
         return self.graph
 
     def createNodes_Random(self, area_w: int, area_h: int) -> None:
         '''creates nodes on random coordinates'''
         coords = self.random.generate((0,0),(area_w,area_h))
-        for coord in coords:
-            self.graph.addNode(Node(coord[0], coord[1]))
+        for x, y in coords.tolist():
+            self.graph.addNode(Node(x, y))
+
+    def createNodes_File(self) -> None:
+        '''
+        Streams the nodes from pointFile chunk by chunk, coincident points
+        are added once. For incremental Delaunay edges every chunk is also
+        inserted into the triangulation right away, as one batch.
+        '''
+        if self.pointFile is None:
+            raise ValueError("no point file set for the 'File Coords' strategy")
+        triangulate = self.edgeStrategy == 2 and self.delaunayMethod == 'incremental'
+        triangulation = Triangulation(self.seed)
+        indices = []
+        for chunk in readUniquePoints(self.pointFile, self.chunkSize):
+            points = chunk.tolist()
+            for x, y in points:
+                self.graph.addNode(Node(x, y))
+            if triangulate:
+                indices.extend(triangulation.insertPoints(points))
+            self.reportProgress(10, f"{len(self.graph.nodes)} points read")
+        if triangulate:
+            self.streamed = (triangulation, indices)
+
+    def connect(self, n1: Node, n2: Node) -> None:
+        '''adds an edge to the graph and to both nodes, unless they are already connected'''
+        edge = Edge(n1, n2)
+        if self.graph.addEdge(edge):
+            n1.addEdge(edge)
+            n2.addEdge(edge)
 
     def createEdges_Random(self):
         '''randomly creates connections based on chance'''
         for n1 in self.graph.nextNode():
             for n2 in self.graph.nextNode():
-                if random.randint(0,100) < self.connection_chance:
-                    edge = Edge(n1, n2)
-                    self.graph.addEdge(edge)
-                    n1.addEdge(edge)
-                    n2.addEdge(edge)
+                if self.rng.randint(0,100) < self.connection_chance:
+                    self.connect(n1, n2)
 
-    def createEdges_ClosestTwo(self) -> None:
+    def createEdges_KClosest(self) -> None:
         '''
-        for every node we calculates the first and second closest
-        then creates and adds the edges to the graph and to the nodes
+        k-nearest-neighbour graph: connects every node to its k closest nodes,
+        with mutualClosest only if they are in each other's k closest too
         '''
-        
-        result = {}
-        first = None,math.inf
-        second = None,math.inf
-        for n1 in self.graph.nextNode():            # calculates the two closest node
-            for n2 in self.graph.nextNode():        # for each node, TODO: optimise calc
-                if n2 == n1:
-                    continue
-                diff = (abs(n1.x() - n2.x()), abs(n1.y() - n2.y()))
-                diff_length = math.sqrt(diff[0]**2 + diff[1]**2)
-                if diff_length < first[1]:
-                    first = n2,diff_length
-                elif diff_length < second[1]:
-                    second = n2,diff_length
-            result[n1] = [first[0], second[0]]
-            first = None,math.inf
-            second = None,math.inf
-
-        for node_from in result:                    # sets the neighbours for each node
-            first_closest = result[node_from][0]
-            second_closest = result[node_from][1]
-            first_edge = Edge(node_from,first_closest)
-            self.graph.addEdge(first_edge)
-            node_from.addEdge(first_edge)
-            first_closest.addEdge(first_edge)
-            second_edge = Edge(node_from,second_closest)
-            self.graph.addEdge(second_edge)
-            node_from.addEdge(second_edge)
-            second_closest.addEdge(second_edge)
+        nodes = self.graph.nodes
+        xs = [node.x() for node in nodes]
+        ys = [node.y() for node in nodes]
+        sources, targets = knnPairs(xs, ys, self.closestK, self.mutualClosest)
+        for i, j in zip(sources.tolist(), targets.tolist()):
+            self.connect(nodes[i], nodes[j])
 
     def createEdges_Delaunay(self):
         '''
-        with 3 point we can calculate the delaunay triangulation
+        Voronoi diagram of the nodes, the dual of their Delaunay triangulation:
+        the Voronoi vertices are added, connected by the finite Voronoi edges,
+        the nodes stay as the sites. The whole diagram (cells, rays) is kept
+        in self.voronoi.
         '''
-        delaunay = Delaunay()
-        new_edges,vor_nodes = delaunay.generate(self.graph.nodes)
-        if new_edges:
-            self.graph.nodes = []
-            self.graph.edges = []
-        
-        sites = {}
-        # create voronoi
-        for node1 in vor_nodes:
-            for node2 in vor_nodes:
-                node1_sites = node1.data['sites']
-                if len(node1_sites.intersection(node2.data['sites'])) == 2:
-                    common_nodes = list(node1_sites.intersection(node2.data['sites']))
-                    edge = Edge(node1,node2)
-                    node1.addEdge(edge)
-                    node2.addEdge(edge)
-                    self.graph.addNode(node1)
-                    self.graph.addNode(node2)
-                    self.graph.addNode(common_nodes[0])
-                    self.graph.addNode(common_nodes[1])
-                    self.graph.addEdge(edge)
-                    sites.setdefault(common_nodes[0], []).append(node1)
-                    #sites.setdefault(common_nodes[0], []).append(node2)
-                    #sites.setdefault(common_nodes[1], []).append(node1)
-                    #sites.setdefault(common_nodes[1], []).append(node2)
-
-        print("sites:")
-        for key in sites:
-            print(f"site: {key}")
-            for n in sites[key]:
-                print(n)
-        self.graph.edges = list(set(self.graph.edges))
-        self.graph.nodes = list(set(self.graph.nodes))
+        delaunay = Delaunay(self.delaunayMethod, self.seed)
+        delaunay.progress = lambda inserted, total: self.reportProgress(20 + 60 * inserted // total,
+                                                                        "triangulation")
+        nodes = list(self.graph.nodes)
+        if self.streamed is not None:
+            delaunay.triangulation, indices = self.streamed
+        else:
+            indices = delaunay.triangulate(nodes)
+        self.voronoi = delaunay.voronoi(nodes, indices)
+        for node in self.voronoi.nextNode():
+            self.graph.addNode(node)
+        for edge in self.voronoi.nextEdge():
+            # the nodes of the Voronoi graph know their edges already
+            self.graph.addEdge(edge)
 
 if __name__ == "__main__":
     graph_gen = GraphGenerator()
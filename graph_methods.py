@@ -1,7 +1,18 @@
 # graph related algorithms
 
+import heapq
+import math
+from typing import TYPE_CHECKING
+
 from core.graph import Graph, Node, Edge
-from graph_visualisation import VisGraph
+from core.disjoint_set import DisjointSet
+import graph_traversal
+from graph_components import ConnectedComponents
+from utilities.triangulation import Triangulation
+
+if TYPE_CHECKING:
+    # annotations only: importing graph_methods stays light (no numpy), usable without a GUI
+    from graph_visualisation import VisGraph
 
 def breadth_first(graph: Graph, start_node: Node) -> tuple:
     '''
@@ -15,24 +26,12 @@ def breadth_first(graph: Graph, start_node: Node) -> tuple:
     Returns:
         tuple: two list, traversed nodes and traversed edges
     '''
-    
-    nodes = [start_node]
-    discovered_nodes = nodes[:]
+    discovered_nodes = []
     discovered_edges = []
-    i = 0
-    while nodes:
-        i += 1
-        if i >= 300:
-            # failsafe, TODO:replace or delete
-            return discovered_nodes, discovered_edges
-        node = nodes.pop(0)
-        for edge in node.nextEdge():
-            new_node = edge.n1() if edge.n1() != node else edge.n2()
-            if new_node not in discovered_nodes:
-                discovered_nodes.append(new_node)
-                discovered_edges.append(edge)
-                nodes.append(new_node)
-            
+    for node, edge in graph_traversal.bfs(start_node):
+        discovered_nodes.append(node)
+        if edge is not None:
+            discovered_edges.append(edge)
     return discovered_nodes, discovered_edges
 
 def depth_first(graph: Graph, start_node: Node) -> list:
@@ -47,11 +46,11 @@ def depth_first(graph: Graph, start_node: Node) -> list:
     Returns:
         list: traversed nodes
     '''
-    pass
+    return [node for node, _ in graph_traversal.dfs(start_node)]
 
-def highlightComponents(graph: VisGraph) -> None:
+def highlightComponents(graph: "VisGraph") -> None:
     '''
-    Finds separate components in graph, starts in node[0] 
+    Finds separate components in graph (union-find labelling)
     and marks the nodes with appropriate component number.
 
     Args:
@@ -60,47 +59,177 @@ def highlightComponents(graph: VisGraph) -> None:
     Returns:
         None
     '''
-    componentNo = 1
-    nodeNo = 1
-    graph.highlighted_node, _ = breadth_first(graph, graph.nodes[0])
-    for node in graph.highlighted_node:
-        node.data = {'component': componentNo, 'number': nodeNo}
-        nodeNo += 1
+    highlighted_node = []
+    for component in ConnectedComponents(graph).components():
+        for nodeNo, node in enumerate(component.nodes, 1):
+            node.data = {'component': component.number, 'number': nodeNo}
+        highlighted_node.extend(component.nodes)
+    graph.highlighted_node = highlighted_node
+
+def highlightSpanningTree(graph: "VisGraph") -> None:
+    '''
+    Finds separate components in graph (union-find labelling)
+    and highlights the nodes and edges of a spanning forest,
+    one tree in every component.
+
+    Args:
+        graph (VisGraph): full graph
+
+    Returns:
+        None
+    '''
+    highlighted_node = []
+    highlighted_edge = []
+    for component in ConnectedComponents(graph).components():
+        for nodeNo, node in enumerate(component.nodes, 1):
+            node.data = {'component': component.number, 'number': nodeNo}
+        highlighted_node.extend(component.nodes)
+        highlighted_edge.extend(component.tree_edges)
+    graph.highlighted_node = highlighted_node
+    graph.highlighted_edge = highlighted_edge
+
+def edgeLength(edge: Edge) -> float:
+    '''euclidean length of the edge, the default edge weight'''
+    return math.hypot(edge.n1().x() - edge.n2().x(), edge.n1().y() - edge.n2().y())
+
+def kruskal(nodes, edges, weight=edgeLength) -> list:
+    '''
+    Kruskal's minimum spanning forest: edges in weight order,
+    kept if they connect two separate trees (union-find).
+
+    Args:
+        nodes: iterable of the nodes
+        edges: iterable of the candidate edges between the nodes
+        weight (callable): edge weight function
+
+    Returns:
+        list: edges of the minimum spanning forest
+    '''
+    element = {graph_traversal.nodeKey(node): i for i, node in enumerate(nodes)}
+    sets = DisjointSet(len(element))
+    result = []
+    nodeKey = graph_traversal.nodeKey
+    for edge in sorted(edges, key=weight):
+        if sets.union(element[nodeKey(edge.n1())], element[nodeKey(edge.n2())]):
+            result.append(edge)
+            if sets.count == 1:
+                break
+    return result
+
+def prim(graph: Graph, weight=edgeLength) -> list:
+    '''
+    Prim's minimum spanning forest with a binary heap,
+    grows a tree from the first unvisited node of every component.
+
+    Args:
+        graph (Graph): full graph
+        weight (callable): edge weight function
+
+    Returns:
+        list: edges of the minimum spanning forest
+    '''
+    nodeKey = graph_traversal.nodeKey
+    visited = set()
+    result = []
+    counter = 0     # tie breaker, nodes and edges are not comparable
+    for root in graph.nextNode():
+        if nodeKey(root) in visited:
+            continue
+        visited.add(nodeKey(root))
+        heap = []
+        for other, edge in graph_traversal.neighbours(root):
+            counter += 1
+            heapq.heappush(heap, (weight(edge), counter, other, edge))
+        while heap:
+            _, _, node, edge = heapq.heappop(heap)
+            key = nodeKey(node)
+            if key in visited:
+                continue
+            visited.add(key)
+            result.append(edge)
+            for other, next_edge in graph_traversal.neighbours(node):
+                if nodeKey(other) not in visited:
+                    counter += 1
+                    heapq.heappush(heap, (weight(next_edge), counter, other, next_edge))
+    return result
+
+def euclideanMST(nodes: list[Node]) -> list[Edge]:
+    '''
+    Euclidean minimum spanning tree of points in O(n log n):
+    the EMST is a subgraph of the Delaunay triangulation,
+    so Kruskal runs only on the Delaunay edges.
+
+    Args:
+        nodes (list[Node]): the points
 
-    for node in graph.nextNode():
-        nodeNo = 1
-        if node not in graph.highlighted_node:
-            componentNo += 1
-            new_component, _ = breadth_first(graph, node)
-            for node in new_component:
-                node.data = {'component': componentNo, 'number': nodeNo}
-                nodeNo += 1
-            graph.highlighted_node.extend(new_component)
+    Returns:
+        list[Edge]: tree edges, new Edge objects between the given nodes
+    '''
+    triangulation = Triangulation()
+    indices = triangulation.insertPoints([(node.x(), node.y()) for node in nodes])
+    vertex_node = {}
+    for node, v in zip(nodes, indices):
+        vertex_node.setdefault(v, node)
+    delaunay_edges = [Edge(vertex_node[a], vertex_node[b]) for a, b in triangulation.edges()]
+    return kruskal(nodes, delaunay_edges)
+
+def minimumSpanningTree(graph: Graph, method: str = 'kruskal') -> list:
+    '''
+    Minimum spanning forest of the graph with edge lengths as weights.
+
+    Args:
+        graph (Graph): full graph
+        method (str): 'kruskal', 'prim' or 'euclidean' (tree over the
+                      complete graph of the nodes, from their triangulation)
+
+    Returns:
+        list: tree edges
+    '''
+    if method == 'kruskal':
+        return kruskal(graph.nextNode(), graph.nextEdge())
+    if method == 'prim':
+        return prim(graph)
+    if method == 'euclidean':
+        return euclideanMST(list(graph.nextNode()))
+    raise ValueError(f"unknown minimum spanning tree method: {method}")
 
-def highlightSpanningTree(graph: VisGraph) -> None:
+def highlightMinimumSpanningTree(graph: "VisGraph", method: str = 'kruskal') -> None:
     '''
-    Finds separate components in graph, starts in node[0]
-    and highlights the nodes and edges that represents a spanning tree.
+    Highlights the nodes and edges of the minimum spanning forest
+    and marks the nodes with their component number.
+    With the 'euclidean' method the tree edges missing from
+    the graph are added to it, the ones already in it are
+    highlighted as the graph's own edge objects.
 
     Args:
         graph (VisGraph): full graph
+        method (str): see minimumSpanningTree
 
     Returns:
         None
     '''
-    componentNo = 1
-    nodeNo = 1
-    graph.highlighted_node, graph.highlighted_edge = breadth_first(graph, graph.nodes[0])
-    for node in graph.highlighted_node:
-        node.data = {'component': componentNo, 'number': nodeNo}
-        nodeNo += 1
-
-    for node in graph.nextNode():
-        nodeNo = 1
-        if node not in graph.highlighted_node:
-            componentNo += 1
-            new_component, graph.highlighted_edge = breadth_first(graph, node)
-            for node in new_component:
-                node.data = {'component': componentNo, 'number': nodeNo}
-                nodeNo += 1
-            graph.highlighted_node.extend(new_component)
\ No newline at end of file
+    tree = minimumSpanningTree(graph, method)
+    if method == 'euclidean':
+        # the tree edges are new objects, highlight the graph's own edge where there is one
+        graph_edges = {graph_traversal.edgeKey(edge): edge for edge in graph.nextEdge()}
+        missing = []
+        for i, edge in enumerate(tree):
+            existing = graph_edges.get(graph_traversal.edgeKey(edge))
+            if existing is not None:
+                tree[i] = existing
+            else:
+                missing.append(edge)
+        if missing and not hasattr(graph, 'addEdge'):
+            raise ValueError(f"{len(missing)} tree edges are not in the graph and it cannot take new edges "
+                             f"(array graph), convert it with toGraph() first")
+        for edge in missing:
+            graph.addEdge(edge)
+            edge.n1().addEdge(edge)
+            edge.n2().addEdge(edge)
+    highlighted_node = []
+    for component in ConnectedComponents(graph).components():
+        for nodeNo, node in enumerate(component.nodes, 1):
+            node.data = {'component': component.number, 'number': nodeNo}
+        highlighted_node.extend(component.nodes)
+    graph.highlighted_node = highlighted_node
+    graph.highlighted_edge = tree
\ No newline at end of file
@@ -1,192 +1,588 @@
 # Qt5 Widget for drawing graphs
 
 from core.graph import Graph
-import math
+from core.csr_graph import CSRGraph
 import time
-from PyQt5.QtCore import QObject, QThread, Qt, pyqtSignal
-from PyQt5.QtGui import QBrush, QColor, QImage, QMouseEvent, QPainter
-from PyQt5.QtGui import QPaintEvent, QPen, QStaticText
+
+import numpy as np
+from PyQt5.QtCore import QLineF, QPointF, QRectF, Qt
+from PyQt5.QtGui import QBrush, QColor, QImage, QMouseEvent, QPainter, QTransform, QWheelEvent
+from PyQt5.QtGui import QPaintEvent, QPen, QPixmap, QPolygonF, QStaticText
 from PyQt5.QtWidgets import QWidget
 #import concurrent.futures
 #import multiprocessing
 
 from graph_visualisation import VisGraph
+from job_runner import Job, JobRunner
+from graph_traversal import nodeKey
+from utilities.distance_field import distanceField
+from utilities.spatial_index import SegmentGrid, SpatialGrid
+from utilities.dynamic_triangulation import DynamicTriangulation
+from utilities.voronoi import voronoiCells
 
 
-class VoronoiBackground(QObject):
-    '''Draws Voronoi cells on given QImage,
-       works in a separate thread.
+def voronoiBackground(job: Job, xs: list, ys: list, area_w: int, area_h: int, pixel_size: int) -> QImage:
     '''
-    finished = pyqtSignal()
+    Job function, draws the Voronoi background image in a worker thread.
+    Computes the distance field of the nodes over the whole image at once,
+    the distance from the closest node becomes the shade of a pixel block.
+    The shades are written straight into the image's pixel buffer.
 
-    def __init__(self, graph: VisGraph, area_w: int, area_h: int, pixel_size: int, worker_image: QImage) -> None:
-        super().__init__()
-        self.graph: Graph = graph
-        self.area_w = area_w
-        self.area_h = area_h
-        self.pixel_size = pixel_size
-        self.bkg_image = worker_image
+    Args:
+        job (Job): the running job, for progress and cancellation
+        xs, ys (list): node coordinates, copied in the GUI thread
+        area_w, area_h (int): image size
+        pixel_size (int): size of the blocks of the same shade
 
-    def voronoiBackground(self, posX: int, posY: int) -> int:
-        '''
-        Calculates which is the closest node to a given pixel.
+    Returns:
+        QImage: the background
+    '''
+    print("Voronoi background method started.")
 
-        Args:
-            posX (int): pixels x coordinate
-            posY (int): pixels y coordinate
+    start_time = time.perf_counter()
+    image = QImage(area_w, area_h, QImage.Format_ARGB32)
+    image.fill(QColor(255,255,255,0))
+    if xs:
+        job.progress(0, "distance field")
+        distance, _ = distanceField(xs, ys, area_w, area_h, pixel_size)
+        job.progress(80, "shading")
+        shade = (255 - np.minimum(np.floor(distance), 255)).astype(np.uint32)
+        argb = 0xFF000000 | (shade << 16) | (shade << 8) | shade
+        # one sample per pixel_size * pixel_size block
+        argb = np.repeat(np.repeat(argb, pixel_size, axis=0), pixel_size, axis=1)
+        buffer = image.bits()
+        buffer.setsize(image.byteCount())
+        pixels = np.frombuffer(buffer, dtype=np.uint32).reshape(area_h, image.bytesPerLine() // 4)
+        pixels[:, :area_w] = argb[:area_h, :area_w]
+    stop_time = time.perf_counter()
+    print(stop_time - start_time)
+    return image
+
+
+class RenderLayer:
+    '''Cached image of one part of the picture and the key of the state it shows.'''
+
+    def __init__(self, width: int, height: int) -> None:
+        self.image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+        self.key = None
+
+    def update(self, key, draw) -> bool:
+        '''redraws the image with draw(image) if the key changed, returns True if redrawn'''
+        if key == self.key:
+            return False
+        self.image.fill(QColor(255,255,255,0))
+        draw(self.image)
+        self.key = key
+        return True
 
-        Returns:
-            int: the pixels distance from closest node
-        '''
-        closest = math.inf
-        for node in self.graph.nextNode():
-            diff = (abs(posX - node.x()), abs(posY - node.y()))
-            diff_length = math.sqrt(diff[0]**2 + diff[1]**2)
-            if diff_length < closest:
-                closest = diff_length
-        return math.floor(closest)
-
-    def run(self) -> None:
-        '''
-        Thread's working method.
-        Iterates through all the pixels in the image, 
-        calls voronoiBackground for node distance which became the shade of that pixel.
-        '''
-        print("Voronoi background method started.")
-        
-        painter = QPainter(self.bkg_image)
-        start_time = time.perf_counter()
-        if self.graph.nodes:
-            for x in range(0, self.area_w, self.pixel_size):
-                for y in range(0, self.area_h, self.pixel_size):
-                    dist = self.voronoiBackground(x, y)
-                    dist = 255 - dist
-                    if dist < 0: dist = 0
-                    painter.setPen(QPen(QColor(dist, dist, dist, 255), self.pixel_size))
-                    painter.drawPoint(x, y)
-        stop_time = time.perf_counter()
-        print(stop_time - start_time)
-        painter.end()
-        self.finished.emit()
-        
 
 class GraphRender(QWidget):
     '''
     Represents an area that can be used for drawing graphs, 
     used within a Qt window/widget.
+    The picture is composed of cached layers (Voronoi cells, background,
+    edges, nodes, labels), each redrawn only when the state it depends on
+    changes: the graph's hash (structure and positions), its highlight
+    revision and the view. The composed frame is cached too, so a repaint
+    without changes is a single image copy.
+    The Voronoi cells come from a DynamicTriangulation of the nodes that
+    follows the dragged nodes, only the cells around them are repainted.
+    The view is zoomed with the mouse wheel and panned by dragging the
+    empty area. Only the nodes and edges in the visible rectangle are
+    drawn, found through spatial indexes, with less detail when zoomed out.
     '''
 
-    def __init__(self) -> None:
+    def __init__(self, jobs: JobRunner = None) -> None:
         super().__init__()
+        self.jobs = jobs if jobs is not None else JobRunner(self)
         self.graph: Graph = None
         self.area_w = 1024
         self.area_h = 768
         self.pixel_size = 16
         self.setMinimumSize(self.area_w, self.area_h)
-        self.graph_image = QImage(self.area_w, self.area_h, QImage.Format_ARGB32)
         self.bkg_image = QImage(self.area_w, self.area_h, QImage.Format_ARGB32)
-        self.previous_hash = 0
+        self.bkg_key = None             # graph hash the background was computed for
+        self.node_index = SpatialGrid(key=nodeKey)
+        self.node_index_hash = None
+        self.voronoi_layer = RenderLayer(self.area_w, self.area_h)
+        self.edge_layer = RenderLayer(self.area_w, self.area_h)
+        self.node_layer = RenderLayer(self.area_w, self.area_h)
+        self.label_layer = RenderLayer(self.area_w, self.area_h)
+        self.frame_image = QImage(self.area_w, self.area_h, QImage.Format_ARGB32_Premultiplied)
+        self.frame_key = None
+        self.show_voronoi_cells = False
+        self.voronoi_by_component = False
+        self.site_mesh = None           # DynamicTriangulation of the nodes, follows the dragged nodes
+        self.site_mesh_hash = None      # graph hash the site mesh is up to date with
+        self.site_node = {}             # mesh vertex -> node
+        self.site_vertex = {}           # node key -> mesh vertex
+        self.voronoi_patch = None       # (layer key, key after the drags, sites whose cells changed)
+        self.label_limit = 2000         # no labels above this visible node count
+        self.antialias_limit = 20000    # no antialiasing above this visible edge count
+        self.label_cache = {}           # node key -> (text, QStaticText)
+        self.node_sprites = {}          # color -> QPixmap of a node
+        self.edge_index = SegmentGrid(key=nodeKey)
+        self.edge_index_hash = None
+        self.node_arrays = None
+        self.node_arrays_hash = None
+        self.node_array_index = None    # node key -> array position, None for CSR graphs (the node index)
+        # view: graph area point at the top left corner and scale
+        self.zoom = 1.0
+        self.view_x = 0.0
+        self.view_y = 0.0
+        self.min_zoom = 0.02
+        self.max_zoom = 50.0
+        self.pan_start = None
+        # level of detail
+        self.label_zoom = 0.75          # no labels below this zoom
+        self.point_zoom = 0.4           # nodes are drawn as points below this zoom
+        self.density_limit = 50000      # density tiles above this visible node count
+        self.tile_size = 8              # density tile size in pixels
+        self.visible_key = None
+        self.visible_nodes = []
+        self.visible_edges = []
+        self.dense = False
 
     def setGraph(self, graph: VisGraph):
         '''sets a new graph reference and initiates a rendering of it'''
         self.graph = graph
-        self.drawEdges()
-        self.drawNodes()
         self.repaint()
-        self.previous_hash = hash(self.graph)
+
+    def graphKey(self) -> int:
+        '''changes with the graph's structure and node positions, O(1)'''
+        return hash(self.graph)
+
+    def highlightKey(self) -> tuple:
+        '''changes with the graph and with its highlights (and the node data shown with them)'''
+        return hash(self.graph), getattr(self.graph, 'highlight_revision', 0)
 
     def drawBackground(self):
-        '''calculates the background voronoi image in a separate thread'''
-        self.worker_image = QImage(self.area_w, self.area_h, QImage.Format_ARGB32)
-        self.work_thread = QThread()
-        self.worker = VoronoiBackground(self.graph,
-                                        self.area_w,
-                                        self.area_h,
-                                        self.pixel_size,
-                                        self.worker_image)
-        self.worker.moveToThread(self.work_thread)
-        self.work_thread.started.connect(self.worker.run)
-        self.worker.finished.connect(self.work_thread.quit)
-        self.worker.finished.connect(self.work_thread.deleteLater)
-        self.worker.finished.connect(self.worker.deleteLater)
-        def finish():
-            self.bkg_image = self.worker_image
+        '''calculates the background voronoi image in a background job, replacing a running one'''
+        nodes = list(self.graph.nextNode())
+        xs = [node.x() for node in nodes]
+        ys = [node.y() for node in nodes]
+        worker_key = self.graphKey()
+        def finish(image: QImage):
+            self.bkg_image = image
+            self.bkg_key = worker_key
             self.repaint()
-        self.work_thread.finished.connect(finish)
-        self.work_thread.start()
+        self.jobs.start('background', voronoiBackground,
+                        xs, ys, self.area_w, self.area_h, self.pixel_size,
+                        on_result=finish)
+
+    def setVoronoiCells(self, show: bool):
+        '''turns the Voronoi cell layer on/off'''
+        self.show_voronoi_cells = show
+        self.repaint()
+
+    def setVoronoiColoring(self, by_component: bool):
+        '''fills the Voronoi cells by component label or with a color per cell'''
+        self.voronoi_by_component = by_component
+        self.repaint()
+
+    def siteMesh(self) -> DynamicTriangulation:
+        '''Delaunay triangulation of the nodes, rebuilt if the graph changed other than by dragging'''
+        if self.site_mesh_hash != hash(self.graph):
+            nodes = list(self.graph.nextNode())
+            self.site_mesh = DynamicTriangulation(seed=1)
+            indices = self.site_mesh.insertPoints([(node.x(), node.y()) for node in nodes])
+            self.site_node = dict(zip(indices, nodes))
+            self.site_vertex = {nodeKey(node): vertex for vertex, node in self.site_node.items()}
+            self.site_mesh_hash = hash(self.graph)
+        return self.site_mesh
+
+    def moveSite(self, node, graph_key: int) -> set:
+        '''
+        Moves the vertex of a dragged node in the site mesh, if the mesh
+        was up to date before the move (graph_key: graph hash before it).
+        A node dropped onto another one loses its vertex (the cell is the
+        other node's), it gets a new one when it is moved away.
+
+        Returns:
+            set: vertices whose Voronoi cell changed, None if the mesh has to be rebuilt
+        '''
+        if self.site_mesh_hash != graph_key:
+            return None
+        key = nodeKey(node)
+        vertex = self.site_vertex.get(key)
+        if vertex is None:
+            vertex, diff = self.site_mesh.insertVertex(node.x(), node.y())
+            if vertex not in self.site_node:
+                self.site_node[vertex] = node
+                self.site_vertex[key] = vertex
+        else:
+            try:
+                diff = self.site_mesh.moveVertex(vertex, node.x(), node.y())
+            except ValueError:
+                diff = self.site_mesh.removeVertex(vertex)
+                del self.site_vertex[key]
+                del self.site_node[vertex]
+        self.site_mesh_hash = hash(self.graph)
+        return diff.sites()
+
+    def voronoiKey(self) -> tuple:
+        graph_key = self.highlightKey() if self.voronoi_by_component else self.graphKey()
+        return graph_key, self.voronoi_by_component
+
+    def updateVoronoiLayer(self) -> None:
+        '''
+        Brings the Voronoi cell layer up to date. After node drags only the
+        changed cells are painted over the old image: together they cover
+        the same region as before the drags, the other cells did not change.
+        '''
+        key = self.voronoiKey()
+        patch = self.voronoi_patch
+        self.voronoi_patch = None
+        if patch is not None and patch[0] == self.voronoi_layer.key and patch[1] == key \
+                and self.site_mesh_hash == hash(self.graph):
+            self.drawVoronoiCells(self.voronoi_layer.image, patch[2])
+            self.voronoi_layer.key = key
+        else:
+            self.voronoi_layer.update(key, self.drawVoronoiCells)
+
+    def drawVoronoiCells(self, target: QImage, sites: set = None):
+        '''
+        Fills the Voronoi cell of every node (or of the sites, mesh
+        vertices) as a polygon, cells come from the dual of the Delaunay
+        triangulation of the nodes.
+        '''
+        if not len(self.graph.nodes):
+            return
+        mesh = self.siteMesh()
+        painter = QPainter(target)
+        painter.setPen(QPen(Qt.lightGray, 1))
+        for vertex, cell in voronoiCells(mesh, self.area_w, self.area_h, sites).items():
+            node = self.site_node[vertex]
+            if self.voronoi_by_component:
+                if node.data is not None and 'component' in node.data:
+                    cell_color = QColor(self.colorPicker(node)).lighter(180)
+                else:
+                    cell_color = QColor(Qt.white)
+            else:
+                cell_color = QColor.fromHsv(vertex * 137 % 360, 40, 250)
+            painter.setBrush(QBrush(cell_color, Qt.SolidPattern))
+            painter.drawPolygon(QPolygonF([QPointF(x, y) for x, y in cell]))
+        painter.end()
+
+    def viewKey(self) -> tuple:
+        return self.zoom, self.view_x, self.view_y
 
-    def drawEdges(self, target = None):
-        '''draws the graph edges'''
+    def visibleRect(self, margin: float = 0) -> tuple:
+        '''the visible part of the graph area (x0, y0, x1, y1), extended with margin pixels'''
+        margin /= self.zoom
+        return (self.view_x - margin,
+                self.view_y - margin,
+                self.view_x + self.area_w / self.zoom + margin,
+                self.view_y + self.area_h / self.zoom + margin)
+
+    def toScreen(self, x, y) -> QPointF:
+        return QPointF((x - self.view_x) * self.zoom, (y - self.view_y) * self.zoom)
+
+    def toGraph(self, point: QPointF) -> tuple:
+        return self.view_x + point.x() / self.zoom, self.view_y + point.y() / self.zoom
+
+    def nodeArrays(self) -> tuple:
+        '''node coordinate arrays, rebuilt if the graph changed'''
+        if self.node_arrays_hash != hash(self.graph):
+            count = len(self.graph.nodes)
+            if isinstance(self.graph, CSRGraph):
+                self.node_arrays = (self.graph.xs.astype(np.float64), self.graph.ys.astype(np.float64))
+                self.node_array_index = None
+            else:
+                self.node_arrays = (np.fromiter((node.x() for node in self.graph.nextNode()), np.float64, count),
+                                    np.fromiter((node.y() for node in self.graph.nextNode()), np.float64, count))
+                self.node_array_index = {nodeKey(node): i for i, node in enumerate(self.graph.nextNode())}
+            self.node_arrays_hash = hash(self.graph)
+        return self.node_arrays
+
+    def moveNodeArrays(self, node, graph_key) -> None:
+        '''updates the moved node in the coordinate arrays if they were up to date with graph_key'''
+        if self.node_arrays_hash != graph_key:
+            return
+        xs, ys = self.node_arrays
+        if self.node_array_index is None:
+            i = node.index
+        else:
+            i = self.node_array_index[nodeKey(node)]
+        xs[i] = node.x()
+        ys[i] = node.y()
+        self.node_arrays_hash = hash(self.graph)
+
+    def updateVisible(self) -> None:
+        '''
+        Collects the nodes and edges in the visible rectangle from the spatial
+        indexes. If there are more than density_limit visible nodes they are
+        not collected, the nodes are shown as density tiles instead.
+        '''
+        key = (self.graphKey(), self.viewKey(), self.density_limit)
+        if key == self.visible_key:
+            return
+        self.visible_key = key
+        x0, y0, x1, y1 = self.visibleRect(margin=10)
+        visible_count = self.nodeIndex().countInRect(x0, y0, x1, y1, limit=self.density_limit)
+        self.dense = visible_count > self.density_limit
+        if self.dense:
+            self.visible_nodes = []
+            self.visible_edges = []
+        else:
+            self.visible_nodes = self.nodeIndex().inRect(x0, y0, x1, y1)
+            self.visible_edges = self.edgeIndex().inRect(*self.visibleRect())
+
+    def drawEdges(self, target: QImage = None):
+        '''draws the visible graph edges, one drawLines call per color'''
         if target:
             painter = QPainter(target)
         else:
-            painter = QPainter(self.graph_image)
-        painter.setRenderHint(QPainter.Antialiasing)
+            painter = QPainter(self.edge_layer.image)
+        if len(self.visible_edges) <= self.antialias_limit:
+            painter.setRenderHint(QPainter.Antialiasing)
         node_width = 2
-        for edge in self.graph.nextEdge():
+        zoom, view_x, view_y = self.viewKey()
+        lines = {}      # color -> list of QLineF
+        for edge in self.visible_edges:
             #if edge.n1().data is not None and edge.n2().data is not None:
-            if edge in self.graph.highlighted_edge:
-                edge_color = self.colorPicker(edge.n1())
-                painter.setPen(QPen(edge_color, node_width))
+            n1 = edge.n1()
+            n2 = edge.n2()
+            if n1.data is not None and self.graph.isHighlightedEdge(edge):
+                edge_color = self.colorPicker(n1)
             else:
-                painter.setPen(QPen(Qt.darkGray, node_width))
-            painter.drawLine(edge.n1().x(),
-                             edge.n1().y(),
-                             edge.n2().x(),
-                             edge.n2().y())
+                edge_color = Qt.darkGray
+            lines.setdefault(edge_color, []).append(QLineF((n1.x() - view_x) * zoom,
+                                                           (n1.y() - view_y) * zoom,
+                                                           (n2.x() - view_x) * zoom,
+                                                           (n2.y() - view_y) * zoom))
+        for edge_color, color_lines in lines.items():
+            painter.setPen(QPen(edge_color, node_width))
+            painter.drawLines(color_lines)
         painter.end()
 
-    def drawNodes(self, target = None):
-        '''draws the graph nodes and prints its coords'''
+    def nodeSprite(self, node_color) -> QPixmap:
+        '''antialiased image of one node in the given color, cached'''
+        sprite = self.node_sprites.get(node_color)
+        if sprite is None:
+            node_width = 10
+            image = QImage(node_width, node_width, QImage.Format_ARGB32_Premultiplied)
+            image.fill(QColor(255,255,255,0))
+            painter = QPainter(image)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QBrush(node_color, Qt.SolidPattern))
+            painter.drawEllipse(QRectF(0, 0, node_width, node_width))
+            painter.end()
+            sprite = self.node_sprites[node_color] = QPixmap.fromImage(image)
+        return sprite
+
+    def drawNodes(self, target: QImage = None):
+        '''
+        Draws the visible graph nodes per color: node sprites in one
+        drawPixmapFragments call, or points in one drawPoints call
+        when zoomed out below point_zoom. Density tiles if too dense.
+        '''
         if target:
             painter = QPainter(target)
         else:
-            painter = QPainter(self.graph_image)
-        node_width = 10
-        painter.setPen(Qt.NoPen)
-        for node in self.graph.nextNode():
-            if node in self.graph.highlighted_node:
-                if node.data is not None:
-                    node_color = self.colorPicker(node)
-                    painter.setBrush(QBrush(node_color, Qt.SolidPattern))
+            painter = QPainter(self.node_layer.image)
+        if self.dense:
+            self.drawDensity(painter)
+            painter.end()
+            return
+        as_points = self.zoom < self.point_zoom
+        source = QRectF(0, 0, 10, 10)
+        items = {}      # color -> list of points or fragments centered on the nodes
+        for node in self.visible_nodes:
+            if node.data is not None and self.graph.isHighlightedNode(node):
+                node_color = self.colorPicker(node)
             else:
-                painter.setBrush(QBrush(Qt.black, Qt.SolidPattern))
-            painter.drawEllipse(node.x() - node_width//2,
-                                node.y() - node_width//2,
-                                node_width,
-                                node_width)
+                node_color = Qt.black
+            position = self.toScreen(node.x(), node.y())
+            if not as_points:
+                position = QPainter.PixmapFragment.create(position, source)
+            items.setdefault(node_color, []).append(position)
+        for node_color, color_items in items.items():
+            if as_points:
+                painter.setPen(QPen(node_color, 3))
+                painter.drawPoints(QPolygonF(color_items))
+            else:
+                painter.drawPixmapFragments(color_items, self.nodeSprite(node_color))
+        painter.end()
+
+    def drawDensity(self, painter: QPainter):
+        '''shades tile_size * tile_size pixel tiles by the (log) number of nodes in them'''
+        tile = self.tile_size
+        columns = -(-self.area_w // tile)
+        rows = -(-self.area_h // tile)
+        xs, ys = self.nodeArrays()
+        screen_x = (xs - self.view_x) * self.zoom
+        screen_y = (ys - self.view_y) * self.zoom
+        inside = (screen_x >= 0) & (screen_x < columns * tile) & (screen_y >= 0) & (screen_y < rows * tile)
+        cells = (screen_y[inside] // tile).astype(np.int64) * columns + (screen_x[inside] // tile).astype(np.int64)
+        counts = np.bincount(cells, minlength=rows * columns).reshape(rows, columns)
+        alpha = (np.log1p(counts) * (255 / np.log1p(max(counts.max(), 1)))).astype(np.uint32)
+        tiles = QImage(columns, rows, QImage.Format_ARGB32_Premultiplied)
+        buffer = tiles.bits()
+        buffer.setsize(tiles.byteCount())
+        pixels = np.frombuffer(buffer, dtype=np.uint32).reshape(rows, tiles.bytesPerLine() // 4)
+        pixels[:, :columns] = alpha << 24      # premultiplied black
+        painter.drawImage(QRectF(0, 0, columns * tile, rows * tile), tiles)
+
+    def drawLabels(self, target: QImage = None):
+        '''
+        Prints the visible node numbers and coords, skipped below label_zoom
+        and above label_limit visible nodes.
+        The QStaticText objects are cached per node and reused while the text is the same.
+        '''
+        if self.dense or self.zoom < self.label_zoom or len(self.visible_nodes) > self.label_limit:
+            return
+        if target:
+            painter = QPainter(target)
+        else:
+            painter = QPainter(self.label_layer.image)
+        painter.setPen(QPen(Qt.black, 1))
+        label_cache = {}
+        for node in self.visible_nodes:
             nodeNo = ""
             if node.data is not None and 'number' in node.data.keys():
                 nodeNo = str(node.data['number']) + " "
-            node_text = QStaticText(nodeNo + str(node))
-            painter.setPen(QPen(Qt.black, 1))
-            painter.drawStaticText(node.x() - 5, node.y() + 5, node_text)
+            text = nodeNo + str(node)
+            key = nodeKey(node)
+            cached = self.label_cache.get(key)
+            if cached is None or cached[0] != text:
+                cached = (text, QStaticText(text))
+            label_cache[key] = cached
+            painter.drawStaticText(self.toScreen(node.x(), node.y()) + QPointF(-5, 5), cached[1])
+        self.label_cache = label_cache
         painter.end()
 
-    def paintEvent(self, a0: QPaintEvent) -> None:
-        if self.previous_hash != hash(self.graph):      # if the graph changed: clear
-            self.graph_image.fill(QColor(255,255,255,0))
-            self.bkg_image.fill(QColor(255,255,255,0))
-            self.previous_hash = hash(self.graph)
-        self.drawEdges()                                # and repaint
-        self.drawNodes()
-        painter = QPainter(self.bkg_image)              # combine the occasional background
-        painter.drawImage(0, 0, self.graph_image)       # and the actual graph
+    def updateFrame(self) -> None:
+        '''brings the changed layers up to date and composes them if anything changed'''
+        graph_key = self.graphKey()
+        highlight_key = self.highlightKey()
+        view_key = self.viewKey()
+        if self.show_voronoi_cells:
+            self.updateVoronoiLayer()
+        self.updateVisible()
+        self.edge_layer.update((highlight_key, view_key, self.antialias_limit), self.drawEdges)
+        self.node_layer.update((highlight_key, view_key, self.point_zoom), self.drawNodes)
+        self.label_layer.update((highlight_key, view_key, self.label_zoom, self.label_limit),
+                                self.drawLabels)
+        show_background = self.bkg_key == graph_key
+        # the background and the cells are graph area sized, shown through the view transform
+        area_images = []
+        frame_key = [view_key, self.edge_layer.key, self.node_layer.key, self.label_layer.key]
+        if show_background:
+            area_images.insert(0, self.bkg_image)
+            frame_key.insert(0, id(self.bkg_image))
+        if self.show_voronoi_cells:
+            area_images.insert(0, self.voronoi_layer.image)
+            frame_key.insert(0, self.voronoi_layer.key)
+        frame_key = tuple(frame_key)
+        if frame_key == self.frame_key:
+            return
+        self.frame_key = frame_key
+        self.frame_image.fill(QColor(255,255,255,0))
+        painter = QPainter(self.frame_image)
+        painter.setTransform(QTransform(self.zoom, 0, 0, self.zoom,
+                                        -self.view_x * self.zoom, -self.view_y * self.zoom))
+        for image in area_images:
+            painter.drawImage(0, 0, image)
+        painter.resetTransform()
+        for layer in (self.edge_layer, self.node_layer, self.label_layer):
+            painter.drawImage(0, 0, layer.image)
         painter.end()
+
+    def paintEvent(self, a0: QPaintEvent) -> None:
+        if self.graph is None:
+            return
+        self.updateFrame()
         painter = QPainter(self)
-        painter.drawImage(0, 0, self.bkg_image)
+        painter.drawImage(a0.rect(), self.frame_image, a0.rect())
         painter.end()
 
+    def nodeIndex(self) -> SpatialGrid:
+        '''spatial index of the graph nodes, rebuilt if the graph changed'''
+        if self.node_index_hash != hash(self.graph):
+            self.node_index = SpatialGrid(key=nodeKey)
+            self.node_index.build(self.graph.nextNode())
+            self.node_index_hash = hash(self.graph)
+        return self.node_index
+
+    def edgeIndex(self) -> SegmentGrid:
+        '''spatial index of the graph edges, rebuilt if the graph changed'''
+        if self.edge_index_hash != hash(self.graph):
+            self.edge_index = SegmentGrid(self.nodeIndex().cell_size or 16.0, key=nodeKey)
+            self.edge_index.build(self.graph.nextEdge())
+            self.edge_index_hash = hash(self.graph)
+        return self.edge_index
+
+    def setZoom(self, zoom: float, anchor: QPointF = None):
+        '''sets the zoom, the graph point under the anchor (widget center by default) stays in place'''
+        if anchor is None:
+            anchor = QPointF(self.area_w / 2, self.area_h / 2)
+        zoom = min(max(zoom, self.min_zoom), self.max_zoom)
+        x, y = self.toGraph(anchor)
+        self.zoom = zoom
+        self.view_x = x - anchor.x() / zoom
+        self.view_y = y - anchor.y() / zoom
+        self.repaint()
+
+    def resetView(self):
+        self.zoom = 1.0
+        self.view_x = 0.0
+        self.view_y = 0.0
+        self.repaint()
+
+    def wheelEvent(self, a0: QWheelEvent) -> None:
+        self.setZoom(self.zoom * 1.25 ** (a0.angleDelta().y() / 120), a0.position())
+
+    def nodeAt(self, point: QPointF):
+        '''the node drawn under the widget point, None if there is none'''
+        x, y = self.toGraph(point)
+        reach = 6 / self.zoom
+        for node in self.nodeIndex().inRect(x - reach, y - reach, x + reach, y + reach):
+            return node
+        return None
+
     def mousePressEvent(self, a0: QMouseEvent) -> None:
+        if self.graph is not None and self.nodeAt(a0.localPos()) is None:
+            # dragging the empty area pans the view
+            self.pan_start = (a0.localPos(), self.view_x, self.view_y)
         return super().mousePressEvent(a0)
 
+    def mouseReleaseEvent(self, a0: QMouseEvent) -> None:
+        self.pan_start = None
+        return super().mouseReleaseEvent(a0)
+
     def mouseMoveEvent(self, a0: QMouseEvent) -> None:
-        for node in self.graph.nextNode():
-            if abs(node.x() - a0.localPos().x()) < 6 and abs(node.y() - a0.localPos().y()) < 6:
-                node.posX = int(a0.localPos().x())
-                node.posY = int(a0.localPos().y())
+        if self.pan_start is not None:
+            start, view_x, view_y = self.pan_start
+            self.view_x = view_x - (a0.localPos().x() - start.x()) / self.zoom
+            self.view_y = view_y - (a0.localPos().y() - start.y()) / self.zoom
+            self.repaint()
+            return super().mouseMoveEvent(a0)
+        x, y = self.toGraph(a0.localPos())
+        reach = 6 / self.zoom
+        index = self.nodeIndex()
+        edge_index = self.edgeIndex()
+        for node in index.inRect(x - reach, y - reach, x + reach, y + reach):
+            if abs(node.x() - x) < reach and abs(node.y() - y) < reach:
+                graph_key = self.graphKey()
+                voronoi_key = self.voronoiKey()
+                node.move(int(x), int(y))
+                index.move(node, node.x(), node.y())
+                for edge in node.nextEdge():
+                    edge_index.update(edge)
+                self.graph.touch()
                 self.graph.highlightNodeSwitch(node)
-                self.graph_image.fill(QColor(255,255,255,0))
+                sites = self.moveSite(node, graph_key)
+                if sites is None:
+                    self.voronoi_patch = None
+                elif self.voronoi_patch is not None and self.voronoi_patch[1] == voronoi_key:
+                    self.voronoi_patch = (self.voronoi_patch[0], self.voronoiKey(), self.voronoi_patch[2] | sites)
+                else:
+                    self.voronoi_patch = (voronoi_key, self.voronoiKey(), sites)
+                self.moveNodeArrays(node, graph_key)
+                self.node_index_hash = hash(self.graph)
+                self.edge_index_hash = hash(self.graph)
                 self.repaint()
         return super().mouseMoveEvent(a0)
 
@@ -0,0 +1,229 @@
+# shortest paths on graphs with edge lengths as weights
+
+import heapq
+import math
+
+import numpy as np
+
+from core.graph import Graph, Node
+from graph_visualisation import VisGraph
+from graph_methods import edgeLength
+from graph_traversal import neighbours, nodeKey
+
+
+class PathResult:
+    '''Result of a path query: nodes and edges from source to target, length and search effort.'''
+
+    def __init__(self, nodes: list, edges: list, distance: float, settled: int) -> None:
+        self.nodes = nodes
+        self.edges = edges
+        self.distance = distance    # math.inf if the target is unreachable
+        self.settled = settled      # number of nodes taken off the heap(s)
+
+    def __str__(self) -> str:
+        return f"<path: {len(self.edges)} edges, length {self.distance:.2f}, {self.settled} settled>"
+
+    def found(self) -> bool:
+        return self.distance != math.inf
+
+
+def _tracePath(parent: dict, target, target_key) -> tuple[list, list]:
+    '''walks the parent links (key -> (node, edge)) back from the target'''
+    nodes = [target]
+    edges = []
+    key = target_key
+    while parent[key] is not None:
+        node, edge = parent[key]
+        nodes.append(node)
+        edges.append(edge)
+        key = nodeKey(node)
+    nodes.reverse()
+    edges.reverse()
+    return nodes, edges
+
+
+def dijkstra(graph: Graph, source: Node, target: Node = None, weight=edgeLength,
+             heuristic=None) -> PathResult:
+    '''
+    Dijkstra's shortest path with a binary heap, stops when the target is settled.
+
+    Args:
+        graph (Graph): full graph
+        source (Node): start node
+        target (Node): end node
+        weight (callable): non-negative edge weight
+        heuristic (callable): optional lower bound of the remaining
+                              distance from a node (turns it into A*)
+
+    Returns:
+        PathResult: the path, empty with infinite distance if unreachable
+    '''
+    target_key = nodeKey(target) if target is not None else None
+    source_key = nodeKey(source)
+    distance = {source_key: 0.0}
+    parent = {source_key: None}
+    settled = set()
+    counter = 0     # tie breaker, nodes are not comparable
+    heap = [(heuristic(source) if heuristic else 0.0, counter, source)]
+    while heap:
+        _, _, node = heapq.heappop(heap)
+        key = nodeKey(node)
+        if key in settled:
+            continue
+        settled.add(key)
+        if key == target_key:
+            nodes, edges = _tracePath(parent, node, key)
+            return PathResult(nodes, edges, distance[key], len(settled))
+        node_distance = distance[key]
+        for other, edge in neighbours(node):
+            other_key = nodeKey(other)
+            if other_key in settled:
+                continue
+            new_distance = node_distance + weight(edge)
+            if new_distance < distance.get(other_key, math.inf):
+                distance[other_key] = new_distance
+                parent[other_key] = (node, edge)
+                counter += 1
+                estimate = new_distance + heuristic(other) if heuristic else new_distance
+                heapq.heappush(heap, (estimate, counter, other))
+    return PathResult([], [], math.inf, len(settled))
+
+
+def astar(graph: Graph, source: Node, target: Node, weight=edgeLength) -> PathResult:
+    '''
+    A* search, the straight line distance to the target is the heuristic.
+    It is admissible (and consistent) for edge length weights,
+    so the result is a shortest path, found by settling fewer nodes.
+    '''
+    target_x = target.x()
+    target_y = target.y()
+
+    def heuristic(node) -> float:
+        return math.hypot(node.x() - target_x, node.y() - target_y)
+
+    return dijkstra(graph, source, target, weight, heuristic)
+
+
+def bidirectionalDijkstra(graph: Graph, source: Node, target: Node,
+                          weight=edgeLength) -> PathResult:
+    '''
+    Dijkstra searches from both ends (edges are undirected), always
+    expanding the side with the smaller heap top. Stops when the two
+    heap tops together reach the best connection found so far.
+    '''
+    keys = (nodeKey(source), nodeKey(target))
+    distance = ({keys[0]: 0.0}, {keys[1]: 0.0})
+    parent = ({keys[0]: None}, {keys[1]: None})
+    settled = (set(), set())
+    heap = ([(0.0, 0, source)], [(0.0, 1, target)])
+    counter = 2
+    best = math.inf if keys[0] != keys[1] else 0.0
+    meeting = source if keys[0] == keys[1] else None
+    while heap[0] and heap[1] and heap[0][0][0] + heap[1][0][0] < best:
+        side = 0 if heap[0][0][0] <= heap[1][0][0] else 1
+        node_distance, _, node = heapq.heappop(heap[side])
+        key = nodeKey(node)
+        if key in settled[side]:
+            continue
+        settled[side].add(key)
+        for other, edge in neighbours(node):
+            other_key = nodeKey(other)
+            new_distance = node_distance + weight(edge)
+            if new_distance < distance[side].get(other_key, math.inf):
+                distance[side][other_key] = new_distance
+                parent[side][other_key] = (node, edge)
+                counter += 1
+                heapq.heappush(heap[side], (new_distance, counter, other))
+            if other_key in distance[1 - side]:
+                total = distance[side][other_key] + distance[1 - side][other_key]
+                if total < best:
+                    best = total
+                    meeting = other
+    settled_count = len(settled[0]) + len(settled[1])
+    if meeting is None:
+        return PathResult([], [], math.inf, settled_count)
+    meeting_key = nodeKey(meeting)
+    nodes, edges = _tracePath(parent[0], meeting, meeting_key)
+    back_nodes, back_edges = _tracePath(parent[1], meeting, meeting_key)
+    nodes.extend(reversed(back_nodes[:-1]))
+    edges.extend(reversed(back_edges))
+    return PathResult(nodes, edges, best, settled_count)
+
+
+def singleSourceDistances(graph: Graph, source: Node, weight=edgeLength) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Distances from the source to every node, indexed by node position in graph.nodes.
+
+    Returns:
+        tuple: float64 distance array (inf where unreachable) and int64 array
+               of the previous node's position on the shortest path (-1 for
+               the source and unreachable nodes)
+    '''
+    position = {nodeKey(node): i for i, node in enumerate(graph.nextNode())}
+    count = len(position)
+    dist = np.full(count, np.inf)
+    previous = np.full(count, -1, dtype=np.int64)
+    dist_list = dist.tolist()
+    done = [False] * count
+    start = position[nodeKey(source)]
+    dist_list[start] = 0.0
+    counter = 0
+    heap = [(0.0, counter, source)]
+    while heap:
+        node_distance, _, node = heapq.heappop(heap)
+        i = position[nodeKey(node)]
+        if done[i]:
+            continue
+        done[i] = True
+        for other, edge in neighbours(node):
+            j = position[nodeKey(other)]
+            new_distance = node_distance + weight(edge)
+            if new_distance < dist_list[j]:
+                dist_list[j] = new_distance
+                previous[j] = i
+                counter += 1
+                heapq.heappush(heap, (new_distance, counter, other))
+    dist[:] = dist_list
+    return dist, previous
+
+
+def highlightPath(graph: VisGraph, path: PathResult) -> None:
+    '''highlights the nodes and edges of the path, nodes are numbered along it'''
+    for nodeNo, node in enumerate(path.nodes, 1):
+        node.data = {'component': 1, 'number': nodeNo}
+    graph.highlighted_node = path.nodes
+    graph.highlighted_edge = path.edges
+
+
+if __name__ == "__main__":
+    # benchmark: settled nodes and query time of the variants on a Delaunay mesh
+    import random
+    import time
+    from core.graph import Edge
+    from utilities.triangulation import Triangulation
+
+    rnd = random.Random(1)
+    for size in (1000, 10000, 50000):
+        graph = Graph(unique_edges=True)
+        for _ in range(size):
+            graph.addNode(Node(rnd.uniform(0, 1000), rnd.uniform(0, 1000)))
+        triangulation = Triangulation(1)
+        indices = triangulation.insertPoints([(node.x(), node.y()) for node in graph.nodes])
+        vertex_node = dict(zip(indices, graph.nodes))
+        for a, b in triangulation.edges():
+            edge = Edge(vertex_node[a], vertex_node[b])
+            graph.addEdge(edge)
+            vertex_node[a].addEdge(edge)
+            vertex_node[b].addEdge(edge)
+        queries = [(rnd.choice(graph.nodes), rnd.choice(graph.nodes)) for _ in range(20)]
+        print(f"{size} nodes, {len(graph.edges)} edges, {len(queries)} queries")
+        for name, method in (("dijkstra", dijkstra),
+                             ("a*", astar),
+                             ("bidirectional", bidirectionalDijkstra)):
+            settled = 0
+            start_time = time.perf_counter()
+            for source, target in queries:
+                settled += method(graph, source, target).settled
+            stop_time = time.perf_counter()
+            print(f"  {name:14} settled/query: {settled / len(queries):9.1f}"
+                  f"  ms/query: {(stop_time - start_time) * 1000 / len(queries):8.2f}")
@@ -0,0 +1,115 @@
+# graph traversals, linear time and streaming
+
+from collections import deque
+
+
+def nodeKey(node) -> int:
+    '''identity of a node in visited sets: array index of CSR nodes, object id otherwise'''
+    index = getattr(node, 'index', None)
+    return id(node) if index is None else index
+
+
+def edgeKey(edge) -> tuple:
+    '''direction independent identity of an edge: the key pair of its endpoints'''
+    key1 = nodeKey(edge.n1())
+    key2 = nodeKey(edge.n2())
+    return (key1, key2) if key1 < key2 else (key2, key1)
+
+
+def neighbours(node):
+    '''generator method, yields (neighbour node, connecting edge) pairs'''
+    key = nodeKey(node)
+    for edge in node.nextEdge():
+        other = edge.n1()
+        if nodeKey(other) == key:
+            other = edge.n2()
+        yield other, edge
+
+
+def bfs(start_node, until=None, visited: set = None):
+    '''
+    Breadth first traversal from start_node in O(n+m).
+
+    Args:
+        start_node (Node): starting node
+        until (callable): optional predicate, the traversal stops
+                          after yielding the first node it accepts
+        visited (set): node keys to skip, updated during the traversal,
+                       pass the same set to continue with another component
+
+    Yields:
+        tuple: node in visiting order and the tree edge it was reached by
+               (None for the start node)
+    '''
+    if visited is None:
+        visited = set()
+    visited.add(nodeKey(start_node))
+    queue = deque([start_node])
+    yield start_node, None
+    if until is not None and until(start_node):
+        return
+    while queue:
+        node = queue.popleft()
+        for new_node, edge in neighbours(node):
+            key = nodeKey(new_node)
+            if key in visited:
+                continue
+            visited.add(key)
+            yield new_node, edge
+            if until is not None and until(new_node):
+                return
+            queue.append(new_node)
+
+
+def dfs(start_node, until=None, visited: set = None):
+    '''
+    Iterative depth first traversal from start_node in O(n+m),
+    nodes are yielded in preorder, neighbours in edge order.
+
+    Args:
+        start_node (Node): starting node
+        until (callable): optional predicate, the traversal stops
+                          after yielding the first node it accepts
+        visited (set): node keys to skip, updated during the traversal
+
+    Yields:
+        tuple: node in visiting order and the tree edge it was reached by
+               (None for the start node)
+    '''
+    if visited is None:
+        visited = set()
+    visited.add(nodeKey(start_node))
+    yield start_node, None
+    if until is not None and until(start_node):
+        return
+    stack = [neighbours(start_node)]
+    while stack:
+        for new_node, edge in stack[-1]:
+            key = nodeKey(new_node)
+            if key in visited:
+                continue
+            visited.add(key)
+            yield new_node, edge
+            if until is not None and until(new_node):
+                return
+            stack.append(neighbours(new_node))
+            break
+        else:
+            stack.pop()
+
+
+def components(graph, traversal=bfs):
+    '''
+    Traverses every component of the graph, in node order of the graph.
+
+    Yields:
+        tuple: component number (from 1), node and its tree edge
+    '''
+    visited = set()
+    componentNo = 0
+    for node in graph.nextNode():
+        if nodeKey(node) in visited:
+            continue
+        componentNo += 1
+        for new_node, edge in traversal(node, visited=visited):
+            yield componentNo, new_node, edge
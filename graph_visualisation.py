@@ -1,36 +1,123 @@
 # inherited from Graph class, extends the base class with
 
+import numpy as np
+
 from core.graph import Graph
+from core.csr_graph import CSRGraph
+from graph_traversal import edgeKey, nodeKey
 
 
 class VisGraph(Graph):
-    '''Simple graph class extended with option to mark edges and nodes as highlighted.'''
+    '''
+    Simple graph class extended with option to mark edges and nodes as highlighted.
+    Highlights are kept by identity, nodes by graph_traversal.nodeKey and edges by
+    the keys of their endpoints (graph_traversal.edgeKey), so a lookup is O(1),
+    moving a highlighted node does not lose it and an Edge object between the
+    same two nodes matches a highlighted edge. Highlight changes are counted
+    in highlight_revision, separately from the graph revision.
+    highlighted_node and highlighted_edge are read-only tuples, they are changed
+    by assigning a new sequence or with the switch methods.
+    '''
+
+    def __init__(self, unique_edges: bool = False):
+        super().__init__(unique_edges)
+        self.highlighted_nodes = {}     # key -> node, in highlighting order
+        self.highlighted_edges = {}     # endpoint key pair -> edge
+        self.highlight_revision = 0
+
+    @property
+    def highlighted_node(self) -> tuple:
+        return tuple(self.highlighted_nodes.values())
+
+    @highlighted_node.setter
+    def highlighted_node(self, nodes) -> None:
+        self.highlighted_nodes = {nodeKey(node): node for node in nodes}
+        self.touchHighlights()
+
+    @property
+    def highlighted_edge(self) -> tuple:
+        return tuple(self.highlighted_edges.values())
+
+    @highlighted_edge.setter
+    def highlighted_edge(self, edges) -> None:
+        self.highlighted_edges = {edgeKey(edge): edge for edge in edges}
+        self.touchHighlights()
+
+    def touchHighlights(self):
+        '''marks the highlights (or the node data shown with them) changed'''
+        self.highlight_revision += 1
 
-    def __init__(self):
-        super().__init__()
-        self.highlighted_edge = []
-        self.highlighted_node = []
+    def isHighlightedNode(self, node) -> bool:
+        return nodeKey(node) in self.highlighted_nodes
+
+    def isHighlightedEdge(self, edge) -> bool:
+        return edgeKey(edge) in self.highlighted_edges
 
     def highlightEdgeSwitch(self, edge):
         '''Turns edge(Edge) highlight on/off.'''
-        if edge in self.highlighted_edge:
-            self.highlighted_edge.remove(edge)
+        key = edgeKey(edge)
+        if key in self.highlighted_edges:
+            del self.highlighted_edges[key]
         else:
-            self.highlighted_edge.append(edge)
+            self.highlighted_edges[key] = edge
+        self.touchHighlights()
 
     def highlightNodeSwitch(self, node):
         '''Turns node(Node) highlight on/off.'''
-        if node in self.highlighted_node:
-            self.highlighted_node.remove(node)
+        key = nodeKey(node)
+        if key in self.highlighted_nodes:
+            del self.highlighted_nodes[key]
         else:
-            self.highlighted_node.append(node)
+            self.highlighted_nodes[key] = node
+        self.touchHighlights()
 
     def nextHighlightedNode(self):
         '''generator method, traverse through already highlighted nodes'''
-        for node in self.highlighted_node:
+        for node in list(self.highlighted_nodes.values()):
             yield node
 
     def nextHighlightedEdge(self):
         '''generator method, traverse through already highlighted edges'''
-        for edge in self.highlighted_edge:
-            yield edge
\ No newline at end of file
+        for edge in list(self.highlighted_edges.values()):
+            yield edge
+
+class CSRVisGraph(CSRGraph):
+    '''Array backed graph with the same highlight options as VisGraph.'''
+
+    def __init__(self, *args, **kwargs):
+        self.highlighted_nodes = {}
+        self.highlighted_edges = {}
+        self.highlight_revision = 0
+        super().__init__(*args, **kwargs)
+
+    highlighted_node = VisGraph.highlighted_node
+    highlighted_edge = VisGraph.highlighted_edge
+    touchHighlights = VisGraph.touchHighlights
+    isHighlightedNode = VisGraph.isHighlightedNode
+    isHighlightedEdge = VisGraph.isHighlightedEdge
+    highlightEdgeSwitch = VisGraph.highlightEdgeSwitch
+    highlightNodeSwitch = VisGraph.highlightNodeSwitch
+    nextHighlightedNode = VisGraph.nextHighlightedNode
+    nextHighlightedEdge = VisGraph.nextHighlightedEdge
+
+    @classmethod
+    def fromGraph(cls, graph: Graph, dtype=np.float64) -> "CSRVisGraph":
+        '''converts a VisGraph (or Graph) into array form, highlights are kept'''
+        result = super().fromGraph(graph, dtype)
+        node_index = {id(node): i for i, node in enumerate(graph.nextNode())}
+        edge_index = {edgeKey(edge): i for i, edge in enumerate(graph.nextEdge())}
+        result.highlighted_node = [result.node(node_index[id(node)])
+                                   for node in getattr(graph, 'highlighted_node', [])]
+        result.highlighted_edge = [result.edge(edge_index[edgeKey(edge)])
+                                   for edge in getattr(graph, 'highlighted_edge', [])]
+        return result
+
+    def toGraph(self, graph: Graph = None) -> Graph:
+        '''converts back into a VisGraph (by default) with the same highlights'''
+        if graph is None:
+            graph = VisGraph()
+        super().toGraph(graph)
+        if isinstance(graph, VisGraph):
+            graph.highlighted_node = [graph.nodes[node.index] for node in self.highlighted_node]
+            graph.highlighted_edge = [graph.edges[edge.index] for edge in self.highlighted_edge]
+        return graph
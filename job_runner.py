@@ -0,0 +1,153 @@
+# background jobs in QThreads with progress, cancellation and stale result dropping
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+
+class JobCancelled(Exception):
+    '''raised inside a job function by Job.progress when the job was cancelled'''
+
+
+class Job(QObject):
+    '''
+    One call of a job function in a worker thread.
+    The function gets the job as its first argument and reports through
+    job.progress(percent, message), which is also the cancellation
+    point: it raises JobCancelled once cancel() was called.
+    '''
+    progressed = pyqtSignal(object, int, str)   # job, percent, message
+    done = pyqtSignal(object, object, str)      # job, result, error message ('' if none)
+
+    def __init__(self, channel: str, function, args: tuple) -> None:
+        super().__init__()
+        self.channel = channel
+        self.function = function
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def progress(self, percent: int, message: str = "") -> None:
+        '''reports the progress, raises JobCancelled if the job was cancelled'''
+        if self.cancelled:
+            raise JobCancelled()
+        self.progressed.emit(self, int(percent), message)
+
+    @pyqtSlot()
+    def run(self) -> None:
+        '''thread's working method'''
+        try:
+            result = self.function(self, *self.args)
+            if self.cancelled:
+                raise JobCancelled()
+        except JobCancelled:
+            self.done.emit(self, None, "cancelled")
+        except Exception as error:
+            self.done.emit(self, None, f"{type(error).__name__}: {error}")
+        else:
+            self.done.emit(self, result, "")
+
+
+class JobRunner(QObject):
+    '''
+    Runs job functions in background threads, one job per channel
+    (eg.: 'generate', 'background'). Starting a job cancels the running
+    job of the same channel, a result arriving from a superseded job is
+    dropped, so only the newest job's result reaches its callback.
+    Signals are delivered in the thread of the runner (the GUI thread).
+    '''
+    progressed = pyqtSignal(str, int, str)      # channel, percent, message
+    finished = pyqtSignal(str, str)             # channel, error message ('' if none)
+
+    def __init__(self, parent: QObject = None) -> None:
+        super().__init__(parent)
+        self.current = {}       # channel -> newest job
+        self.threads = {}       # job -> (thread, result callback), until the thread stops
+
+    def start(self, channel: str, function, *args, on_result=None) -> Job:
+        '''
+        Starts function(job, *args) in a new thread.
+
+        Args:
+            channel (str): jobs of a channel supersede each other
+            function (callable): the job function
+            on_result (callable): called with the return value in the
+                                  runner's thread, if the job is still current
+
+        Returns:
+            Job: the started job
+        '''
+        self.cancel(channel)
+        job = Job(channel, function, args)
+        thread = QThread()
+        job.moveToThread(thread)
+        job.progressed.connect(self.jobProgressed)
+        job.done.connect(self.jobDone)
+        thread.started.connect(job.run)
+        self.current[channel] = job
+        self.threads[job] = (thread, on_result)
+        thread.start()
+        return job
+
+    def cancel(self, channel: str) -> None:
+        '''cancels the current job of the channel, its result will be dropped'''
+        job = self.current.pop(channel, None)
+        if job is not None:
+            job.cancel()
+
+    def cancelAll(self) -> None:
+        for channel in list(self.current):
+            self.cancel(channel)
+
+    def isRunning(self, channel: str) -> bool:
+        return channel in self.current
+
+    def shutdown(self) -> None:
+        '''cancels every job and waits for the threads, eg.: before exit'''
+        self.cancelAll()
+        for thread, _ in list(self.threads.values()):
+            thread.quit()
+            thread.wait()
+        self.threads.clear()
+
+    @pyqtSlot(object, int, str)
+    def jobProgressed(self, job: Job, percent: int, message: str) -> None:
+        if self.current.get(job.channel) is job:
+            self.progressed.emit(job.channel, percent, message)
+
+    @pyqtSlot(object, object, str)
+    def jobDone(self, job: Job, result, error: str) -> None:
+        thread, on_result = self.threads.pop(job, (None, None))
+        if thread is not None:
+            thread.quit()
+            thread.wait()
+        if self.current.get(job.channel) is not job:
+            return      # superseded or cancelled
+        del self.current[job.channel]
+        if not error and on_result is not None:
+            on_result(result)
+        self.finished.emit(job.channel, error)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from PyQt5.QtCore import QCoreApplication, QTimer
+
+    app = QCoreApplication(sys.argv)
+    runner = JobRunner()
+
+    def count(job, name, steps):
+        for step in range(steps):
+            time.sleep(0.01)
+            job.progress(100 * step // steps, name)
+        return name
+
+    runner.progressed.connect(lambda channel, percent, message: print(channel, percent, message))
+    runner.start('demo', count, 'first', 50, on_result=lambda result: print("result:", result))
+    # supersedes the first job, only its result is printed
+    QTimer.singleShot(100, lambda: runner.start('demo', count, 'second', 20,
+                                                on_result=lambda result: print("result:", result)))
+    runner.finished.connect(lambda channel, error: app.quit())
+    app.exec()
+    runner.shutdown()
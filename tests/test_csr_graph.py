@@ -0,0 +1,26 @@
+# tests of the array backed CSRGraph
+
+from core.csr_graph import CSRGraph
+
+
+def triangleGraph() -> CSRGraph:
+    return CSRGraph([0, 10, 0], [0, 0, 10], [0, 1], [1, 2])
+
+
+def test_move_changes_the_graph_hash():
+    graph = triangleGraph()
+    before = hash(graph)
+    graph.node(1).move(20, 5)
+    assert hash(graph) != before
+    assert (graph.node(1).x(), graph.node(1).y()) == (20, 5)
+
+
+def test_position_setters_change_the_graph_hash():
+    graph = triangleGraph()
+    node = graph.node(2)
+    before = hash(graph)
+    node.posX = 3
+    after_x = hash(graph)
+    node.posY = 4
+    assert before != after_x != hash(graph)
+    assert (node.x(), node.y()) == (3, 4)
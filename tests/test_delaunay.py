@@ -0,0 +1,43 @@
+# tests of the Delaunay triangulation methods
+
+import random
+
+import pytest
+
+from core.graph import Node
+from utilities.delaunay import Delaunay, Triangle
+from utilities.triangulation import inCircle
+
+
+def test_triangle_circumcircle_is_cached_until_a_vertex_changes():
+    tri = Triangle()
+    tri.setA(Node(0, 0))
+    tri.setB(Node(4, 0))
+    tri.setC(Node(0, 4))
+    assert tri.circumcircle() == pytest.approx((2, 2, 8))
+    assert tri.circumcircle() is tri.circumcircle()
+    tri.setC(Node(0, 2))
+    assert tri.circumcircle() == pytest.approx((2, 1, 5))
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_bowyer_watson_mesh_is_delaunay(seed):
+    rng = random.Random(seed)
+    if seed % 2:
+        # integer grid: many cocircular points
+        points = {(rng.randint(0, 30) * 10, rng.randint(0, 20) * 10) for _ in range(300)}
+    else:
+        points = {(rng.uniform(0, 600), rng.uniform(0, 400)) for _ in range(300)}
+    nodes = [Node(x, y) for x, y in sorted(points)]
+    delaunay = Delaunay('bowyer-watson', seed)
+    delaunay.generate(nodes)
+    tri = delaunay.triangulation
+    xs, ys, V = tri.xs, tri.ys, tri.vertices
+    assert len(list(tri.triangles())) > len(nodes)
+    for a, b, t, u in tri.edgeTriangles():
+        if tri.isGhost(u):
+            continue
+        # a-b-c is counter-clockwise, the vertex across a-b is not inside its circumcircle
+        c = V[3*t] + V[3*t + 1] + V[3*t + 2] - a - b
+        d = V[3*u] + V[3*u + 1] + V[3*u + 2] - a - b
+        assert inCircle(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c], xs[d], ys[d]) <= 0
@@ -0,0 +1,125 @@
+# round trip and error tests of the binary graph file
+
+import mmap
+
+import numpy as np
+import pytest
+
+import graph_methods
+from core.csr_graph import CSRGraph
+from graph_file import HEADER, loadGraph, saveGraph
+from graph_generator import GraphGenerator
+
+NODE_STRATEGIES = range(len(GraphGenerator().nodeStrategyList))
+EDGE_STRATEGIES = range(len(GraphGenerator().edgeStrategyList))
+
+
+def position(node) -> tuple:
+    return node.x(), node.y()
+
+
+def mappedFile(array: np.ndarray):
+    '''the mmap under an array (or a view of it), None if it is in memory'''
+    while array is not None and not isinstance(array, mmap.mmap):
+        if isinstance(array, np.memmap) and array.mode != 'c':
+            return None
+        array = getattr(array, 'base', None)
+    return array
+
+
+def edgePositions(edges) -> list:
+    return [(position(edge.n1()), position(edge.n2())) for edge in edges]
+
+
+@pytest.fixture
+def generator(tmp_path):
+    generator = GraphGenerator()
+    generator.seed = 1
+    generator.numberOfNodes = 4
+    generator.pointFile = str(tmp_path / "points.csv")
+    np.savetxt(generator.pointFile, np.random.default_rng(1).random((300, 2)) * 600, delimiter=',')
+    return generator
+
+
+@pytest.fixture
+def small_file(tmp_path):
+    path = str(tmp_path / "small.graph")
+    saveGraph(CSRGraph([0, 10, 20], [0, 5, 0], [0, 1], [1, 2]), path)
+    return path
+
+
+@pytest.mark.parametrize('node_strategy', NODE_STRATEGIES)
+@pytest.mark.parametrize('edge_strategy', EDGE_STRATEGIES)
+def test_round_trip(generator, tmp_path, node_strategy, edge_strategy):
+    generator.nodeStrategy = node_strategy
+    generator.edgeStrategy = edge_strategy
+    graph = generator.genGraph()
+    graph_methods.highlightSpanningTree(graph)
+    path = str(tmp_path / "graph.graph")
+    saveGraph(graph, path)
+    restored = loadGraph(path).toGraph()
+    assert [(position(n), n.data) for n in graph.nextNode()] == \
+           [(position(n), n.data) for n in restored.nextNode()]
+    assert edgePositions(graph.nextEdge()) == edgePositions(restored.nextEdge())
+    assert [position(n) for n in graph.highlighted_node] == [position(n) for n in restored.highlighted_node]
+    assert edgePositions(graph.highlighted_edge) == edgePositions(restored.highlighted_edge)
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+def test_arrays_are_memory_mapped_copy_on_write(tmp_path, dtype):
+    path = str(tmp_path / "graph.graph")
+    saveGraph(CSRGraph([1.5, 2.5, 3.5], [4, 5, 6], [0, 1], [1, 2], dtype), path)
+    loaded = loadGraph(path, CSRGraph)
+    for array in (loaded.xs, loaded.ys, loaded.edge_u, loaded.offsets, loaded.neighbors):
+        assert mappedFile(array) is not None
+    assert loaded.xs.dtype == dtype
+    assert loaded.degree(1) == 2
+    loaded.node(0).move(100, 200)
+    assert position(loaded.node(0)) == (100, 200)
+    # the change stays in memory, the file is not modified
+    assert position(loadGraph(path, CSRGraph).node(0)) == (1.5, 4)
+    # a loaded graph can be saved back over its own file
+    saveGraph(loaded, path)
+    assert position(loadGraph(path, CSRGraph).node(0)) == (100, 200)
+
+
+def test_empty_graph(tmp_path):
+    path = str(tmp_path / "empty.graph")
+    saveGraph(CSRGraph(), path)
+    loaded = loadGraph(path)
+    assert loaded.nodeCount() == 0 and loaded.edgeCount() == 0
+
+
+@pytest.mark.parametrize('field, value', [(0, b'GRPX'), (1, 99), (4, 2)])
+def test_bad_header_raises(small_file, field, value):
+    with open(small_file, 'rb') as file:
+        content = file.read()
+    header = list(HEADER.unpack(content[:HEADER.size]))
+    header[field] = value
+    with open(small_file, 'wb') as file:
+        file.write(HEADER.pack(*header) + content[HEADER.size:])
+    with pytest.raises(ValueError):
+        loadGraph(small_file)
+
+
+@pytest.mark.parametrize('keep', [0, 10, HEADER.size, HEADER.size + 20, -4])
+def test_truncated_file_raises(small_file, keep):
+    with open(small_file, 'rb') as file:
+        content = file.read()
+    with open(small_file, 'wb') as file:
+        file.write(content[:keep])
+    with pytest.raises(ValueError):
+        loadGraph(small_file)
+
+
+def test_truncated_column_descriptors_raise(tmp_path):
+    graph = GraphGenerator().genGraph()
+    graph_methods.highlightSpanningTree(graph)
+    path = str(tmp_path / "graph.graph")
+    saveGraph(graph, path)
+    with open(path, 'rb') as file:
+        content = file.read()
+    with open(path, 'wb') as file:
+        file.write(content[:HEADER.size + 5])
+    with pytest.raises(ValueError):
+        loadGraph(path)
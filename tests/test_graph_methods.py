@@ -0,0 +1,56 @@
+# tests of the graph algorithms in graph_methods
+
+import pytest
+
+import graph_methods
+from graph_generator import GraphGenerator
+from graph_visualisation import CSRVisGraph
+
+
+def knnGraph(count: int = 200, k: int = 4, seed: int = 3):
+    generator = GraphGenerator()
+    generator.seed = seed
+    generator.nodeStrategy = 0
+    generator.numberOfRegionsX = 1
+    generator.numberOfRegionsY = 1
+    generator.numberOfNodes = count
+    generator.edgeStrategy = 1
+    generator.closestK = k
+    return generator.genGraph()
+
+
+@pytest.mark.parametrize('method', ['kruskal', 'prim', 'euclidean'])
+def test_spanning_tree_edges_are_highlighted(method):
+    graph = knnGraph()
+    tree = graph_methods.minimumSpanningTree(graph, method)
+    graph_methods.highlightMinimumSpanningTree(graph, method)
+    assert len(graph.highlighted_edge) == len(tree)
+    graph_edges = {id(edge) for edge in graph.nextEdge()}
+    for edge in graph.highlighted_edge:
+        assert id(edge) in graph_edges
+        assert graph.isHighlightedEdge(edge)
+
+
+def test_euclidean_tree_spans_the_nodes():
+    graph = knnGraph()
+    edge_count = len(graph.edges)
+    graph_methods.highlightMinimumSpanningTree(graph, 'euclidean')
+    assert len(graph.highlighted_edge) == len(graph.nodes) - 1
+    highlighted = sum(1 for edge in graph.nextEdge() if graph.isHighlightedEdge(edge))
+    assert highlighted == len(graph.nodes) - 1
+    # only the tree edges missing from the kNN graph were added
+    added = len(graph.edges) - edge_count
+    reused = sum(1 for edge in graph.edges[:edge_count] if graph.isHighlightedEdge(edge))
+    assert added + reused == len(graph.nodes) - 1
+
+
+def test_euclidean_tree_on_an_array_graph():
+    # every tree edge is in the kNN graph with a large enough k: nothing to add
+    graph = CSRVisGraph.fromGraph(knnGraph(count=60, k=59))
+    graph_methods.highlightMinimumSpanningTree(graph, 'euclidean')
+    assert len(graph.highlighted_edge) == graph.nodeCount() - 1
+    assert all(graph.isHighlightedEdge(edge) for edge in graph.highlighted_edge)
+    # a sparse array graph cannot take the missing tree edges
+    sparse = CSRVisGraph.fromGraph(knnGraph(k=1))
+    with pytest.raises(ValueError):
+        graph_methods.highlightMinimumSpanningTree(sparse, 'euclidean')
@@ -0,0 +1,94 @@
+# tests of the shortest path searches against each other and singleSourceDistances
+
+import math
+import random
+
+import pytest
+
+from graph_generator import GraphGenerator
+from graph_methods import edgeLength
+from graph_shortest_path import astar, bidirectionalDijkstra, dijkstra, singleSourceDistances
+from graph_traversal import nodeKey
+from graph_visualisation import CSRVisGraph
+
+SEARCHES = [dijkstra, astar, bidirectionalDijkstra]
+
+
+def knnGraph(array: bool = False):
+    '''k = 2 nearest neighbour graph, it falls apart into several components'''
+    generator = GraphGenerator()
+    generator.seed = 5
+    generator.nodeStrategy = 0
+    generator.numberOfRegionsX = 1
+    generator.numberOfRegionsY = 1
+    generator.numberOfNodes = 300
+    generator.edgeStrategy = 1
+    generator.closestK = 2
+    graph = generator.genGraph()
+    return CSRVisGraph.fromGraph(graph) if array else graph
+
+
+def checkPath(path, source, target) -> None:
+    '''the path runs from source to target along its edges and its length is the distance'''
+    assert nodeKey(path.nodes[0]) == nodeKey(source)
+    assert nodeKey(path.nodes[-1]) == nodeKey(target)
+    assert len(path.edges) == len(path.nodes) - 1
+    for a, b, edge in zip(path.nodes, path.nodes[1:], path.edges):
+        assert {nodeKey(a), nodeKey(b)} == {nodeKey(edge.n1()), nodeKey(edge.n2())}
+    assert sum(edgeLength(edge) for edge in path.edges) == pytest.approx(path.distance)
+
+
+@pytest.fixture(params=[False, True], ids=['object graph', 'array graph'])
+def graph(request):
+    return knnGraph(request.param)
+
+
+def test_searches_agree_with_single_source_distances(graph):
+    nodes = list(graph.nextNode())
+    rng = random.Random(1)
+    reachable = unreachable = 0
+    for source in rng.sample(nodes, 8):
+        distances, _ = singleSourceDistances(graph, source)
+        for i in rng.sample(range(len(nodes)), 25):
+            target = nodes[i]
+            expected = distances[i]
+            for search in SEARCHES:
+                path = search(graph, source, target)
+                if math.isinf(expected):
+                    assert not path.found()
+                    assert path.nodes == [] and path.edges == []
+                else:
+                    assert path.found()
+                    assert path.distance == pytest.approx(expected)
+                    checkPath(path, source, target)
+            if math.isinf(expected):
+                unreachable += 1
+            else:
+                reachable += 1
+    # the graph has several components: both cases were covered
+    assert reachable and unreachable
+
+
+def test_unreachable_target(graph):
+    nodes = list(graph.nextNode())
+    distances, previous = singleSourceDistances(graph, nodes[0])
+    unreachable = [i for i, distance in enumerate(distances) if math.isinf(distance)]
+    assert unreachable
+    assert all(previous[i] == -1 for i in unreachable)
+    for search in SEARCHES:
+        path = search(graph, nodes[0], nodes[unreachable[0]])
+        assert not path.found()
+        assert path.distance == math.inf
+        assert path.nodes == [] and path.edges == []
+
+
+def test_source_is_target(graph):
+    source = next(graph.nextNode())
+    for search in SEARCHES:
+        path = search(graph, source, source)
+        assert path.found()
+        assert path.distance == 0
+        assert [nodeKey(node) for node in path.nodes] == [nodeKey(source)]
+        assert path.edges == []
+    distances, previous = singleSourceDistances(graph, source)
+    assert distances[0] == 0 and previous[0] == -1
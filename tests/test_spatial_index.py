@@ -0,0 +1,77 @@
+# tests of the spatial indexes against brute force answers
+
+import math
+import random
+
+import pytest
+
+from core.graph import Node
+from utilities.spatial_index import SpatialGrid
+
+
+def randomNodes(seed: int, count: int = 500) -> list:
+    rng = random.Random(seed)
+    if seed % 2:
+        # integer coordinates: many ties and stacked nodes
+        return [Node(rng.randint(0, 60), rng.randint(0, 40)) for _ in range(count)]
+    return [Node(rng.uniform(0, 1000), rng.uniform(0, 800)) for _ in range(count)]
+
+
+def bruteNearest(nodes: list, x, y, k: int, exclude=None) -> list:
+    distances = sorted(math.hypot(node.x() - x, node.y() - y) for node in nodes if node is not exclude)
+    return distances[:k]
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_nearest_matches_brute_force(seed):
+    nodes = randomNodes(seed)
+    grid = SpatialGrid()
+    grid.build(nodes)
+    rng = random.Random(seed + 100)
+    width = max(node.x() for node in nodes)
+    height = max(node.y() for node in nodes)
+    queries = [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(50)]
+    # outside the bounding box, near and far
+    queries += [(-5, height / 2), (width + 3, -2), (width / 3, height * 40),
+                (-width * 100, -height * 100), (width * 250, height * 0.5)]
+    for x, y in queries:
+        for k in (1, 5, 30):
+            found = [distance for distance, _ in grid.nearest(x, y, k)]
+            assert found == pytest.approx(bruteNearest(nodes, x, y, k))
+
+
+def test_nearest_excludes_the_query_node():
+    nodes = randomNodes(0)
+    grid = SpatialGrid()
+    grid.build(nodes)
+    for node in nodes[:20]:
+        found = grid.nearest(node.x(), node.y(), 3, exclude=node)
+        assert all(item is not node for _, item in found)
+        assert [distance for distance, _ in found] == pytest.approx(
+            bruteNearest(nodes, node.x(), node.y(), 3, exclude=node))
+
+
+def test_nearest_after_moves():
+    nodes = randomNodes(2, 200)
+    grid = SpatialGrid()
+    grid.build(nodes)
+    rng = random.Random(7)
+    for node in nodes[:50]:
+        node.move(rng.uniform(-500, 1500), rng.uniform(-500, 1300))
+        grid.move(node, node.x(), node.y())
+    for x, y in [(0, 0), (-800, 2000), (1200, 400)]:
+        found = [distance for distance, _ in grid.nearest(x, y, 10)]
+        assert found == pytest.approx(bruteNearest(nodes, x, y, 10))
+
+
+def test_count_in_rect_matches_brute_force():
+    nodes = randomNodes(4, 2000)
+    grid = SpatialGrid()
+    grid.build(nodes)
+    rng = random.Random(9)
+    for _ in range(100):
+        x0, x1 = sorted(rng.uniform(-100, 1100) for _ in range(2))
+        y0, y1 = sorted(rng.uniform(-100, 900) for _ in range(2))
+        expected = sum(1 for node in nodes if x0 <= node.x() <= x1 and y0 <= node.y() <= y1)
+        assert grid.countInRect(x0, y0, x1, y1) == expected
+        assert len(grid.inRect(x0, y0, x1, y1)) == expected
@@ -4,14 +4,72 @@ from math import sqrt
 import numpy as np
 from utilities.node_generator import NodeGeneratorBase
 from core.graph import Node,Edge, Graph
+from utilities.triangulation import Triangulation, circumcircle
+from utilities.voronoi import VoronoiGraph
+
+def batch_circumcircles(triangles: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Circumcircles of a block of triangles in one vectorized pass.
+
+    Args:
+        triangles (np.ndarray): (m, 3, 2) array of triangle vertex coordinates
+
+    Returns:
+        tuple: (m, 2) array of circle centers and (m,) array of radii,
+               collinear triangles get infinite centers and radii
+    '''
+    tris = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 2)
+    a = tris[:, 0]
+    b = tris[:, 1] - a
+    c = tris[:, 2] - a
+    d = 2 * (b[:, 0] * c[:, 1] - b[:, 1] * c[:, 0])
+    b2 = np.einsum('ij,ij->i', b, b)
+    c2 = np.einsum('ij,ij->i', c, c)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ux = (c[:, 1] * b2 - b[:, 1] * c2) / d
+        uy = (b[:, 0] * c2 - c[:, 0] * b2) / d
+    degenerate = d == 0
+    ux[degenerate] = np.inf
+    uy[degenerate] = np.inf
+    centers = np.column_stack((a[:, 0] + ux, a[:, 1] + uy))
+    radii = np.hypot(ux, uy)
+    return centers, radii
+
+
+def batch_in_circle(point: tuple, triangles: np.ndarray) -> np.ndarray:
+    '''
+    Tests one point against the circumcircles of a block of triangles.
+    Uses the in-circle determinant, the vertex order of the triangles
+    does not matter, degenerate triangles never contain the point.
+
+    Args:
+        point (tuple): x, y coordinates
+        triangles (np.ndarray): (m, 3, 2) array of triangle vertex coordinates
+
+    Returns:
+        np.ndarray: (m,) boolean mask, True where the point is strictly inside
+    '''
+    tris = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 2)
+    d = tris - np.asarray(point, dtype=np.float64)
+    adx, ady = d[:, 0, 0], d[:, 0, 1]
+    bdx, bdy = d[:, 1, 0], d[:, 1, 1]
+    cdx, cdy = d[:, 2, 0], d[:, 2, 1]
+    det = (adx * adx + ady * ady) * (bdx * cdy - cdx * bdy) + \
+          (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy) + \
+          (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady)
+    orientation = (bdx - adx) * (cdy - ady) - (bdy - ady) * (cdx - adx)
+    return det * np.sign(orientation) > 0
+
 
 class Triangle(Graph):
     '''
     helper class for delaunay triangulation
-    the Bowyer-Watson algorithm uses it mostly
+    the Bowyer-Watson algorithm uses it mostly,
+    the circumcircle is calculated once and cached until a vertex changes
     '''
     def __init__(self):
         super().__init__()
+        self.circle = None
         self.addNode(Node(0,0))
         self.addNode(Node(0,0))
         self.addNode(Node(0,0))
@@ -29,10 +87,13 @@ class Triangle(Graph):
 
     def setA(self, node: Node):
         self.nodes[0] = node
+        self.circle = None
     def setB(self, node: Node):
         self.nodes[1] = node
+        self.circle = None
     def setC(self, node: Node):
         self.nodes[2] = node
+        self.circle = None
 
     def getA(self) -> Node:
         return self.nodes[0]
@@ -41,6 +102,13 @@ class Triangle(Graph):
     def getC(self) -> Node:
         return self.nodes[2]
 
+    def circumcircle(self) -> tuple:
+        '''cached circumcircle center x, y and squared radius, infinite if degenerate'''
+        if self.circle is None:
+            A, B, C = self.nodes
+            self.circle = circumcircle(A.x(), A.y(), B.x(), B.y(), C.x(), C.y())
+        return self.circle
+
     def checkNode(self, node):
         if node == self.getA() or \
             node == self.getB() or \
@@ -73,13 +141,117 @@ class Delaunay(NodeGeneratorBase):
     '''
     Class for generating the Delaunay triangluation on given coordinates.
     https://en.wikipedia.org/wiki/Delaunay_triangulation
+
+    The default 'incremental' method runs on the adjacency linked
+    Triangulation mesh in expected O(n log n), the original
+    'bowyer-watson' implementation is kept for cross-checking.
     '''
 
-    def __init__(self) -> None:
+    methods = ['incremental', 'bowyer-watson']
+
+    def __init__(self, method: str = 'incremental', seed: int = None) -> None:
         super().__init__()
+        self.setMethod(method)
+        self.seed = seed
+        self.triangulation: Triangulation = None
+        self.progress = None    # optional callable(inserted, total), see Triangulation.insertPoints
+
+    def setMethod(self, method: str) -> None:
+        if method not in self.methods:
+            raise ValueError(f"unknown triangulation method: {method}")
+        self.method = method
 
     def generate(self, nodes: list[Node]) -> tuple[list[Edge],list[Edge]]:
-        '''        
+        '''
+        Triangulates the nodes with the selected method.
+
+        Args:
+            nodes (list[Node]): list of individual points that the
+                                delaunay triangulation should run on
+
+        Returns:
+            tuple: delaunay edges between the given nodes and voronoi nodes
+                   (circumcircle centers, data['sites'] holds the three nodes)
+        '''
+        if self.method == 'bowyer-watson':
+            return self.generate_bowyerwatson(nodes)
+        return self.generate_incremental(nodes)
+
+    def triangulate(self, nodes: list[Node]) -> list[int]:
+        '''
+        Triangulates the nodes with the selected method into self.triangulation,
+        without collecting edges.
+
+        Returns:
+            list[int]: vertex index of every node
+        '''
+        if self.method == 'bowyer-watson':
+            self.generate_bowyerwatson(nodes)
+            return list(range(len(nodes)))
+        self.triangulation = Triangulation(self.seed)
+        return self.triangulation.insertPoints([(node.x(), node.y()) for node in nodes], self.progress)
+
+    def voronoi(self, nodes: list[Node], indices: list[int]) -> VoronoiGraph:
+        '''
+        Voronoi diagram of the nodes in self.triangulation, see triangulate.
+
+        Args:
+            nodes (list[Node]): the triangulated nodes, they become the sites
+            indices (list[int]): vertex index of every node
+
+        Returns:
+            VoronoiGraph: Voronoi vertices and edges, cells and rays of the sites
+        '''
+        sites = [None] * self.triangulation.vertexCount()
+        for node, v in zip(nodes, indices):
+            if sites[v] is None:
+                sites[v] = node
+        return VoronoiGraph.fromTriangulation(self.triangulation, sites)
+
+    def generate_incremental(self, nodes: list[Node]) -> tuple[list[Edge],list[Edge]]:
+        '''
+        Randomized incremental insertion on the Triangulation mesh,
+        the triangulation is kept in self.triangulation.
+        '''
+        indices = self.triangulate(nodes)
+        if not nodes:
+            return [], []
+        return self.collectResults(nodes, indices)
+
+    def collectResults(self, nodes: list[Node], indices: list[int]) -> tuple[list[Edge],list[Edge]]:
+        '''
+        Delaunay edges and voronoi nodes of the nodes in self.triangulation,
+        eg.: after the points were inserted in batches while streaming them.
+
+        Args:
+            nodes (list[Node]): the triangulated nodes
+            indices (list[int]): vertex index of every node
+
+        Returns:
+            tuple: same as generate
+        '''
+        delaunay_result: list[Edge] = []
+        voronoi_result: list[Node] = []
+        tri = self.triangulation
+        vertex_node = [None] * tri.vertexCount()
+        for node, v in zip(nodes, indices):
+            if vertex_node[v] is None:
+                vertex_node[v] = node
+        for a, b in tri.edges():
+            delaunay_result.append(Edge(vertex_node[a], vertex_node[b]))
+        faces = list(tri.triangles())
+        if faces:
+            points = np.column_stack((tri.xs, tri.ys))
+            centers, _ = batch_circumcircles(points[np.array(faces)])
+            for (a, b, c), (cc_x, cc_y) in zip(faces, centers.tolist()):
+                voronoi_node = Node(int(cc_x),int(cc_y))
+                voronoi_node.data = {"sites":{vertex_node[a],vertex_node[b],vertex_node[c]}}
+                voronoi_result.append(voronoi_node)
+        voronoi_result = list(set(voronoi_result))
+        return delaunay_result, voronoi_result
+
+    def generate_bowyerwatson(self, nodes: list[Node]) -> tuple[list[Edge],list[Edge]]:
+        '''
         Bowyer-Watson algorithm
         https://en.wikipedia.org/wiki/Bowyer%E2%80%93Watson_algorithm
 
@@ -88,12 +260,13 @@ class Delaunay(NodeGeneratorBase):
                                 delaunay triangulation should run on
 
         Returns:
-            list[Edge]: list of edges (point pairs) that 
+            tuple: same as generate, the triangles are also kept
+                   as a mesh in self.triangulation
         '''
         
         delaunay_result: list[Edge] = []
         voronoi_result: list[Edge] = []
-        voronoi_data = {}
+        self.triangulation = Triangulation(self.seed)
         if not nodes:
             return delaunay_result, voronoi_result
         triangulation: list[Triangle] = []
@@ -102,26 +275,43 @@ class Delaunay(NodeGeneratorBase):
         super_triangle.setA(Node(500,10000))
         super_triangle.setB(Node(10000,-10000))
         super_triangle.setC(Node(-10000,-10000))
-        triangulation.append(super_triangle)
+        # cached circumcircle (center x, y, squared radius) and vertex
+        # coordinates of every created triangle, searched in one batch per
+        # insertion, removed triangles are only masked out
+        circles = np.empty((4 * len(nodes) + 16, 3))
+        coords = np.empty((len(circles), 3, 2))
+        alive = np.zeros(len(circles), dtype=bool)
+
+        def addTriangle(tri: Triangle) -> None:
+            nonlocal circles, coords, alive
+            index = len(triangulation)
+            if index == len(circles):
+                circles = np.concatenate((circles, np.empty_like(circles)))
+                coords = np.concatenate((coords, np.empty_like(coords)))
+                alive = np.concatenate((alive, np.zeros_like(alive)))
+            circles[index] = tri.circumcircle()
+            coords[index] = [(n.x(), n.y()) for n in tri.nodes]
+            alive[index] = True
+            triangulation.append(tri)
+
+        addTriangle(super_triangle)
 
         for node in nodes:
-            bad_triangles = []
-            for tri in triangulation:
-                A = (tri.getA().x(),tri.getA().y())
-                B = (tri.getB().x(),tri.getB().y())
-                C = (tri.getC().x(),tri.getC().y())
-                # get circumcircle center and radius
-                cc_x, cc_y, cc_r = self.calcCircleMidpoint(A,B,C)
-                diff_x = cc_x - node.x()
-                diff_y = cc_y - node.y()
-                diff_length = sqrt(diff_x*diff_x + diff_y*diff_y)
-                if diff_length < cc_r:
-                    # new point is within circumcircle
-                    bad_triangles.append(tri)
-                # TODO: should store cc center for Voronoi
-                vor_node = Node(int(cc_x),int(cc_y))
-                vor_node.data = {"center_node": node}
-                voronoi_data[tri] = vor_node
+            count = len(triangulation)
+            point = (node.x(), node.y())
+            # new point is within circumcircle
+            diff_x = circles[:count, 0] - point[0]
+            diff_y = circles[:count, 1] - point[1]
+            radius2 = circles[:count, 2]
+            with np.errstate(invalid='ignore'):
+                distance2 = diff_x*diff_x + diff_y*diff_y
+                inside = distance2 < radius2
+                # (nearly) on the circle: the in-circle determinant decides
+                tie = np.flatnonzero((np.abs(distance2 - radius2) <= radius2 * 1e-9) & alive[:count])
+            if len(tie):
+                inside[tie] = batch_in_circle(point, coords[tie])
+            bad_indices = np.flatnonzero(inside & alive[:count])
+            bad_triangles = [triangulation[i] for i in bad_indices]
             polygon = []
             for tri1 in bad_triangles:
                 # find bounding edges of polygonal hole
@@ -135,19 +325,20 @@ class Delaunay(NodeGeneratorBase):
                             shared = True
                     if not shared:
                         polygon.append(edge)
-            for tri in bad_triangles:
-                # remove invalidated triangles
-                triangulation.remove(tri)
+            # remove invalidated triangles
+            alive[bad_indices] = False
             for edge in polygon:
                 # re-triangulate the polygonal hole
                 newTri = Triangle()
                 newTri.setA(edge.n1())
                 newTri.setB(edge.n2())
                 newTri.setC(node)
-                triangulation.append(newTri)
-        for tri in triangulation:
+                addTriangle(newTri)
+        result_indices = []
+        for index in np.flatnonzero(alive[:len(triangulation)]):
             # create return edge package, 
             # except edges connected to big helper triangle
+            tri = triangulation[index]
             if tri.checkNode(super_triangle.getA()) or \
                 tri.checkNode(super_triangle.getB()) or \
                 tri.checkNode(super_triangle.getC()):
@@ -155,15 +346,19 @@ class Delaunay(NodeGeneratorBase):
             delaunay_result.append(tri.getAB())
             delaunay_result.append(tri.getBC())
             delaunay_result.append(tri.getCA())
-            # create voronoi
-            A = (tri.getA().x(),tri.getA().y())
-            B = (tri.getB().x(),tri.getB().y())
-            C = (tri.getC().x(),tri.getC().y())
-            # get circumcircle center and radius
-            cc_x, cc_y, cc_r = self.calcCircleMidpoint(A,B,C)
-            voronoi_node = Node(int(cc_x),int(cc_y))
-            voronoi_node.data = {"sites":{tri.getA(),tri.getB(),tri.getC()}}
-            voronoi_result.append(voronoi_node)
+            result_indices.append(index)
+        node_index = {id(node): i for i, node in enumerate(nodes)}
+        self.triangulation = Triangulation.fromTriangles(
+            [(node.x(), node.y()) for node in nodes],
+            [[node_index[id(node)] for node in triangulation[index].nodes] for index in result_indices],
+            self.seed)
+        # create voronoi
+        if result_indices:
+            for index, (cc_x, cc_y, _) in zip(result_indices, circles[result_indices].tolist()):
+                tri = triangulation[index]
+                voronoi_node = Node(int(cc_x),int(cc_y))
+                voronoi_node.data = {"sites":{tri.getA(),tri.getB(),tri.getC()}}
+                voronoi_result.append(voronoi_node)
 
         voronoi_result = list(set(voronoi_result))
         delaunay_result = list(set(delaunay_result))
@@ -183,15 +378,9 @@ class Delaunay(NodeGeneratorBase):
     def calcCircleMidpoint(self, point1: tuple, point2: tuple, point3: tuple) -> tuple:
         '''
         Gives the midpoint and radius of a circle that passing through 3 points.
-        - first calculates two midpoints (M1,M2), 
-        - then with the bisector lines' equations on these points
-            - L1 line perpendicular to P2-P1 line and intersects M1:
-                L1 = M1 + T[0] * V1
-            - L2 line perpendicular to P3-P1 line and intersects M2:
-                L2 = M2 + T[1] * V2
-        - it calculates the intersection of these lines which give us a variable (T)
-        - inserting this (T) variable in one of the line equations
-          it gives the circle's midpoint
+        Closed-form determinant solution of the perpendicular bisectors' intersection:
+            D = 2 * ((P2-P1) x (P3-P1))
+            center = P1 + (|P2-P1|^2 * perp(P3-P1) - |P3-P1|^2 * perp(P2-P1)) / D
 
         Args:
             point1 ([type]): first point on circle's circumference
@@ -200,34 +389,10 @@ class Delaunay(NodeGeneratorBase):
         Return:
             circle's midpoint x, y and radius
         '''
-        
-        # rotation matrix
-        theta = np.radians(90)
-        rot = np.array([(np.cos(theta), -np.sin(theta)),(np.sin(theta), np.cos(theta))])
-        P1 = np.array(point1)
-        P2 = np.array(point2)
-        P3 = np.array(point3)
-        # M1 midpoint between P2 and P1
-        M1 = P1 + (P2 - P1)/2
-        # V1 
-        V1 = ((P2 - P1) @ rot)
-
-        # M2 midpoint between P3 and P1
-        M2 = P1 + (P3 - P1)/2
-        # V2
-        V2 = ((P3 - P1) @ rot)
-        
-        # solve(L1 = L2) -> midpointC
-        T = np.linalg.solve(np.array([(V1[0],-V2[0]),(V1[1],-V2[1])]), 
-                            np.array([(M2[0]-M1[0]),(M2[1]-M1[1])]))
-        
-        # with T this gives us the intersection point of L1 and L2
-        L2 = M2 + T[1] * V2
-        
-        # circles radius
-        radius = np.linalg.norm([L2-P1])
-        
-        return L2[0],L2[1],radius
+        cc_x, cc_y, cc_r2 = circumcircle(point1[0], point1[1],
+                                         point2[0], point2[1],
+                                         point3[0], point3[1])
+        return cc_x, cc_y, sqrt(cc_r2)
 
 if __name__ == "__main__":
     triang = Delaunay()
@@ -0,0 +1,88 @@
+# nearest site distance field over a pixel grid
+
+import numpy as np
+
+
+def distanceField(xs, ys, width: int, height: int, step: int = 1,
+                  exact_limit: int = 20_000_000) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Distance from every grid sample to the closest site, computed for the
+    whole grid at once. Samples are at (column * step, row * step).
+    Small problems (samples * sites <= exact_limit) are solved exactly
+    by blocked brute force, larger ones by jump flooding: every sample
+    repeatedly takes the best site seen by its 8 neighbours at halving
+    distances, O(samples * log(samples)) regardless of the site count.
+
+    Args:
+        xs, ys: site coordinates
+        width, height (int): area size in pixels
+        step (int): distance between samples in pixels
+
+    Returns:
+        tuple: (rows, columns) float64 distance array and int64 array
+               of the closest site's index, -1 everywhere without sites
+    '''
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    columns = -(-width // step)
+    rows = -(-height // step)
+    sample_x = np.arange(columns, dtype=np.float64) * step
+    sample_y = np.arange(rows, dtype=np.float64) * step
+    if len(xs) == 0:
+        return np.full((rows, columns), np.inf), np.full((rows, columns), -1, dtype=np.int64)
+    if rows * columns * len(xs) <= exact_limit:
+        return _bruteForce(xs, ys, sample_x, sample_y)
+    return _jumpFlooding(xs, ys, sample_x, sample_y, step)
+
+
+def _bruteForce(xs, ys, sample_x, sample_y) -> tuple[np.ndarray, np.ndarray]:
+    '''exact field, one row block against every site at a time'''
+    rows, columns = len(sample_y), len(sample_x)
+    distance = np.empty((rows, columns))
+    nearest = np.empty((rows, columns), dtype=np.int64)
+    dx2 = (sample_x[:, None] - xs[None, :]) ** 2                # (columns, sites)
+    block = max(1, 4_000_000 // (columns * len(xs)))
+    for first in range(0, rows, block):
+        dy2 = (sample_y[first:first + block, None] - ys[None, :]) ** 2   # (block, sites)
+        d2 = dy2[:, None, :] + dx2[None, :, :]
+        nearest[first:first + block] = d2.argmin(axis=2)
+        distance[first:first + block] = np.sqrt(d2.min(axis=2))
+    return distance, nearest
+
+
+def _jumpFlooding(xs, ys, sample_x, sample_y, step: int) -> tuple[np.ndarray, np.ndarray]:
+    '''jump flooding algorithm (JFA+1), exact distances to the sites it assigns'''
+    rows, columns = len(sample_y), len(sample_x)
+    nearest = np.full((rows, columns), -1, dtype=np.int64)
+    seed_row = np.clip(np.rint(ys / step).astype(np.int64), 0, rows - 1)
+    seed_column = np.clip(np.rint(xs / step).astype(np.int64), 0, columns - 1)
+    nearest[seed_row, seed_column] = np.arange(len(xs))
+    grid_x = np.broadcast_to(sample_x, (rows, columns))
+    grid_y = np.broadcast_to(sample_y[:, None], (rows, columns))
+
+    def squaredDistance(site: np.ndarray) -> np.ndarray:
+        d2 = (xs[site] - grid_x) ** 2 + (ys[site] - grid_y) ** 2
+        d2[site < 0] = np.inf
+        return d2
+
+    best = squaredDistance(nearest)
+    jumps = []
+    jump = 1 << max(0, int(max(rows, columns) - 1).bit_length() - 1)
+    while jump >= 1:
+        jumps.append(jump)
+        jump //= 2
+    jumps.append(1)
+    for jump in jumps:
+        for dy in (-jump, 0, jump):
+            for dx in (-jump, 0, jump):
+                if dx == 0 and dy == 0:
+                    continue
+                candidate = np.full((rows, columns), -1, dtype=np.int64)
+                # candidate[r, c] = nearest[r + dy, c + dx] where inside the grid
+                candidate[max(0, -dy):rows - max(0, dy), max(0, -dx):columns - max(0, dx)] = \
+                    nearest[max(0, dy):rows - max(0, -dy), max(0, dx):columns - max(0, -dx)]
+                d2 = squaredDistance(candidate)
+                better = d2 < best
+                nearest[better] = candidate[better]
+                best[better] = d2[better]
+    return np.sqrt(best), nearest
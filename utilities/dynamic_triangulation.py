@@ -0,0 +1,404 @@
+# Delaunay triangulation with local vertex insertion, removal and moves, reporting what changed
+
+from utilities.triangulation import INF, Triangulation, circumcircle, inCircle, orient
+
+
+def triangleKey(a: int, b: int, c: int) -> tuple:
+    '''the vertex triple of a triangle rotated to start with its smallest index, the same for every rotation'''
+    if a < b and a < c:
+        return a, b, c
+    if b < c:
+        return b, c, a
+    return c, a, b
+
+
+class MeshDiff:
+    '''
+    Changes of the triangulation made by one update.
+    Edges are vertex index pairs, smaller index first. Voronoi vertices
+    are keyed by the triangleKey of their Delaunay triangle and map to its
+    circumcenter; a key in both dicts is a Voronoi vertex that moved.
+    '''
+
+    def __init__(self) -> None:
+        self.added_edges = set()
+        self.removed_edges = set()
+        self.added_voronoi = {}
+        self.removed_voronoi = {}
+
+    def isEmpty(self) -> bool:
+        return not (self.added_edges or self.removed_edges or self.added_voronoi or self.removed_voronoi)
+
+    def sites(self) -> set:
+        '''vertices whose Voronoi cell changed: ends of the changed edges, sites of the changed Voronoi vertices'''
+        result = set()
+        for edges in (self.added_edges, self.removed_edges):
+            for a, b in edges:
+                result.add(a)
+                result.add(b)
+        for vertices in (self.added_voronoi, self.removed_voronoi):
+            for key in vertices:
+                result.update(key)
+        return result
+
+    def __repr__(self) -> str:
+        return (f"MeshDiff(+{len(self.added_edges)}/-{len(self.removed_edges)} edges, "
+                f"+{len(self.added_voronoi)}/-{len(self.removed_voronoi)} Voronoi vertices)")
+
+
+class DynamicTriangulation(Triangulation):
+    '''
+    Delaunay triangulation that is kept up to date under editing:
+    vertices can be inserted, removed and moved, each update touches only
+    the triangles around the vertex and returns a MeshDiff of the
+    Delaunay edges and Voronoi vertices it changed.
+
+    Insertion is the Bowyer-Watson step of Triangulation. Removal fills
+    the star-shaped hole left by the vertex by clipping Delaunay ears
+    (convex corners of the link polygon whose circumcircle holds no other
+    link vertex), O(degree^3), constant on average. A move only shifts the
+    vertex if its triangles stay counter-clockwise and locally Delaunay,
+    otherwise the vertex is removed and inserted again with the same index.
+
+    The diffs come from a journal of the triangles created and removed
+    during an update. Only the degenerate cases are rebuilt from scratch:
+    a removal that leaves every vertex on one line.
+    '''
+
+    def __init__(self, seed: int = None) -> None:
+        super().__init__(seed)
+        self.journal = None         # (+1 / -1, triangle key, circumcenter) while an update runs
+
+    def hasVertex(self, v: int) -> bool:
+        '''True if vertex v is part of the triangulation (not removed)'''
+        if not 0 <= v < len(self.xs):
+            return False
+        return self.vertex_triangle[v] >= 0 or self.pending_index.get((self.xs[v], self.ys[v])) == v
+
+    def vertexAt(self, x, y):
+        '''the vertex on the coordinates, None if there is none'''
+        if self.pending or not self.alive:
+            return self.pending_index.get((x, y))
+        t = self._locate(x, y)
+        for u in self.vertices[3*t:3*t + 3]:
+            if u != INF and self.xs[u] == x and self.ys[u] == y:
+                return u
+        return None
+
+    def insertVertex(self, x, y) -> tuple:
+        '''
+        Inserts one point.
+
+        Returns:
+            tuple: vertex index (of the existing vertex on the same
+                   coordinates if there is one) and the MeshDiff
+        '''
+        chain = self._begin()
+        try:
+            v = self.addPoint(x, y)
+        finally:
+            diff = self._finish(chain)
+        return v, diff
+
+    def removeVertex(self, v: int) -> MeshDiff:
+        '''
+        Removes a vertex and re-triangulates the hole it leaves.
+        The index is not reused by later insertions.
+
+        Raises:
+            ValueError: v is not in the triangulation
+        '''
+        if not self.hasVertex(v):
+            raise ValueError(f"vertex {v} is not in the triangulation")
+        chain = self._begin()
+        try:
+            self._deleteVertex(v)
+        finally:
+            diff = self._finish(chain)
+        return diff
+
+    def moveVertex(self, v: int, x, y) -> MeshDiff:
+        '''
+        Moves a vertex to new coordinates, it keeps its index.
+
+        Raises:
+            ValueError: v is not in the triangulation, or another vertex is on (x, y)
+        '''
+        if not self.hasVertex(v):
+            raise ValueError(f"vertex {v} is not in the triangulation")
+        xs, ys = self.xs, self.ys
+        if xs[v] == x and ys[v] == y:
+            return MeshDiff()
+        if self.vertex_triangle[v] >= 0:
+            self.last = self.vertex_triangle[v]     # the walk starts next to the vertex
+        other = self.vertexAt(x, y)
+        if other is not None:
+            raise ValueError(f"vertex {other} is already on ({x}, {y})")
+        chain = self._begin()
+        try:
+            if not self._shiftVertex(v, x, y):
+                self._deleteVertex(v)
+                xs[v] = x
+                ys[v] = y
+                self._reinsertVertex(v)
+        finally:
+            diff = self._finish(chain)
+        return diff
+
+    def _newTriangle(self, a: int, b: int, c: int) -> int:
+        t = super()._newTriangle(a, b, c)
+        if self.journal is not None:
+            self.journal.append((1, triangleKey(a, b, c), self._center(a, b, c)))
+        return t
+
+    def _removeTriangle(self, t: int) -> None:
+        if self.journal is not None:
+            a, b, c = self.vertices[3*t:3*t + 3]
+            self.journal.append((-1, triangleKey(a, b, c), self._center(a, b, c)))
+        super()._removeTriangle(t)
+
+    def _center(self, a: int, b: int, c: int):
+        if c == INF:
+            return None
+        xs, ys = self.xs, self.ys
+        return circumcircle(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c])[:2]
+
+    def _chainEdges(self) -> set:
+        '''edges of the collinear state, which has no triangles to journal'''
+        if not self.pending:
+            return set()
+        return {(min(a, b), max(a, b)) for a, b in self.edges()}
+
+    def _begin(self) -> set:
+        self.journal = []
+        return self._chainEdges()
+
+    def _finish(self, chain_before: set) -> MeshDiff:
+        '''MeshDiff of the journal: the triangles removed and created in total, and the chain edges'''
+        journal = self.journal
+        self.journal = None
+        count = {}
+        removed_centers = {}
+        added_centers = {}
+        for sign, key, center in journal:
+            count[key] = count.get(key, 0) + sign
+            if sign < 0:
+                removed_centers.setdefault(key, center)
+            else:
+                added_centers[key] = center
+        diff = MeshDiff()
+        removed_edges = set(chain_before)
+        added_edges = self._chainEdges()
+        for key, n in count.items():
+            if n < 0:
+                removed_edges.update(_keyEdges(key))
+                if key[0] != INF:
+                    diff.removed_voronoi[key] = removed_centers[key]
+            elif n > 0:
+                added_edges.update(_keyEdges(key))
+                if key[0] != INF:
+                    diff.added_voronoi[key] = added_centers[key]
+            elif key[0] != INF and key in removed_centers and removed_centers[key] != added_centers[key]:
+                # the same triangle with a moved vertex
+                diff.removed_voronoi[key] = removed_centers[key]
+                diff.added_voronoi[key] = added_centers[key]
+        diff.removed_edges = removed_edges - added_edges
+        diff.added_edges = added_edges - removed_edges
+        return diff
+
+    def _deleteVertex(self, v: int) -> None:
+        xs, ys = self.xs, self.ys
+        if self.pending:
+            self.pending.remove(v)
+            del self.pending_index[(xs[v], ys[v])]
+            return
+        V = self.vertices
+        N = self.neighbors
+        star = self.vertexStar(v)
+        # every star triangle rotated to (v, p, q): its link edge p -> q and the triangle beyond it
+        link = []
+        for t in star:
+            i = V.index(v, 3*t, 3*t + 3) - 3*t
+            link.append((V[3*t + (i + 1) % 3], V[3*t + (i + 2) % 3], N[3*t + i]))
+        self.vertex_triangle[v] = -1
+        ring = [p for p, _, _ in link]
+        if INF in ring:
+            # hull vertex: the link is a chain between its two hull neighbours
+            k = ring.index(INF)
+            created = self._fillHole(ring[k + 1:] + ring[:k], False)
+            if created is not None and all(c == INF for _, _, c in created) \
+                    and all(V[3*outer + 2] == INF for _, _, outer in link):
+                created = None      # no triangle would be left: the rest is collinear
+        else:
+            created = self._fillHole(ring, True)
+        if created is None:
+            self._rebuild([u for u, t in enumerate(self.vertex_triangle) if t >= 0])
+            return
+        for t in star:
+            self._removeTriangle(t)
+        triangles = [self._newTriangle(a, b, c) for a, b, c in created]
+        open_edges = {}
+        for t in triangles:
+            for k in range(3):
+                a = V[3*t + (k + 1) % 3]
+                b = V[3*t + (k + 2) % 3]
+                other = open_edges.pop((b, a), None)
+                if other is None:
+                    open_edges[(a, b)] = 3*t + k
+                else:
+                    N[3*t + k] = other // 3
+                    N[other] = t
+        # the link edges keep their orientation, they connect the hole to the rest
+        for p, q, outer in link:
+            slot = open_edges.pop((p, q))
+            N[slot] = outer
+            for j in range(3):
+                if V[3*outer + (j + 1) % 3] == q and V[3*outer + (j + 2) % 3] == p:
+                    N[3*outer + j] = slot // 3
+                    break
+        VT = self.vertex_triangle
+        for t in triangles:
+            for u in V[3*t:3*t + 3]:
+                if u != INF:
+                    VT[u] = t
+        self.last = triangles[0] if V[3*triangles[0] + 2] != INF else N[3*triangles[0] + 2]
+
+    def _fillHole(self, chain: list, closed: bool):
+        '''
+        Delaunay triangles of the hole of a removed vertex, by clipping ears
+        of its link: counter-clockwise corners whose circumcircle holds no
+        other link vertex. The link of a hull vertex is an open chain, what
+        is left of it when no ear remains is the new hull, closed by ghosts.
+
+        Returns:
+            list: vertex triples of the new triangles, None if no ear is found
+        '''
+        xs, ys = self.xs, self.ys
+        chain = list(chain)
+        created = []
+        while len(chain) > 3 or (not closed and len(chain) == 3):
+            count = len(chain)
+            for i in range(0 if closed else 1, count if closed else count - 1):
+                a, b, c = chain[i - 1], chain[i], chain[(i + 1) % count]
+                ax, ay, bx, by, cx, cy = xs[a], ys[a], xs[b], ys[b], xs[c], ys[c]
+                if orient(ax, ay, bx, by, cx, cy) <= 0:
+                    continue
+                if any(inCircle(ax, ay, bx, by, cx, cy, xs[u], ys[u]) > 0
+                       for u in chain if u != a and u != b and u != c):
+                    continue
+                created.append((a, b, c))
+                del chain[i]
+                break
+            else:
+                break
+        if closed:
+            if len(chain) != 3:
+                return None
+            a, b, c = chain
+            if orient(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c]) <= 0:
+                return None
+            created.append((a, b, c))
+        else:
+            # ghost (a, b, INF): the outside of hull edge a -> b is on its left
+            created.extend((a, b, INF) for a, b in zip(chain, chain[1:]))
+        return created
+
+    def _rebuild(self, vertices: list) -> None:
+        '''triangulates the vertices again from scratch, the old triangles are journaled as removed'''
+        for t, alive in enumerate(self.alive):
+            if alive:
+                self._removeTriangle(t)
+        self.vertices = []
+        self.neighbors = []
+        self.alive = []
+        self.free = []
+        self.vertex_triangle = [-1] * len(self.xs)
+        self.pending = []
+        self.pending_index = {}
+        self.last = -1
+        for u in vertices:
+            self._reinsertVertex(u)
+
+    def _reinsertVertex(self, v: int) -> None:
+        '''inserts an existing vertex index (removed before) on its current coordinates'''
+        if self.pending or not self.alive:
+            self._pendVertex(v)
+        else:
+            self._insertVertex(v, self._locate(self.xs[v], self.ys[v]))
+
+    def _shiftVertex(self, v: int, x, y) -> bool:
+        '''
+        Moves an inner vertex in place if its triangles stay counter-clockwise
+        and every edge around it stays locally Delaunay, so no edge changes.
+
+        Returns:
+            bool: True if moved, False if the mesh was left unchanged
+        '''
+        if self.pending:
+            return False
+        V = self.vertices
+        N = self.neighbors
+        xs, ys = self.xs, self.ys
+        star = self.vertexStar(v)
+        rotated = []
+        for t in star:
+            if V[3*t + 2] == INF:
+                return False        # a hull vertex can change the hull
+            i = V.index(v, 3*t, 3*t + 3) - 3*t
+            outer = N[3*t + i]
+            o = INF
+            if V[3*outer + 2] != INF:
+                o = sum(V[3*outer:3*outer + 3]) - V[3*t + (i + 1) % 3] - V[3*t + (i + 2) % 3]
+            rotated.append((t, V[3*t + (i + 1) % 3], V[3*t + (i + 2) % 3], o))
+        for j, (_, p, q, o) in enumerate(rotated):
+            r = rotated[(j + 1) % len(rotated)][2]
+            px, py, qx, qy = xs[p], ys[p], xs[q], ys[q]
+            if orient(x, y, px, py, qx, qy) <= 0:
+                return False
+            # the link edge p-q and the spoke v-q
+            if o != INF and inCircle(x, y, px, py, qx, qy, xs[o], ys[o]) > 0:
+                return False
+            if inCircle(x, y, px, py, qx, qy, xs[r], ys[r]) > 0:
+                return False
+        journal = self.journal
+        for t, _, _, _ in rotated:
+            journal.append((-1, triangleKey(*V[3*t:3*t + 3]), self._center(*V[3*t:3*t + 3])))
+        xs[v] = x
+        ys[v] = y
+        for t, _, _, _ in rotated:
+            journal.append((1, triangleKey(*V[3*t:3*t + 3]), self._center(*V[3*t:3*t + 3])))
+        return True
+
+
+def _keyEdges(key: tuple) -> list:
+    a, b, c = key
+    return [(min(s, e), max(s, e)) for s, e in ((a, b), (b, c), (c, a)) if s != INF and e != INF]
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    rng = random.Random(1)
+    mesh = DynamicTriangulation(seed=1)
+    vertices = mesh.insertPoints([(rng.random() * 1000, rng.random() * 1000) for _ in range(10_000)])
+    moves = 2000
+    start_time = time.perf_counter()
+    for _ in range(moves):
+        v = rng.choice(vertices)
+        mesh.moveVertex(v, mesh.xs[v] + rng.uniform(-3, 3), mesh.ys[v] + rng.uniform(-3, 3))
+    print(f"{moves} moves on 10000 sites: {(time.perf_counter() - start_time) / moves * 1e6:.0f} us per move")
+    start_time = time.perf_counter()
+    for v in vertices[:1000]:
+        mesh.removeVertex(v)
+    print(f"1000 removals: {(time.perf_counter() - start_time) * 1e3:.0f} us per removal")
+    start_time = time.perf_counter()
+    for _ in range(1000):
+        mesh.insertVertex(rng.random() * 1000, rng.random() * 1000)
+    print(f"1000 insertions: {(time.perf_counter() - start_time) * 1e3:.0f} us per insertion")
+    rebuilt = Triangulation(seed=1)
+    live = [u for u in range(mesh.vertexCount()) if mesh.hasVertex(u)]
+    indices = rebuilt.insertPoints([mesh.point(u) for u in live])
+    vertex = {index: u for index, u in zip(indices, live)}
+    rebuilt_edges = {tuple(sorted((vertex[a], vertex[b]))) for a, b in rebuilt.edges()}
+    print("same as a rebuild:", rebuilt_edges == {tuple(sorted(edge)) for edge in mesh.edges()})
@@ -1,6 +1,7 @@
 # random number and coordinate generators
 
-import random
+import numpy as np
+
 
 class NodeGeneratorBase():
     def __init__(self):
@@ -11,39 +12,45 @@ class NodeGeneratorBase():
 
 
 class RandomCoords(NodeGeneratorBase):
-    '''random coordinates inside one big region'''
+    '''
+    Random integer coordinates inside one big region, drawn in one
+    vectorized call from the generator's own numpy random Generator.
+    The same seed gives the same coordinates, the global random
+    states (random, numpy.random) are not used.
+    '''
 
     def __init__(self, num: int = 2) -> None:
         self.num = num
         self.seed = None
+        self.rng = np.random.default_rng()
 
     def setCoordNumber(self, num: int) -> None:
         self.num = num
 
     def setSeed(self, seed: int) -> None:
+        '''restarts the generator's own random number sequence, None: unpredictable'''
         self.seed = seed
+        self.rng = np.random.default_rng(seed)
 
-    def generate(self, min: tuple, max: tuple) -> list:
+    def generate(self, min: tuple, max: tuple) -> np.ndarray:
         '''
-        simple random numbers from the whole region
-        min: coordinates of top left corner
-        max: coordinates of bottom right corner
+        Uniform random coordinates from the whole region, borders included.
+
+        Args:
+            min (tuple): coordinates of top left corner
+            max (tuple): coordinates of bottom right corner
+
+        Returns:
+            np.ndarray: (num, 2) int64 array of x, y coordinates
         '''
-        result = []
-        random.seed(self.seed)
-        for _ in range(self.num):
-            x = random.randint(min[0], max[0])
-            y = random.randint(min[1], max[1])
-            result.append((x,y))
-        random.seed(None)
-        return result
+        return self.rng.integers(min, np.asarray(max) + 1, size=(self.num, 2))
 
 
 class RandomRegionCoords(RandomCoords):
     '''
-    Extends the random coordinate generator.
-    The regionNum variables sets the number of regions.
-    The whole area should be divided.
+    Stratified random coordinates: the whole area is divided into
+    regionNumX * regionNumY regions and num coordinates are drawn in
+    each of them, all in one vectorized call.
     '''
 
     def __init__(self, num: int = 2, regionNumX: int = 2, regionNumY: int = 2) -> None:
@@ -55,34 +62,225 @@ class RandomRegionCoords(RandomCoords):
         self.regionNumX = regionNumX
         self.regionNumY = regionNumY
 
-    def generate(self, min: tuple, max: tuple) -> list:
+    def generate(self, min: tuple, max: tuple) -> np.ndarray:
         '''
-        Simple random coordinates by region.
+        Random coordinates by region, region by region (x major, y minor order).
 
         Args:
             min (tuple): coordinates of top left corner of whole area
             max (tuple): coordinates of bottom right corner of whole area
+
+        Returns:
+            np.ndarray: (regionNumX * regionNumY * num, 2) int64 array of x, y coordinates
+        '''
+        offsetX = (max[0] - min[0]) // self.regionNumX
+        offsetY = (max[1] - min[1]) // self.regionNumY
+        region_x, region_y = np.meshgrid(np.arange(self.regionNumX), np.arange(self.regionNumY),
+                                         indexing='ij')
+        # top left corner of the region of every coordinate
+        corners = np.stack((min[0] + region_x.ravel() * offsetX,
+                            min[1] + region_y.ravel() * offsetY), axis=1)
+        corners = np.repeat(corners, self.num, axis=0)
+        return corners + self.rng.integers(0, (offsetX + 1, offsetY + 1), size=corners.shape)
+
+
+
+class PoissonDiskCoords(RandomCoords):
+    '''
+    Blue noise (Poisson disk) coordinates: no two are closer than radius,
+    and they are spread evenly without grid artifacts.
+    Uses Bridson's background grid with r/sqrt(2) cells (at most one
+    coordinate per cell, 20 neighbour cells to check), but instead of
+    growing from an active list the darts are thrown into every empty
+    cell of a phase group at once (cells 3 apart can not conflict), so
+    one vectorized step serves a ninth of the grid. Every empty cell
+    gets tries darts, O(cells * tries) in total; with the default 10
+    the sampling is nearly maximal, 1M coordinates take a few seconds.
+    '''
+
+    # coordinates per radius^2 area with 10 tries, measured
+    density = 0.64
+
+    def __init__(self, num: int = 2, radius: float = None, tries: int = 10) -> None:
+        '''radius: minimal distance, None: chosen so that about num coordinates fit'''
+        super().__init__(num)
+        self.radius = radius
+        self.tries = tries
+
+    def generate(self, min: tuple, max: tuple) -> np.ndarray:
+        '''
+        Poisson disk coordinates in the area, about num of them unless radius is set.
+
+        Args:
+            min (tuple): coordinates of top left corner
+            max (tuple): coordinates of bottom right corner
+
+        Returns:
+            np.ndarray: (n, 2) float64 array of x, y coordinates, in grid cell order
         '''
-        offsetX = max[0] // self.regionNumX
-        offsetY = max[1] // self.regionNumY
-
-        regionMinX = min[0]
-        regionMaxX = regionMinX + offsetX
-        regionMinY = min[1]
-        regionMaxY = regionMinY + offsetY
-
-        result = []
-        self.num = 1
-        for _ in range(self.regionNumX):    # calculates region border corner coordinates
-            for _ in range(self.regionNumY):# and generates new node coordinate with parent method
-                coord = super().generate((regionMinX, regionMinY),
-                                          (regionMaxX, regionMaxY))
-                result.append(coord[0])
-                regionMinY += offsetY   # shifts region y coords
-                regionMaxY += offsetY
-            regionMinY = 0              # resets region y coords
-            regionMaxY = 0 + offsetY            
-            regionMinX += offsetX       # shifts region x coords
-            regionMaxX += offsetX
-            
+        return np.asarray(min) + self.sample(max[0] - min[0], max[1] - min[1])
+
+    def sample(self, width: float, height: float) -> np.ndarray:
+        '''Poisson disk coordinates in the (0, 0, width, height) area'''
+        radius = self.radius
+        if radius is None:
+            radius = np.sqrt(self.density * width * height / max(self.num, 1))
+        cell = radius / np.sqrt(2)
+        columns = max(1, int(np.ceil(width / cell)))
+        rows = max(1, int(np.ceil(height / cell)))
+        # padded by 2 cells, so the neighbours of every cell are inside; flat arrays
+        stride = columns + 4
+        grid_x = np.full((rows + 4) * stride, np.nan)
+        grid_y = np.full((rows + 4) * stride, np.nan)
+        row_index, column_index = np.divmod(np.arange(rows * columns), columns)
+        # closest neighbour cells first, most candidates are rejected by them
+        neighbours = sorted(((dy, dx) for dy in range(-2, 3) for dx in range(-2, 3)
+                             if (dy, dx) != (0, 0) and abs(dy) + abs(dx) < 4),
+                            key=lambda offset: offset[0] ** 2 + offset[1] ** 2)
+        neighbours = [dy * stride + dx for dy, dx in neighbours]
+        phases = [np.flatnonzero((row_index % 3 == phase_y) & (column_index % 3 == phase_x))
+                  for phase_y in range(3) for phase_x in range(3)]
+        for _ in range(self.tries):
+            for phase, cells in enumerate(phases):
+                if len(cells) == 0:
+                    continue
+                x = (column_index[cells] + self.rng.random(len(cells))) * cell
+                y = (row_index[cells] + self.rng.random(len(cells))) * cell
+                inside = (x <= width) & (y <= height)
+                candidates = np.flatnonzero(inside)
+                slots = (row_index[cells[candidates]] + 2) * stride + column_index[cells[candidates]] + 2
+                for offset in neighbours:
+                    near_x = grid_x[slots + offset]
+                    near_y = grid_y[slots + offset]
+                    cx = x[candidates]
+                    cy = y[candidates]
+                    # nan (empty cell) compares False
+                    keep = ~((near_x - cx) ** 2 + (near_y - cy) ** 2 < radius * radius)
+                    candidates = candidates[keep]
+                    slots = slots[keep]
+                grid_x[slots] = x[candidates]
+                grid_y[slots] = y[candidates]
+                accepted = np.zeros(len(cells), dtype=bool)
+                accepted[candidates] = True
+                phases[phase] = cells[~accepted]    # filled cells are not tried again
+        filled = ~np.isnan(grid_x)
+        return np.stack((grid_x[filled], grid_y[filled]), axis=1)
+
+
+class HaltonCoords(RandomCoords):
+    '''
+    Halton low-discrepancy sequence (bases 2 and 3): the coordinates
+    cover the area evenly for any num, without a minimal distance.
+    The seed shifts the sequence (Cranley-Patterson rotation).
+    '''
+
+    @staticmethod
+    def radicalInverse(indices: np.ndarray, base: int) -> np.ndarray:
+        '''digits of the indices in base, mirrored to the other side of the point'''
+        result = np.zeros(len(indices))
+        remaining = indices.copy()
+        scale = 1.0 / base
+        while remaining.any():
+            remaining, digit = np.divmod(remaining, base)
+            result += digit * scale
+            scale /= base
         return result
+
+    def generate(self, min: tuple, max: tuple) -> np.ndarray:
+        '''
+        num Halton coordinates in the area.
+
+        Args:
+            min (tuple): coordinates of top left corner
+            max (tuple): coordinates of bottom right corner
+
+        Returns:
+            np.ndarray: (num, 2) float64 array of x, y coordinates
+        '''
+        indices = np.arange(1, self.num + 1)
+        unit = np.stack((self.radicalInverse(indices, 2), self.radicalInverse(indices, 3)), axis=1)
+        unit = (unit + self.rng.random(2)) % 1.0
+        return np.asarray(min) + unit * (np.asarray(max) - np.asarray(min))
+
+
+class SobolCoords(RandomCoords):
+    '''
+    2D Sobol low-discrepancy sequence: every power of two sized block of
+    it is a (0, m, 2)-net, evenly stratified in every direction.
+    The seed scrambles it with a random digital shift, keeping the nets.
+    '''
+
+    bits = 32
+
+    @classmethod
+    def directions(cls) -> np.ndarray:
+        '''direction numbers of the two dimensions: van der Corput and polynomial x + 1'''
+        first = np.array([1 << (cls.bits - 1 - k) for k in range(cls.bits)], dtype=np.uint64)
+        second = np.empty(cls.bits, dtype=np.uint64)
+        second[0] = 1 << (cls.bits - 1)
+        for k in range(1, cls.bits):
+            second[k] = second[k - 1] ^ (second[k - 1] >> np.uint64(1))
+        return np.stack((first, second))
+
+    def generate(self, min: tuple, max: tuple) -> np.ndarray:
+        '''
+        num Sobol coordinates in the area.
+
+        Args:
+            min (tuple): coordinates of top left corner
+            max (tuple): coordinates of bottom right corner
+
+        Returns:
+            np.ndarray: (num, 2) float64 array of x, y coordinates
+        '''
+        indices = np.arange(self.num, dtype=np.uint64)
+        directions = self.directions()
+        values = np.zeros((self.num, 2), dtype=np.uint64)
+        for k in range(self.bits):
+            has_bit = ((indices >> np.uint64(k)) & np.uint64(1)).astype(bool)
+            values[has_bit] ^= directions[:, k]
+        values ^= self.rng.integers(0, 1 << self.bits, size=2, dtype=np.uint64)
+        unit = values / float(1 << self.bits)
+        return np.asarray(min) + unit * (np.asarray(max) - np.asarray(min))
+
+
+class JitteredGridCoords(RandomCoords):
+    '''
+    Jittered (stratified) grid: the area is divided into about num
+    nearly square cells and one uniform random coordinate is drawn in each.
+    '''
+
+    def generate(self, min: tuple, max: tuple) -> np.ndarray:
+        '''
+        One coordinate per grid cell, row by row.
+
+        Args:
+            min (tuple): coordinates of top left corner
+            max (tuple): coordinates of bottom right corner
+
+        Returns:
+            np.ndarray: (columns * rows, 2) float64 array of x, y coordinates
+        '''
+        return np.asarray(min) + self.sample(max[0] - min[0], max[1] - min[1])
+
+    def sample(self, width: float, height: float) -> np.ndarray:
+        '''jittered grid coordinates in the (0, 0, width, height) area'''
+        columns = max(1, round(np.sqrt(self.num * width / height)))
+        rows = max(1, round(self.num / columns))
+        row_index, column_index = np.divmod(np.arange(rows * columns), columns)
+        jitter = self.rng.random((rows * columns, 2))
+        return np.stack(((column_index + jitter[:, 0]) * width / columns,
+                         (row_index + jitter[:, 1]) * height / rows), axis=1)
+
+if __name__ == "__main__":
+    import time
+
+    region_coords = RandomRegionCoords(3, 2, 2)
+    region_coords.setSeed(1)
+    print(region_coords.generate((0, 0), (100, 100)).tolist())
+    for generator_class in (RandomCoords, PoissonDiskCoords, HaltonCoords, SobolCoords, JitteredGridCoords):
+        coords = generator_class(1_000_000)
+        coords.setSeed(1)
+        start_time = time.perf_counter()
+        result = coords.generate((0, 0), (1024, 768))
+        print(f"{generator_class.__name__}: {len(result)} coordinates in {time.perf_counter() - start_time:.3f} s")
@@ -0,0 +1,156 @@
+# streaming point input from CSV and .npy files, in fixed size chunks
+
+import itertools
+import os
+
+import numpy as np
+
+from utilities.triangulation import Triangulation
+
+
+def readPointChunks(path: str, chunk_size: int = 1_000_000, columns: tuple = (0, 1),
+                    delimiter: str = ','):
+    '''
+    Generator method, reads the x, y coordinates of a CSV or .npy file
+    chunk by chunk. Only one chunk (of text lines) is in memory at a time:
+    text is parsed chunk_size lines at once, .npy files are memory mapped.
+    A first CSV line that is not numeric is taken as header and skipped,
+    rows with missing or non finite coordinates are dropped.
+
+    Args:
+        path (str): .npy file of an (n, k) array, anything else is read as text
+        chunk_size (int): points per chunk
+        columns (tuple): column indices of the x and y coordinates
+        delimiter (str): CSV field separator, None: whitespace
+
+    Yields:
+        np.ndarray: (m, 2) float64 array of x, y coordinates, m <= chunk_size
+    '''
+    if os.path.splitext(path)[1].lower() == '.npy':
+        data = np.load(path, mmap_mode='r')
+        if data.ndim != 2:
+            raise ValueError(f"{path}: expected an (n, k) array, got shape {data.shape}")
+        for start in range(0, len(data), chunk_size):
+            chunk = np.asarray(data[start:start + chunk_size, list(columns)], dtype=np.float64)
+            yield chunk[np.isfinite(chunk).all(axis=1)]
+        return
+    with open(path) as file:
+        first = True
+        while True:
+            lines = list(itertools.islice(file, chunk_size))
+            if not lines:
+                return
+            if first:
+                first = False
+                if not _isNumeric(lines[0], columns, delimiter):
+                    lines = lines[1:]
+            if not lines:
+                continue
+            try:
+                chunk = np.loadtxt(lines, delimiter=delimiter, usecols=columns, ndmin=2)
+            except ValueError:
+                # malformed rows: the slower parser that can skip them
+                chunk = np.genfromtxt(lines, delimiter=delimiter, usecols=columns,
+                                      invalid_raise=False, ndmin=2)
+            yield chunk[np.isfinite(chunk).all(axis=1)]
+
+
+def _isNumeric(line: str, columns: tuple, delimiter: str) -> bool:
+    fields = line.split(delimiter)
+    try:
+        for column in columns:
+            float(fields[column])
+    except (IndexError, ValueError):
+        return False
+    return True
+
+
+class PointDeduplicator:
+    '''
+    Drops coincident points from a stream of coordinate chunks. The points
+    seen so far are kept as one sorted complex array (x + iy, 16 bytes per
+    point), a chunk is checked against it by binary search and merged in.
+    Nodes on the same coordinates would compare equal (Node.__eq__) and
+    make degenerate triangles, so they are removed before both.
+    '''
+
+    def __init__(self) -> None:
+        self.seen = np.empty(0, dtype=np.complex128)
+        self.dropped = 0
+
+    def filter(self, chunk: np.ndarray) -> np.ndarray:
+        '''
+        Args:
+            chunk (np.ndarray): (m, 2) float64 array of x, y coordinates
+
+        Returns:
+            np.ndarray: the points not seen before, first occurrences in chunk order
+        '''
+        keys = np.ascontiguousarray(chunk, dtype=np.float64).view(np.complex128).ravel()
+        keys = keys + 0.0       # -0.0 and 0.0 are the same coordinate
+        _, first = np.unique(keys, return_index=True)
+        first.sort()
+        if len(self.seen):
+            position = np.searchsorted(self.seen, keys[first]).clip(max=len(self.seen) - 1)
+            first = first[self.seen[position] != keys[first]]
+        self.dropped += len(chunk) - len(first)
+        # the merge of two sorted runs is linear with a stable sort
+        self.seen = np.sort(np.concatenate((self.seen, np.sort(keys[first]))), kind='stable')
+        return np.ascontiguousarray(chunk[first])
+
+
+def readUniquePoints(path: str, chunk_size: int = 1_000_000, **options):
+    '''generator method, readPointChunks without the coincident points'''
+    deduplicator = PointDeduplicator()
+    for chunk in readPointChunks(path, chunk_size, **options):
+        yield deduplicator.filter(chunk)
+
+
+def triangulateFile(path: str, chunk_size: int = 1_000_000, triangulation: Triangulation = None,
+                    progress=None, **options) -> Triangulation:
+    '''
+    Streams the points of a file into a triangulation, one chunk per insertPoints batch.
+
+    Args:
+        path (str): CSV or .npy file, see readPointChunks
+        chunk_size (int): points per batch
+        triangulation (Triangulation): extended with the points, a new one if None
+        progress (callable): optional, called as progress(points inserted so far)
+        options: columns, delimiter of readPointChunks
+
+    Returns:
+        Triangulation: vertex i is the i-th unique point of the file
+    '''
+    if triangulation is None:
+        triangulation = Triangulation()
+    inserted = 0
+    for chunk in readUniquePoints(path, chunk_size, **options):
+        triangulation.insertPoints(chunk.tolist())
+        inserted += len(chunk)
+        if progress is not None:
+            progress(inserted)
+    return triangulation
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    directory = tempfile.mkdtemp()
+    rng = np.random.default_rng(1)
+    points = rng.integers(0, 1000, size=(200_000, 2)).astype(np.float64)   # with duplicates
+    csv_path = os.path.join(directory, "points.csv")
+    with open(csv_path, 'w') as file:
+        file.write("x,y\n")
+        file.writelines(f"{x},{y}\n" for x, y in points.tolist())
+    npy_path = os.path.join(directory, "points.npy")
+    np.save(npy_path, points)
+    expected = len(np.unique(points, axis=0))
+    for path in (csv_path, npy_path):
+        start_time = time.perf_counter()
+        unique = np.concatenate(list(readUniquePoints(path, chunk_size=30_000)))
+        print(f"{os.path.basename(path)}: {len(unique)} unique points of {len(points)} "
+              f"(expected {expected}) in {time.perf_counter() - start_time:.3f} s")
+    start_time = time.perf_counter()
+    tri = triangulateFile(npy_path, chunk_size=50_000)
+    print(f"triangulated {tri.vertexCount()} vertices in {time.perf_counter() - start_time:.3f} s")
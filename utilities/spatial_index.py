@@ -0,0 +1,415 @@
+# spatial index for nearest neighbour, radius and rectangle queries on nodes
+
+import heapq
+import math
+
+import numpy as np
+
+
+class SpatialGrid:
+    '''
+    Bucketed uniform grid over item coordinates.
+    Items are anything with x() and y() (Node, CSRNode), identified by
+    the key function (object id by default). A query only visits the
+    cells around the query point, so with evenly spread items it costs
+    O(1 + k) instead of a scan over every item. Moved items are
+    updated in place with move().
+    '''
+
+    def __init__(self, cell_size: float = None, key=id) -> None:
+        self.cell_size = cell_size
+        self.key = key
+        self.cells = {}         # (cell x, cell y) -> list of items
+        self.positions = {}     # item key -> (x, y, cell)
+        self.min_cell = None
+        self.max_cell = None
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def build(self, items, per_cell: float = 2.0) -> None:
+        '''
+        Clears the grid and inserts the items. Without a fixed cell size
+        it is chosen to hold about per_cell items per cell.
+        '''
+        items = list(items)
+        self.cells = {}
+        self.positions = {}
+        self.min_cell = None
+        self.max_cell = None
+        if items and self.cell_size is None:
+            xs = [item.x() for item in items]
+            ys = [item.y() for item in items]
+            area = (max(xs) - min(xs) or 1) * (max(ys) - min(ys) or 1)
+            self.cell_size = math.sqrt(area * per_cell / len(items))
+        for item in items:
+            self.insert(item)
+
+    def cellOf(self, x, y) -> tuple:
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, item) -> None:
+        if self.cell_size is None:
+            self.cell_size = 16.0
+        x, y = item.x(), item.y()
+        cell = self.cellOf(x, y)
+        self.cells.setdefault(cell, []).append(item)
+        self.positions[self.key(item)] = (x, y, cell)
+        if self.min_cell is None:
+            self.min_cell = list(cell)
+            self.max_cell = list(cell)
+        else:
+            self.min_cell[0] = min(self.min_cell[0], cell[0])
+            self.min_cell[1] = min(self.min_cell[1], cell[1])
+            self.max_cell[0] = max(self.max_cell[0], cell[0])
+            self.max_cell[1] = max(self.max_cell[1], cell[1])
+
+    def remove(self, item) -> None:
+        key = self.key(item)
+        _, _, cell = self.positions.pop(key)
+        bucket = self.cells[cell]
+        for i, other in enumerate(bucket):
+            if self.key(other) == key:
+                bucket[i] = bucket[-1]
+                bucket.pop()
+                break
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, item, x, y) -> None:
+        '''updates the item's position, call after the item itself was moved to (x, y)'''
+        key = self.key(item)
+        _, _, cell = self.positions[key]
+        if self.cellOf(x, y) == cell:
+            self.positions[key] = (x, y, cell)
+        else:
+            self.remove(item)
+            self.insert(item)
+
+    def position(self, item) -> tuple:
+        x, y, _ = self.positions[self.key(item)]
+        return x, y
+
+    def nearest(self, x, y, k: int = 1, exclude=None) -> list:
+        '''
+        The k closest items to (x, y), closest first.
+
+        Args:
+            x, y: query point
+            k (int): number of items
+            exclude: an item to skip (eg.: the query node itself)
+
+        Returns:
+            list: (distance, item) pairs
+        '''
+        if not self.positions or k <= 0:
+            return []
+        exclude_key = self.key(exclude) if exclude is not None else None
+        positions = self.positions
+        key = self.key
+        cx, cy = self.cellOf(x, y)
+        heap = []       # max-heap of the k best: (-squared distance, tie breaker, item)
+        counter = 0
+        max_ring = max(abs(cx - self.min_cell[0]), abs(cx - self.max_cell[0]),
+                       abs(cy - self.min_cell[1]), abs(cy - self.max_cell[1]))
+        # rings closer than the occupied cells are empty, eg.: a query far outside the items
+        ring = max(self.min_cell[0] - cx, cx - self.max_cell[0],
+                   self.min_cell[1] - cy, cy - self.max_cell[1], 0)
+        while ring <= max_ring:
+            for cell in self._ring(cx, cy, ring):
+                for item in self.cells.get(cell, ()):
+                    item_key = key(item)
+                    if item_key == exclude_key:
+                        continue
+                    ix, iy, _ = positions[item_key]
+                    d2 = (ix - x) * (ix - x) + (iy - y) * (iy - y)
+                    counter += 1
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d2, counter, item))
+                    elif d2 < -heap[0][0]:
+                        heapq.heapreplace(heap, (-d2, counter, item))
+            if len(heap) == k:
+                # every unvisited cell is farther than ring * cell_size
+                reach = ring * self.cell_size
+                if -heap[0][0] <= reach * reach:
+                    break
+            ring += 1
+        return [(math.sqrt(-d2), item) for d2, _, item in sorted(heap, reverse=True)]
+
+    def _ring(self, cx: int, cy: int, ring: int):
+        '''generator method, occupied-range cells at chebyshev distance ring from (cx, cy)'''
+        (min_x, min_y), (max_x, max_y) = self.min_cell, self.max_cell
+        if ring == 0:
+            yield cx, cy
+            return
+        x0, x1 = max(cx - ring, min_x), min(cx + ring, max_x)
+        for y in (cy - ring, cy + ring):
+            if min_y <= y <= max_y:
+                for x in range(x0, x1 + 1):
+                    yield x, y
+        y0, y1 = max(cy - ring + 1, min_y), min(cy + ring - 1, max_y)
+        for x in (cx - ring, cx + ring):
+            if min_x <= x <= max_x:
+                for y in range(y0, y1 + 1):
+                    yield x, y
+
+    def inRect(self, x0, y0, x1, y1) -> list:
+        '''items inside the rectangle, borders included'''
+        result = []
+        positions = self.positions
+        key = self.key
+        cx0, cy0 = self.cellOf(x0, y0)
+        cx1, cy1 = self.cellOf(x1, y1)
+        if self.positions:
+            # only the occupied part of the grid
+            cx0 = max(cx0, self.min_cell[0])
+            cy0 = max(cy0, self.min_cell[1])
+            cx1 = min(cx1, self.max_cell[0])
+            cy1 = min(cy1, self.max_cell[1])
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            cells = [cell for cell in self.cells
+                     if cx0 <= cell[0] <= cx1 and cy0 <= cell[1] <= cy1]
+        else:
+            cells = [(i, j) for i in range(cx0, cx1 + 1) for j in range(cy0, cy1 + 1)]
+        for cell in cells:
+            for item in self.cells.get(cell, ()):
+                ix, iy, _ = positions[key(item)]
+                if x0 <= ix <= x1 and y0 <= iy <= y1:
+                    result.append(item)
+        return result
+
+    def countInRect(self, x0, y0, x1, y1, limit: int = None) -> int:
+        '''
+        Number of items inside the rectangle, borders included. Cells that
+        lie wholly inside count with their bucket size, only the items of
+        the border cells are checked. Stops early once the count is over limit.
+        '''
+        if not self.positions:
+            return 0
+        positions = self.positions
+        key = self.key
+        size = self.cell_size
+        cx0, cy0 = self.cellOf(x0, y0)
+        cx1, cy1 = self.cellOf(x1, y1)
+        cx0 = max(cx0, self.min_cell[0])
+        cy0 = max(cy0, self.min_cell[1])
+        cx1 = min(cx1, self.max_cell[0])
+        cy1 = min(cy1, self.max_cell[1])
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            cells = [cell for cell in self.cells
+                     if cx0 <= cell[0] <= cx1 and cy0 <= cell[1] <= cy1]
+        else:
+            cells = [(i, j) for i in range(cx0, cx1 + 1) for j in range(cy0, cy1 + 1)]
+        count = 0
+        for cell in cells:
+            bucket = self.cells.get(cell)
+            if not bucket:
+                continue
+            i, j = cell
+            if x0 <= i * size and (i + 1) * size < x1 and y0 <= j * size and (j + 1) * size < y1:
+                count += len(bucket)
+            else:
+                for item in bucket:
+                    ix, iy, _ = positions[key(item)]
+                    if x0 <= ix <= x1 and y0 <= iy <= y1:
+                        count += 1
+            if limit is not None and count > limit:
+                break
+        return count
+
+    def withinRadius(self, x, y, radius) -> list:
+        '''items not farther from (x, y) than radius'''
+        r2 = radius * radius
+        positions = self.positions
+        key = self.key
+        result = []
+        for item in self.inRect(x - radius, y - radius, x + radius, y + radius):
+            ix, iy, _ = positions[key(item)]
+            if (ix - x) * (ix - x) + (iy - y) * (iy - y) <= r2:
+                result.append(item)
+        return result
+
+
+class SegmentGrid:
+    '''
+    Uniform grid over line segments (edges with n1() and n2() endpoints).
+    A segment is listed in every cell its bounding box overlaps, a
+    rectangle query visits only the cells under the rectangle, so its
+    cost depends on the segments near the rectangle, not on their total
+    number. Segments longer than max_cells cells are kept in a separate
+    list that every query checks.
+    '''
+
+    def __init__(self, cell_size: float = 16.0, key=id, max_cells: int = 64) -> None:
+        self.cell_size = cell_size
+        self.key = key
+        self.max_cells = max_cells
+        self.cells = {}         # (cell x, cell y) -> {segment key: segment}
+        self.long = {}          # segment key -> segment
+        self.boxes = {}         # segment key -> (x0, y0, x1, y1)
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def build(self, segments, cell_size: float = None) -> None:
+        '''clears the grid and inserts the segments'''
+        if cell_size is not None:
+            self.cell_size = cell_size
+        self.cells = {}
+        self.long = {}
+        self.boxes = {}
+        for segment in segments:
+            self.insert(segment)
+
+    def _cellRange(self, x0, y0, x1, y1) -> tuple:
+        size = self.cell_size
+        return int(x0 // size), int(y0 // size), int(x1 // size), int(y1 // size)
+
+    def insert(self, segment) -> None:
+        n1, n2 = segment.n1(), segment.n2()
+        x0, x1 = sorted((n1.x(), n2.x()))
+        y0, y1 = sorted((n1.y(), n2.y()))
+        key = self.key(segment)
+        self.boxes[key] = (x0, y0, x1, y1)
+        cx0, cy0, cx1, cy1 = self._cellRange(x0, y0, x1, y1)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > self.max_cells:
+            self.long[key] = segment
+            return
+        for i in range(cx0, cx1 + 1):
+            for j in range(cy0, cy1 + 1):
+                self.cells.setdefault((i, j), {})[key] = segment
+
+    def remove(self, segment) -> None:
+        key = self.key(segment)
+        box = self.boxes.pop(key)
+        if self.long.pop(key, None) is not None:
+            return
+        cx0, cy0, cx1, cy1 = self._cellRange(*box)
+        for i in range(cx0, cx1 + 1):
+            for j in range(cy0, cy1 + 1):
+                bucket = self.cells[(i, j)]
+                del bucket[key]
+                if not bucket:
+                    del self.cells[(i, j)]
+
+    def update(self, segment) -> None:
+        '''call after an endpoint of the segment was moved'''
+        self.remove(segment)
+        self.insert(segment)
+
+    def inRect(self, x0, y0, x1, y1) -> list:
+        '''segments whose bounding box intersects the rectangle'''
+        boxes = self.boxes
+        key = self.key
+        found = {}
+        cx0, cy0, cx1, cy1 = self._cellRange(x0, y0, x1, y1)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            buckets = [bucket for cell, bucket in self.cells.items()
+                       if cx0 <= cell[0] <= cx1 and cy0 <= cell[1] <= cy1]
+        else:
+            buckets = [self.cells[(i, j)] for i in range(cx0, cx1 + 1) for j in range(cy0, cy1 + 1)
+                       if (i, j) in self.cells]
+        buckets.append(self.long)
+        for bucket in buckets:
+            found.update(bucket)
+        result = []
+        for segment_key, segment in found.items():
+            bx0, by0, bx1, by1 = boxes[segment_key]
+            if bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1:
+                result.append(segment)
+        return result
+
+
+def knnPairs(xs, ys, k: int, mutual: bool = False, chunk_entries: int = 1 << 22) -> tuple:
+    '''
+    k-nearest-neighbour graph of a point set, vectorized over a uniform grid.
+    Points are bucketed into cells holding about k/2 points, each point's
+    candidates are the points of the surrounding cells (the block grows
+    only for the points whose k-th neighbour might lie outside it), and
+    the k closest are selected with numpy's partial sort.
+
+    Args:
+        xs, ys: point coordinates (sequences or arrays)
+        k (int): number of neighbours per point
+        mutual (bool): keep only pairs that are in each other's k nearest,
+                       otherwise a pair is kept if either side selected it
+        chunk_entries (int): candidate matrix size limit, bounds the memory use
+
+    Returns:
+        tuple: two int64 arrays (u, v) of undirected point index pairs, u < v, no repeats
+    '''
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    n = len(xs)
+    if n < 2 or k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    k = min(k, n - 1)
+    min_x, min_y = xs.min(), ys.min()
+    area = max(xs.max() - min_x, 1e-9) * max(ys.max() - min_y, 1e-9)
+    cell_size = max(np.sqrt(area * max(k / 2, 1) / n), 1e-9)
+    cx = ((xs - min_x) / cell_size).astype(np.int64)
+    cy = ((ys - min_y) / cell_size).astype(np.int64)
+    width = int(cx.max()) + 1
+    height = int(cy.max()) + 1
+    # work on the points sorted by cell: a cell is a contiguous range
+    order = np.argsort(cy * width + cx, kind='stable')
+    sx, sy = xs[order], ys[order]
+    cx, cy = cx[order], cy[order]
+    counts = np.bincount(cy * width + cx, minlength=width * height)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    neighbours = np.full((n, k), -1, dtype=np.int64)
+
+    pending = np.arange(n)
+    ring = 1
+    while pending.size:
+        block = np.arange(-ring, ring + 1)
+        offset_x = np.repeat(block, len(block))
+        offset_y = np.tile(block, len(block))
+        # the block reaches the whole grid: the candidates are complete
+        complete = ring >= max(width, height)
+        unfinished = []
+        step = max(1, chunk_entries // (len(offset_x) * int(counts.max())))
+        for first in range(0, pending.size, step):
+            points = pending[first:first + step]
+            ncx = cx[points, None] + offset_x
+            ncy = cy[points, None] + offset_y
+            valid = (ncx >= 0) & (ncx < width) & (ncy >= 0) & (ncy < height)
+            ncell = np.where(valid, ncy * width + ncx, 0)
+            ncount = np.where(valid, counts[ncell], 0)
+            slot = np.arange(int(ncount.max()))
+            # candidate matrix: every slot of every neighbouring cell
+            inside = slot < ncount[:, :, None]
+            candidates = np.where(inside, starts[ncell][:, :, None] + slot, -1)
+            candidates = candidates.reshape(len(points), -1)
+            dx = sx[candidates] - sx[points, None]
+            dy = sy[candidates] - sy[points, None]
+            d2 = dx * dx + dy * dy
+            d2[(candidates < 0) | (candidates == points[:, None])] = np.inf
+            if d2.shape[1] > k:
+                best = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            else:
+                best = np.broadcast_to(np.arange(d2.shape[1]), (len(points), d2.shape[1]))
+            best_d2 = np.take_along_axis(d2, best, axis=1)
+            best_idx = np.take_along_axis(candidates, best, axis=1)
+            if best_d2.shape[1] == k:
+                kth = best_d2.max(axis=1)
+            else:
+                kth = np.full(len(points), np.inf)
+            done = complete | (kth <= (ring * cell_size) ** 2)
+            found = points[done]
+            neighbours[found, :best_d2.shape[1]] = np.where(np.isfinite(best_d2[done]),
+                                                            best_idx[done], -1)
+            unfinished.append(points[~done])
+        pending = np.concatenate(unfinished)
+        ring *= 2
+
+    source = np.repeat(np.arange(n), k)
+    target = neighbours.ravel()
+    keep = target >= 0
+    source, target = order[source[keep]], order[target[keep]]
+    low = np.minimum(source, target)
+    high = np.maximum(source, target)
+    pair_keys, pair_counts = np.unique(low * n + high, return_counts=True)
+    if mutual:
+        pair_keys = pair_keys[pair_counts == 2]
+    return pair_keys // n, pair_keys % n
@@ -0,0 +1,481 @@
+# incremental delaunay triangulation on an adjacency linked triangle mesh
+
+import random
+
+INF = -1    # vertex at infinity, ghost triangles (a, b, INF) close the convex hull
+
+
+def orient(ax, ay, bx, by, cx, cy):
+    '''Twice the signed area of a-b-c, positive if it turns left (counter-clockwise).'''
+    return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+
+
+def inCircle(ax, ay, bx, by, cx, cy, px, py):
+    '''Positive if p lies inside the circumcircle of the counter-clockwise triangle a-b-c.'''
+    adx = ax - px
+    ady = ay - py
+    bdx = bx - px
+    bdy = by - py
+    cdx = cx - px
+    cdy = cy - py
+    return (adx * adx + ady * ady) * (bdx * cdy - cdx * bdy) + \
+           (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy) + \
+           (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady)
+
+
+def circumcircle(ax, ay, bx, by, cx, cy) -> tuple:
+    '''
+    Closed-form circumcircle of a-b-c.
+
+    Returns:
+        tuple: center x, y and the squared radius,
+               infinite for collinear points
+    '''
+    bx -= ax
+    by -= ay
+    cx -= ax
+    cy -= ay
+    d = 2 * (bx * cy - by * cx)
+    if d == 0:
+        return float('inf'), float('inf'), float('inf')
+    b2 = bx * bx + by * by
+    c2 = cx * cx + cy * cy
+    ux = (cy * b2 - by * c2) / d
+    uy = (bx * c2 - cx * b2) / d
+    return ax + ux, ay + uy, ux * ux + uy * uy
+
+
+def hilbertKey(x: int, y: int, n: int) -> int:
+    '''Position of the (x, y) grid cell along a Hilbert curve filling an n*n grid.'''
+    d = 0
+    s = n >> 1
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x = n - 1 - x
+                y = n - 1 - y
+            x, y = y, x
+        s >>= 1
+    return d
+
+
+class Triangulation:
+    '''
+    Delaunay triangulation built by randomized incremental insertion.
+    https://en.wikipedia.org/wiki/Delaunay_triangulation
+
+    Triangles are stored in flat lists, three slots per triangle:
+    vertex indices in counter-clockwise order and the neighbouring
+    triangle across the edge opposite to each vertex. The convex hull
+    is closed with ghost triangles (a, b, INF), so every triangle has
+    three neighbours and points outside the hull need no super triangle.
+    A new point is located by walking through the mesh from the last
+    created triangle, its conflict region (triangles whose circumcircle
+    contains it) is collected through the adjacency links and
+    re-triangulated as a fan around the point.
+
+    With integer coordinates the predicates are evaluated exactly.
+    '''
+
+    def __init__(self, seed: int = None) -> None:
+        self.xs = []
+        self.ys = []
+        self.vertices = []          # 3 vertex indices per triangle
+        self.neighbors = []         # 3 triangle indices per triangle
+        self.alive = []
+        self.free = []              # reusable triangle slots
+        self.vertex_triangle = []   # one incident triangle per vertex, -1 if none
+        self.pending = []           # vertices waiting for a non-collinear third point
+        self.pending_index = {}
+        self.last = -1              # start triangle of the next point location walk
+        self.random = random.Random(seed)
+
+    def vertexCount(self) -> int:
+        return len(self.xs)
+
+    def point(self, v: int) -> tuple:
+        return self.xs[v], self.ys[v]
+
+    def isGhost(self, t: int) -> bool:
+        return self.vertices[3*t + 2] == INF
+
+    def triangleVertices(self, t: int) -> tuple:
+        return tuple(self.vertices[3*t:3*t + 3])
+
+    def triangleNeighbors(self, t: int) -> tuple:
+        return tuple(self.neighbors[3*t:3*t + 3])
+
+    def insertPoints(self, points, progress=None) -> list[int]:
+        '''
+        Inserts a batch of points in a spatially coherent random order (BRIO),
+        which keeps the location walks short.
+
+        Args:
+            points: sequence of (x, y) coordinates
+            progress (callable): optional, called as progress(inserted, total)
+                                 after every 4096 points, it may raise to abort
+
+        Returns:
+            list[int]: vertex index of every point, in input order,
+                       coincident points get the same index
+        '''
+        result = [0] * len(points)
+        for count, i in enumerate(self.insertionOrder(points), 1):
+            result[i] = self.addPoint(points[i][0], points[i][1])
+            if progress is not None and count % 4096 == 0:
+                progress(count, len(points))
+        return result
+
+    def insertionOrder(self, points) -> list[int]:
+        '''
+        Biased randomized insertion order: the shuffled points are split into
+        rounds of doubling size, each round is sorted along a Hilbert curve.
+        '''
+        order = list(range(len(points)))
+        if len(order) < 64:
+            self.random.shuffle(order)
+            return order
+        min_x = min(p[0] for p in points)
+        min_y = min(p[1] for p in points)
+        span = max(max(p[0] for p in points) - min_x,
+                   max(p[1] for p in points) - min_y) or 1
+        n = 1 << 16
+        scale = (n - 1) / span
+        keys = [hilbertKey(int((p[0] - min_x) * scale), int((p[1] - min_y) * scale), n)
+                for p in points]
+        self.random.shuffle(order)
+        result = []
+        end = len(order)
+        rounds = []
+        while end > 32:
+            rounds.append(order[end // 2:end])
+            end //= 2
+        rounds.append(order[:end])
+        for part in reversed(rounds):
+            part.sort(key=keys.__getitem__)
+            result.extend(part)
+        return result
+
+    def addPoint(self, x, y) -> int:
+        '''
+        Inserts one point into the triangulation.
+
+        Returns:
+            int: vertex index of the point, or of the already inserted
+                 vertex on the same coordinates
+        '''
+        if self.pending or not self.alive:
+            return self._addPending(x, y)
+        t = self._locate(x, y)
+        for u in self.vertices[3*t:3*t + 3]:
+            if u != INF and self.xs[u] == x and self.ys[u] == y:
+                return u
+        v = self._newVertex(x, y)
+        self._insertVertex(v, t)
+        return v
+
+    def _newVertex(self, x, y) -> int:
+        self.xs.append(x)
+        self.ys.append(y)
+        self.vertex_triangle.append(-1)
+        return len(self.xs) - 1
+
+    def _addPending(self, x, y) -> int:
+        '''Collects points until the first non-collinear triple, then builds the first triangle.'''
+        if (x, y) in self.pending_index:
+            return self.pending_index[(x, y)]
+        v = self._newVertex(x, y)
+        self._pendVertex(v)
+        return v
+
+    def _pendVertex(self, v: int) -> None:
+        '''Adds a vertex to the collinear points, builds the first triangle if v is off their line.'''
+        xs, ys = self.xs, self.ys
+        x, y = xs[v], ys[v]
+        self.pending_index[(x, y)] = v
+        self.pending.append(v)
+        if len(self.pending) < 3:
+            return
+        a, b = self.pending[0], self.pending[1]
+        o = orient(xs[a], ys[a], xs[b], ys[b], x, y)
+        if o == 0:
+            return
+        if o < 0:
+            a, b = b, a
+        first = self._newTriangle(a, b, v)
+        ghosts = [self._newTriangle(b, a, INF),
+                  self._newTriangle(v, b, INF),
+                  self._newTriangle(a, v, INF)]
+        self._link([first] + ghosts)
+        for u in (a, b, v):
+            self.vertex_triangle[u] = first
+        self.last = first
+        collinear = self.pending[2:-1]
+        self.pending = []
+        self.pending_index = {}
+        for u in collinear:
+            self._insertVertex(u, self._locate(xs[u], ys[u]))
+
+    def _newTriangle(self, a: int, b: int, c: int) -> int:
+        if self.free:
+            t = self.free.pop()
+            self.vertices[3*t:3*t + 3] = (a, b, c)
+            self.neighbors[3*t:3*t + 3] = (-1, -1, -1)
+            self.alive[t] = True
+        else:
+            t = len(self.alive)
+            self.vertices.extend((a, b, c))
+            self.neighbors.extend((-1, -1, -1))
+            self.alive.append(True)
+        return t
+
+    def _removeTriangle(self, t: int) -> None:
+        self.alive[t] = False
+        self.free.append(t)
+
+    def _link(self, triangles: list[int]) -> None:
+        '''Connects the given triangles along their shared edges.'''
+        V = self.vertices
+        N = self.neighbors
+        open_edges = {}
+        for t in triangles:
+            for k in range(3):
+                a = V[3*t + (k + 1) % 3]
+                b = V[3*t + (k + 2) % 3]
+                other = open_edges.pop((b, a), None)
+                if other is None:
+                    open_edges[(a, b)] = 3*t + k
+                else:
+                    N[3*t + k] = other // 3
+                    N[other] = t
+
+    def _locate(self, x, y) -> int:
+        '''
+        Visibility walk towards (x, y), returns a triangle containing the point
+        or a ghost triangle whose hull edge sees it from outside.
+        '''
+        V = self.vertices
+        N = self.neighbors
+        xs, ys = self.xs, self.ys
+        t = self.last
+        if t < 0 or not self.alive[t]:
+            t = self.alive.index(True)
+        if V[3*t + 2] == INF:
+            t = N[3*t + 2]
+        rand = self.random.random
+        while True:
+            base = 3*t
+            if V[base + 2] == INF:
+                return t
+            start = int(rand() * 3)
+            for k in range(3):
+                i = (start + k) % 3
+                a = V[base + (i + 1) % 3]
+                b = V[base + (i + 2) % 3]
+                if orient(xs[a], ys[a], xs[b], ys[b], x, y) < 0:
+                    t = N[base + i]
+                    break
+            else:
+                return t
+
+    def _conflict(self, t: int, x, y) -> bool:
+        '''True if the point is inside the circumcircle of triangle t.'''
+        xs, ys = self.xs, self.ys
+        a, b, c = self.vertices[3*t:3*t + 3]
+        if c == INF:
+            # ghost: the point is beyond the hull edge, or strictly inside it
+            o = orient(xs[a], ys[a], xs[b], ys[b], x, y)
+            if o != 0:
+                return o > 0
+            return (xs[a] - x) * (xs[b] - x) + (ys[a] - y) * (ys[b] - y) < 0
+        return inCircle(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c], x, y) > 0
+
+    def _insertVertex(self, v: int, t: int) -> None:
+        '''Bowyer-Watson step on the mesh: replaces the conflict region of v around t with a fan.'''
+        V = self.vertices
+        N = self.neighbors
+        x, y = self.xs[v], self.ys[v]
+        cavity = [t]
+        in_cavity = {t}
+        boundary = []
+        i = 0
+        while i < len(cavity):
+            c = cavity[i]
+            i += 1
+            for k in range(3):
+                nb = N[3*c + k]
+                if nb in in_cavity:
+                    continue
+                if self._conflict(nb, x, y):
+                    in_cavity.add(nb)
+                    cavity.append(nb)
+                else:
+                    boundary.append((V[3*c + (k + 1) % 3], V[3*c + (k + 2) % 3], nb))
+        for c in cavity:
+            self._removeTriangle(c)
+        created = []
+        for a, b, nb in boundary:
+            if a == INF:
+                t = self._newTriangle(b, v, INF)
+                k = 1
+            elif b == INF:
+                t = self._newTriangle(v, a, INF)
+                k = 0
+            else:
+                t = self._newTriangle(a, b, v)
+                k = 2
+            # k: position of the vertex opposite to the boundary edge
+            N[3*t + k] = nb
+            nbase = 3*nb
+            for j in range(3):
+                if V[nbase + (j + 1) % 3] == b and V[nbase + (j + 2) % 3] == a:
+                    N[nbase + j] = t
+                    break
+            created.append((t, k))
+        spokes = {}
+        for t, opposite in created:
+            for k in range(3):
+                if k == opposite:
+                    continue
+                a = V[3*t + (k + 1) % 3]
+                b = V[3*t + (k + 2) % 3]
+                other = spokes.pop((b, a), None)
+                if other is None:
+                    spokes[(a, b)] = 3*t + k
+                else:
+                    N[3*t + k] = other // 3
+                    N[other] = t
+        VT = self.vertex_triangle
+        for t, _ in created:
+            for u in V[3*t:3*t + 3]:
+                if u != INF:
+                    VT[u] = t
+            if V[3*t + 2] != INF:
+                self.last = t
+
+    def vertexStar(self, v: int) -> list[int]:
+        '''triangles around an inserted vertex in counter-clockwise order, ghosts included'''
+        V = self.vertices
+        N = self.neighbors
+        start = self.vertex_triangle[v]
+        star = []
+        t = start
+        while True:
+            star.append(t)
+            i = V.index(v, 3*t, 3*t + 3) - 3*t
+            # across the edge opposite to the next vertex: the next triangle around v
+            t = N[3*t + (i + 1) % 3]
+            if t == start:
+                return star
+
+    def triangles(self):
+        '''generator method, iterates through the finite triangles (vertex index triples)'''
+        V = self.vertices
+        for t, alive in enumerate(self.alive):
+            if alive and V[3*t + 2] != INF:
+                yield V[3*t], V[3*t + 1], V[3*t + 2]
+
+    def triangleIds(self):
+        '''generator method, iterates through the indices of finite triangles'''
+        V = self.vertices
+        for t, alive in enumerate(self.alive):
+            if alive and V[3*t + 2] != INF:
+                yield t
+
+    def edges(self):
+        '''generator method, iterates through the undirected edges (vertex index pairs) once'''
+        if self.pending:
+            # every point collinear so far: the triangulation is a chain
+            chain = sorted(self.pending, key=lambda u: (self.xs[u], self.ys[u]))
+            for a, b in zip(chain, chain[1:]):
+                yield a, b
+            return
+        V = self.vertices
+        N = self.neighbors
+        for t in self.triangleIds():
+            for k in range(3):
+                a = V[3*t + (k + 1) % 3]
+                b = V[3*t + (k + 2) % 3]
+                if a < b or V[3*N[3*t + k] + 2] == INF:
+                    yield a, b
+
+    def edgeTriangles(self):
+        '''
+        generator method, iterates through the undirected edges once with the
+        triangles on their two sides: (a, b, t, u), a -> b is counter-clockwise
+        in the finite triangle t, u is the neighbour across it (a ghost triangle
+        for hull edges)
+        '''
+        V = self.vertices
+        N = self.neighbors
+        for t in self.triangleIds():
+            for k in range(3):
+                a = V[3*t + (k + 1) % 3]
+                b = V[3*t + (k + 2) % 3]
+                u = N[3*t + k]
+                if a < b or V[3*u + 2] == INF:
+                    yield a, b, t, u
+
+    @classmethod
+    def fromTriangles(cls, points, triangles, seed: int = None) -> 'Triangulation':
+        '''
+        Mesh of a finished triangulation, eg.: made by another implementation.
+        Edges without a second triangle are closed with ghost triangles.
+
+        Args:
+            points: sequence of (x, y) vertex coordinates
+            triangles: vertex index triples in any orientation, degenerate ones are dropped
+
+        Returns:
+            Triangulation: vertex i is points[i]
+        '''
+        tri = cls(seed)
+        for x, y in points:
+            tri._newVertex(x, y)
+        xs, ys = tri.xs, tri.ys
+        created = []
+        for a, b, c in triangles:
+            o = orient(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c])
+            if o == 0:
+                continue
+            if o < 0:
+                b, c = c, b
+            created.append(tri._newTriangle(a, b, c))
+        if not created:
+            # collinear (or too few) points: the collinear state, as if inserted one by one
+            for v in range(len(xs)):
+                if tri.pending or not tri.alive:
+                    if (xs[v], ys[v]) not in tri.pending_index:
+                        tri._pendVertex(v)
+                else:
+                    t = tri._locate(xs[v], ys[v])
+                    if all(u == INF or xs[u] != xs[v] or ys[u] != ys[v] for u in tri.vertices[3*t:3*t + 3]):
+                        tri._insertVertex(v, t)
+            return tri
+        V = tri.vertices
+        directed = {(V[3*t + k], V[3*t + (k + 1) % 3]) for t in created for k in range(3)}
+        ghosts = [tri._newTriangle(b, a, INF) for a, b in directed if (b, a) not in directed]
+        tri._link(created + ghosts)
+        for t in created + ghosts:
+            for u in V[3*t:3*t + 3]:
+                if u != INF:
+                    tri.vertex_triangle[u] = t
+        tri.last = created[0]
+        return tri
+
+    def circumcenter(self, t: int) -> tuple:
+        '''circumcircle center of a finite triangle'''
+        xs, ys = self.xs, self.ys
+        a, b, c = self.vertices[3*t:3*t + 3]
+        cc_x, cc_y, _ = circumcircle(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c])
+        return cc_x, cc_y
+
+
+if __name__ == "__main__":
+    tri = Triangulation(seed=1)
+    print(tri.insertPoints([(1,2), (2,2), (5,5), (4,8), (2,2)]))
+    print(list(tri.triangles()))
+    print(list(tri.edges()))
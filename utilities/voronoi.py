@@ -0,0 +1,330 @@
+# Voronoi cell polygons from the dual of a Delaunay triangulation
+
+import math
+
+from core.graph import Edge, Graph, Node
+from utilities.triangulation import INF, Triangulation, inCircle
+
+
+def clipHalfPlane(polygon: list, nx: float, ny: float, c: float) -> list:
+    '''
+    One Sutherland-Hodgman step: the part of a polygon where nx*x + ny*y <= c.
+
+    Args:
+        polygon (list): (x, y) vertices in order
+        nx, ny, c (float): the half-plane
+
+    Returns:
+        list: vertices of the clipped polygon, empty if nothing is left
+    '''
+    result = []
+    count = len(polygon)
+    for i in range(count):
+        px, py = polygon[i - 1]
+        qx, qy = polygon[i]
+        p_side = nx * px + ny * py - c
+        q_side = nx * qx + ny * qy - c
+        if q_side <= 0:
+            if p_side > 0:
+                t = p_side / (p_side - q_side)
+                result.append((px + t * (qx - px), py + t * (qy - py)))
+            result.append((qx, qy))
+        elif p_side <= 0:
+            t = p_side / (p_side - q_side)
+            result.append((px + t * (qx - px), py + t * (qy - py)))
+    return result
+
+
+def clipRect(polygon: list, x0: float, y0: float, x1: float, y1: float) -> list:
+    '''Sutherland-Hodgman clipping of a polygon to an axis aligned rectangle.'''
+    for nx, ny, c in ((-1, 0, -x0), (1, 0, x1), (0, -1, -y0), (0, 1, y1)):
+        if not polygon:
+            break
+        polygon = clipHalfPlane(polygon, nx, ny, c)
+    return polygon
+
+
+def voronoiCells(triangulation: Triangulation, width: float, height: float, sites=None) -> dict:
+    '''
+    Voronoi cell of every vertex, clipped to the (0, 0, width, height) area.
+    The corners of a cell are the circumcenters of the triangles around
+    its site. A hull edge's cell boundary is a ray from the circumcenter
+    of its triangle, pointing outwards; it is cut at a far point outside
+    the area, the clipping removes the rest. O(triangles) in total.
+
+    Args:
+        triangulation (Triangulation): Delaunay triangulation of the sites
+        width, height (float): area size
+        sites: optional vertex indices, only their cells are calculated
+               (from the triangles around them, O(degree) per cell);
+               indices not in the triangulation are skipped
+
+    Returns:
+        dict: vertex index -> list of (x, y) polygon vertices, counter-clockwise
+    '''
+    xs, ys = triangulation.xs, triangulation.ys
+    if triangulation.pending or not triangulation.alive:
+        cells = _chainCells(triangulation, width, height)
+        if sites is not None:
+            cells = {u: cells[u] for u in sites if u in cells}
+        return cells
+    min_x = min(min(xs), 0)
+    min_y = min(min(ys), 0)
+    far = 4 * (max(max(xs), width) - min_x + max(max(ys), height) - min_y)
+    if sites is None:
+        corners = _allCorners(triangulation, far)
+    else:
+        corners = {u: _starCorners(triangulation, u, far) for u in sites
+                   if 0 <= u < len(xs) and triangulation.vertex_triangle[u] >= 0}
+    cells = {}
+    for u, points in corners.items():
+        sx, sy = xs[u], ys[u]
+        points.sort(key=lambda p: math.atan2(p[1] - sy, p[0] - sx))
+        polygon = clipRect(points, 0, 0, width, height)
+        if polygon:
+            cells[u] = polygon
+    return cells
+
+
+def _hullRay(triangulation: Triangulation, t: int, center: tuple, far: float) -> tuple:
+    '''far end of the cell boundary ray of ghost t and the outward normal of its hull edge'''
+    xs, ys = triangulation.xs, triangulation.ys
+    # ghost (a, b, INF): the outside of hull edge a -> b is on its left
+    a, b = triangulation.vertices[3*t], triangulation.vertices[3*t + 1]
+    dx, dy = xs[b] - xs[a], ys[b] - ys[a]
+    length = math.hypot(dx, dy)
+    nx, ny = -dy / length, dx / length
+    return (center[0] + far * nx, center[1] + far * ny), (nx, ny)
+
+
+def _allCorners(triangulation: Triangulation, far: float) -> dict:
+    '''cell corners of every vertex in one pass over the triangles'''
+    xs, ys = triangulation.xs, triangulation.ys
+    V = triangulation.vertices
+    N = triangulation.neighbors
+    corners = {}
+    hull_normals = {}
+    centers = {}
+    for t, alive in enumerate(triangulation.alive):
+        if not alive or V[3*t + 2] == INF:
+            continue
+        cx, cy = triangulation.circumcenter(t)
+        if not math.isfinite(cx):
+            continue
+        centers[t] = (cx, cy)
+        for k in range(3):
+            corners.setdefault(V[3*t + k], []).append((cx, cy))
+    for t, alive in enumerate(triangulation.alive):
+        if not alive or V[3*t + 2] != INF:
+            continue
+        inner = N[3*t + 2]
+        if inner not in centers:
+            continue
+        ray_end, (nx, ny) = _hullRay(triangulation, t, centers[inner], far)
+        for u in (V[3*t], V[3*t + 1]):
+            corners[u].append(ray_end)
+            sum_x, sum_y = hull_normals.get(u, (0.0, 0.0))
+            hull_normals[u] = (sum_x + nx, sum_y + ny)
+    for u, (nx, ny) in hull_normals.items():
+        # a far point between the two rays keeps wide open cells from being cut short
+        length = math.hypot(nx, ny)
+        if length > 0:
+            corners[u].append((xs[u] + far * nx / length, ys[u] + far * ny / length))
+    return corners
+
+
+def _starCorners(triangulation: Triangulation, u: int, far: float) -> list:
+    '''cell corners of one vertex from the triangles around it, the same points as _allCorners'''
+    V = triangulation.vertices
+    N = triangulation.neighbors
+    points = []
+    sum_x = sum_y = 0.0
+    hull = False
+    for t in triangulation.vertexStar(u):
+        if V[3*t + 2] != INF:
+            cx, cy = triangulation.circumcenter(t)
+            if math.isfinite(cx):
+                points.append((cx, cy))
+            continue
+        center = triangulation.circumcenter(N[3*t + 2])
+        if not math.isfinite(center[0]):
+            continue
+        ray_end, (nx, ny) = _hullRay(triangulation, t, center, far)
+        points.append(ray_end)
+        sum_x += nx
+        sum_y += ny
+        hull = True
+    length = math.hypot(sum_x, sum_y)
+    if hull and length > 0:
+        points.append((triangulation.xs[u] + far * sum_x / length, triangulation.ys[u] + far * sum_y / length))
+    return points
+
+
+def _chainCells(triangulation: Triangulation, width: float, height: float) -> dict:
+    '''cells of collinear sites: the area cut by the bisectors of the chain neighbours'''
+    xs, ys = triangulation.xs, triangulation.ys
+    chain = sorted(triangulation.pending, key=lambda u: (xs[u], ys[u]))
+    area = [(0, 0), (width, 0), (width, height), (0, height)]
+    cells = {}
+    for i, u in enumerate(chain):
+        polygon = area
+        for j in (i - 1, i + 1):
+            if not 0 <= j < len(chain):
+                continue
+            w = chain[j]
+            # keep the points closer to u than to w
+            nx, ny = xs[w] - xs[u], ys[w] - ys[u]
+            c = (xs[w] ** 2 - xs[u] ** 2 + ys[w] ** 2 - ys[u] ** 2) / 2
+            polygon = clipHalfPlane(polygon, nx, ny, c)
+        if polygon:
+            cells[u] = polygon
+    return cells
+
+
+class VoronoiGraph(Graph):
+    '''
+    Voronoi diagram as a graph, the dual of a Delaunay triangulation,
+    built in one pass over the triangle adjacency: O(triangles).
+    The nodes are the Voronoi vertices, the circumcenters of the
+    triangles truncated to int like in Delaunay.collectResults;
+    neighbouring triangles on the same circle (cocircular sites) and
+    centers truncated to the same point share one node. data['sites'] of
+    a node holds the sites around it.
+    The edges are the finite Voronoi edges, one per Delaunay edge between
+    two triangles. A hull edge gives an unbounded ray instead: from the
+    circumcenter of its triangle, perpendicular to the edge, outwards.
+
+    Sites are identified by their triangulation vertex index:
+        sites       vertex -> site node, None for vertices without one
+        cells       vertex -> Voronoi nodes around the site, counter-clockwise
+        unbounded   vertices of the open cells (the hull vertices)
+        rays        (origin node, (dx, dy) unit direction, vertex a, vertex b)
+                    for every hull edge a-b
+        edge_sites  the two vertices separated by edges[i]
+        lines       bisectors of neighbouring collinear sites when there is no
+                    triangle at all: ((x, y) point, (dx, dy) direction, vertex a, vertex b)
+    '''
+
+    def __init__(self) -> None:
+        super().__init__(unique_edges=True)
+        self.sites = []
+        self.site_vertex = {}       # id(site) -> vertex
+        self.cells = {}
+        self.unbounded = set()
+        self.rays = []
+        self.edge_sites = []
+        self.lines = []
+
+    def cell(self, site: Node) -> list:
+        '''Voronoi nodes around a site node, counter-clockwise, empty if it has no cell'''
+        return self.cells.get(self.site_vertex.get(id(site)), [])
+
+    def isUnbounded(self, site: Node) -> bool:
+        return self.site_vertex.get(id(site)) in self.unbounded
+
+    @classmethod
+    def fromTriangulation(cls, triangulation: Triangulation, sites: list = None) -> 'VoronoiGraph':
+        '''
+        Args:
+            triangulation (Triangulation): Delaunay triangulation of the sites
+            sites (list): site node of every vertex index, new nodes on the
+                          vertex coordinates if not given
+
+        Returns:
+            VoronoiGraph: the Voronoi diagram of the sites
+        '''
+        graph = cls()
+        xs, ys = triangulation.xs, triangulation.ys
+        if sites is None:
+            sites = [Node(x, y) for x, y in zip(xs, ys)]
+        graph.sites = list(sites)
+        graph.site_vertex = {id(site): v for v, site in enumerate(graph.sites) if site is not None}
+        if triangulation.pending or not triangulation.alive:
+            chain = sorted(triangulation.pending, key=lambda u: (xs[u], ys[u]))
+            for a, b in zip(chain, chain[1:]):
+                dx, dy = xs[b] - xs[a], ys[b] - ys[a]
+                length = math.hypot(dx, dy)
+                graph.lines.append((((xs[a] + xs[b]) / 2, (ys[a] + ys[b]) / 2),
+                                    (-dy / length, dx / length), a, b))
+            graph.unbounded.update(chain)
+            return graph
+        V = triangulation.vertices
+        # neighbouring triangles on the same circle share a Voronoi vertex, union-find
+        parent = {}
+
+        def root(t: int) -> int:
+            while parent.get(t, t) != t:
+                parent[t] = parent.get(parent[t], parent[t])
+                t = parent[t]
+            return t
+
+        hull_edges = []
+        inner_edges = []
+        for a, b, t, u in triangulation.edgeTriangles():
+            if V[3*u + 2] == INF:
+                hull_edges.append((a, b, t))
+                continue
+            inner_edges.append((a, b, t, u))
+            c = V[3*t] + V[3*t + 1] + V[3*t + 2] - a - b
+            d = V[3*u] + V[3*u + 1] + V[3*u + 2] - a - b
+            if inCircle(xs[a], ys[a], xs[b], ys[b], xs[c], ys[c], xs[d], ys[d]) == 0:
+                parent[root(u)] = root(t)
+        center_node = {}
+        position_node = {}      # truncated circumcenter -> node
+        for t in triangulation.triangleIds():
+            r = root(t)
+            node = center_node.get(r)
+            if node is None:
+                cx, cy = triangulation.circumcenter(r)
+                position = (int(cx), int(cy))
+                node = position_node.get(position)
+                if node is None:
+                    node = Node(*position)
+                    node.data = {'sites': set()}
+                    graph.addNode(node)
+                    position_node[position] = node
+                center_node[r] = node
+            center_node[t] = node
+            node.data['sites'].update(graph.sites[v] for v in V[3*t:3*t + 3] if graph.sites[v] is not None)
+        for a, b, t, u in inner_edges:
+            n1 = center_node[t]
+            n2 = center_node[u]
+            if n1 is n2:
+                continue
+            edge = Edge(n1, n2)
+            if not graph.addEdge(edge):
+                continue
+            n1.addEdge(edge)
+            n2.addEdge(edge)
+            graph.edge_sites.append((a, b))
+        for a, b, t in hull_edges:
+            # a -> b is counter-clockwise in t, the outside is on its right
+            dx, dy = xs[b] - xs[a], ys[b] - ys[a]
+            length = math.hypot(dx, dy)
+            graph.rays.append((center_node[t], (dy / length, -dx / length), a, b))
+            graph.unbounded.add(a)
+            graph.unbounded.add(b)
+        for v, t in enumerate(triangulation.vertex_triangle):
+            if t < 0:
+                continue
+            cell = []
+            for s in triangulation.vertexStar(v):
+                if V[3*s + 2] != INF and (not cell or cell[-1] is not center_node[s]):
+                    cell.append(center_node[s])
+            if len(cell) > 1 and cell[0] is cell[-1]:
+                cell.pop()
+            graph.cells[v] = cell
+        return graph
+
+
+if __name__ == "__main__":
+    tri = Triangulation(seed=1)
+    points = [(100, 100), (300, 120), (200, 300), (50, 250)]
+    indices = tri.insertPoints(points)
+    cells = voronoiCells(tri, 400, 400)
+    for point, vertex in zip(points, indices):
+        print(point, [(round(x), round(y)) for x, y in cells[vertex]])
+    voronoi = VoronoiGraph.fromTriangulation(tri)
+    print(len(voronoi.nodes), "Voronoi vertices,", len(voronoi.edges), "edges,", len(voronoi.rays), "rays")
+    for vertex, cell in voronoi.cells.items():
+        print(vertex, [str(node) for node in cell], "unbounded" if vertex in voronoi.unbounded else "")